@@ -0,0 +1,70 @@
+"""
+Check that the cost of analysing a position doesn't depend on the number
+of moves played before it.
+
+Run it as ``python -m benchmarks.game_length``.
+"""
+
+import timeit
+
+import chess
+
+from chess_tactics.lichess_game import game_to_board
+from chess_tactics.mistakes import (
+    hung_fork,
+    hung_other_piece,
+    left_piece_hanging,
+    missed_fork,
+)
+from chess_tactics.tactics import get_hanging_pieces, is_forking_move
+
+OPENING = "e4 e5 Nf3 Nc6 Bc4 Bc5".split()
+
+# Bishops go back and forth, so the position repeats every 4 plies,
+# while the move stack keeps growing.
+SHUFFLE = "Bb5 Bb4 Bc4 Bc5".split()
+
+PLIES = [6, 50, 102, 202, 302]
+
+
+def _game(plies: int) -> dict:
+    moves = OPENING + SHUFFLE * ((plies - len(OPENING)) // len(SHUFFLE))
+    return {"moves": " ".join(moves)}
+
+
+def _benchmarks(board: chess.Board):
+    move = board.parse_san("Nxe5")
+    best_move = board.parse_san("O-O")
+    board_after = board.copy(stack=False)
+    board_after.push(move)
+    opponent_move = board_after.parse_san("Nxe5")
+    return {
+        "get_hanging_pieces": lambda: get_hanging_pieces(board, board.turn),
+        "is_forking_move": lambda: is_forking_move(board, move),
+        "hung_other_piece": lambda: hung_other_piece(board, move, [best_move]),
+        "left_piece_hanging": lambda: left_piece_hanging(board, move, [best_move]),
+        "missed_fork": lambda: missed_fork(board, move, [best_move]),
+        "hung_fork": lambda: hung_fork(
+            board, move, [opponent_move], [move, opponent_move]
+        ),
+    }
+
+
+def main(number: int = 200) -> None:
+    results: dict[str, dict[int, float]] = {}
+    for plies in PLIES:
+        board = game_to_board(_game(plies))
+        for name, func in _benchmarks(board).items():
+            seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+            results.setdefault(name, {})[plies] = seconds
+
+    header = "".join(f"{f'ply {plies}':>11}" for plies in PLIES)
+    print(f"{'usec per call':<20}{header}{'ratio':>9}")
+    for name, timings in results.items():
+        row = "".join(f"{timings[plies] * 1e6:11.1f}" for plies in PLIES)
+        ratio = timings[PLIES[-1]] / timings[PLIES[0]]
+        print(f"{name:<20}{row}{ratio:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
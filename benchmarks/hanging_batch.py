@@ -0,0 +1,57 @@
+"""
+Compare :func:`chess_tactics.batch.get_hanging_masks` to calling
+:func:`chess_tactics.tactics.get_hanging_pieces` for each position,
+and check that the results are the same.
+
+Positions are taken from the games of :mod:`benchmarks.replay`.
+Run it as ``python -m benchmarks.hanging_batch [number of games]``.
+"""
+
+import sys
+import time
+
+import chess
+
+from chess_tactics.batch import BLACK, WHITE, get_hanging_masks
+from chess_tactics.tactics import get_hanging_pieces
+
+from .replay import make_corpus
+
+
+def make_positions(games: list[dict]) -> list[chess.Board]:
+    boards = []
+    for game in games:
+        board = chess.Board()
+        for san in game["moves"].split():
+            board.push_san(san)
+            boards.append(board.copy(stack=False))
+    return boards
+
+
+def main(size: int = 200) -> None:
+    boards = make_positions(make_corpus(size))
+    print(f"{len(boards)} positions")
+
+    start = time.perf_counter()
+    expected = [
+        (get_hanging_pieces(board, chess.WHITE), get_hanging_pieces(board, chess.BLACK))
+        for board in boards
+    ]
+    baseline = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hanging = get_hanging_masks(boards)
+    batch = time.perf_counter() - start
+
+    for (white, black), masks in zip(expected, hanging):
+        assert int(white) == masks[WHITE] and int(black) == masks[BLACK]
+
+    for name, seconds in [("get_hanging_pieces", baseline), ("batch", batch)]:
+        print(
+            f"{name:<20} {len(boards) / seconds:10.0f} positions/s  "
+            f"x{baseline / seconds:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,254 @@
+"""
+Benchmarks of the tactics and mistakes detection hot paths.
+
+Positions are the FENs from ``tests/fens.py``, and middlegame positions
+from the games in ``benchmarks/middlegames.pgn``. Each function is called
+with all its inputs for these positions (e.g. :func:`get_attackers` for
+all occupied squares, :func:`is_forking_move` for all legal moves, and
+mistakes detectors for the game moves).
+
+Results are reported as calls per second, and as memory allocated per call
+(peak traced by :mod:`tracemalloc`). Save them as JSON to compare
+between commits::
+
+    python -m benchmarks.hot_paths --output before.json
+    python -m benchmarks.hot_paths --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import chess
+import chess.engine
+import chess.pgn
+
+from chess_tactics import mistakes
+from chess_tactics.attacks import get_attackers
+from chess_tactics.exchange import (
+    get_capture_exchange_evaluation,
+    get_exchange_evaluation,
+)
+from chess_tactics.tactics import find_forks, get_hanging_pieces, is_forking_move
+from chess_tactics.tracker import HangingTracker
+from chess_tactics.values import PIECE_VALUES
+from tests import fens
+
+MIDDLEGAMES = Path(__file__).with_name("middlegames.pgn")
+MIDDLEGAME_PLIES = range(16, 60)
+
+# (score, best score) pairs for the mate detectors, from the white point of view
+SCORES = [
+    (chess.engine.Cp(30), chess.engine.Cp(50)),
+    (chess.engine.Cp(-200), chess.engine.Mate(2)),
+    (chess.engine.Mate(-1), chess.engine.Cp(0)),
+    (chess.engine.Mate(3), chess.engine.Mate(1)),
+]
+
+Call = Callable[[], object]
+
+
+class Position(NamedTuple):
+    board: chess.Board
+    # the move played in the game, or the first of ranked moves
+    move: chess.Move
+
+
+class Result(NamedTuple):
+    calls: int
+    ops_per_sec: float
+    alloc_bytes_per_call: float
+
+
+def load_positions() -> list[Position]:
+    positions = []
+    for name, fen in vars(fens).items():
+        if name.isupper():
+            board = chess.Board(fen)
+            moves = _ranked_moves(board)
+            if moves:
+                positions.append(Position(board, moves[0]))
+
+    with MIDDLEGAMES.open() as f:
+        while (game := chess.pgn.read_game(f)) is not None:
+            board = game.board()
+            for ply, move in enumerate(game.mainline_moves()):
+                if ply in MIDDLEGAME_PLIES:
+                    positions.append(Position(board.copy(stack=False), move))
+                board.push(move)
+    return positions
+
+
+def make_benchmarks(positions: list[Position]) -> dict[str, list[Call]]:
+    """Return lists of calls to benchmark, by function name."""
+    benchmarks: dict[str, list[Call]] = {}
+
+    def add(name: str, func: Callable, *args, **kwargs) -> None:
+        benchmarks.setdefault(name, []).append(lambda: func(*args, **kwargs))
+
+    for board, move in positions:
+        tracker = HangingTracker(board.copy())
+        for square in chess.scan_forward(board.occupied):
+            color = board.color_at(square)
+            add("get_attackers", get_attackers, board, not color, square)
+            if board.piece_type_at(square) != chess.KING:
+                add(
+                    "get_exchange_evaluation",
+                    get_exchange_evaluation,
+                    board,
+                    not color,
+                    square,
+                )
+        for color in chess.COLORS:
+            add("get_hanging_pieces", get_hanging_pieces, board, color)
+        add("find_forks", find_forks, board, board.turn)
+        for legal_move in board.legal_moves:
+            if board.is_capture(legal_move):
+                add(
+                    "get_capture_exchange_evaluation",
+                    get_capture_exchange_evaluation,
+                    board,
+                    legal_move,
+                )
+            add("is_forking_move", is_forking_move, board, legal_move)
+            add("HangingTracker.push", _push_and_pop, tracker, legal_move)
+
+        best_moves = _ranked_moves(board)[:2]
+        board_after = board.copy(stack=False)
+        board_after.push(move)
+        best_opponent_moves = _ranked_moves(board_after)[:2]
+        pv = [move, *best_opponent_moves[:1]]
+        for name in [
+            "hanging_piece_not_captured",
+            "hung_other_piece",
+            "left_piece_hanging",
+            "missed_fork",
+            "missed_sacrifice",
+        ]:
+            add(name, getattr(mistakes, name), board, move, best_moves)
+        for name in ["hung_moved_piece", "started_bad_trade"]:
+            add(name, getattr(mistakes, name), board, move, best_opponent_moves)
+        add("hung_fork", mistakes.hung_fork, board, move, best_opponent_moves, pv)
+        add(
+            "classify_move",
+            mistakes.classify_move,
+            board,
+            move,
+            best_moves,
+            best_opponent_moves,
+            pv,
+        )
+
+    for name in [
+        "hung_mate_n",
+        "hung_mate_n_plus",
+        "missed_mate_n",
+        "missed_mate_n_plus",
+    ]:
+        for score, best_score in SCORES:
+            for n in [1, 2, 3]:
+                add(name, getattr(mistakes, name), score, best_score, n)
+    return benchmarks
+
+
+def run(calls: list[Call], *, repeat: int = 3) -> Result:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for call in calls:
+            call()
+        best = min(best, time.perf_counter() - start)
+
+    allocated = 0
+    tracemalloc.start()
+    try:
+        for call in calls:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            call()
+            allocated += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return Result(len(calls), len(calls) / best, allocated / len(calls))
+
+
+def _push_and_pop(tracker: HangingTracker, move: chess.Move) -> None:
+    tracker.push(move)
+    for color in chess.COLORS:
+        tracker.hanging_pieces(color)
+    tracker.pop()
+
+
+def _ranked_moves(board: chess.Board) -> list[chess.Move]:
+    """Legal moves, the captures of the most valuable pieces first."""
+
+    def _key(move: chess.Move):
+        return -PIECE_VALUES[board.piece_type_at(move.to_square)], move.uci()
+
+    return sorted(board.legal_moves, key=_key)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.strip()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("-o", "--output", help="save results to a JSON file")
+    parser.add_argument("--compare", help="JSON file with results to compare to")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-k", "--filter", help="run benchmarks with this substring")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    positions = load_positions()
+    print(f"{len(positions)} positions")
+    print(f"{'':<32}{'calls':>8}{'ops/sec':>12}{'bytes/call':>12}")
+    results = {}
+    for name, calls in make_benchmarks(positions).items():
+        if args.filter and args.filter not in name:
+            continue
+        result = run(calls, repeat=args.repeat)
+        results[name] = result._asdict()
+        line = (
+            f"{name:<32}{result.calls:>8}{result.ops_per_sec:>12.0f}"
+            f"{result.alloc_bytes_per_call:>12.0f}"
+        )
+        if name in baseline:
+            line += f"  x{result.ops_per_sec / baseline[name]['ops_per_sec']:.2f}"
+        print(line)
+
+    if args.output:
+        report = {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "chess": chess.__version__,
+            "positions": len(positions),
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
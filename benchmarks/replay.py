@@ -0,0 +1,81 @@
+"""
+Compare game replay with :func:`chess_tactics.lichess_game.game_to_board`
+to the plain ``board.push_san`` loop.
+
+The corpus is made of games which start like the test fixture games,
+and continue with random moves, so opening prefixes are shared between
+games, like in a real database.
+
+Run it as ``python -m benchmarks.replay [number of games]``.
+"""
+
+import random
+import sys
+import time
+
+import chess
+
+from chess_tactics import move_utils
+from chess_tactics.lichess_game import game_to_board
+from tests._lichess_games import GAME_1
+
+MAX_PLIES = 80
+
+
+def make_corpus(size: int, seed: int = 0) -> list[dict]:
+    rnd = random.Random(seed)
+    opening = str(GAME_1["moves"]).split()
+    games = []
+    for _ in range(size):
+        board = chess.Board()
+        san_list = []
+        for san in opening[: rnd.randint(4, 20)]:
+            san_list.append(san)
+            board.push_san(san)
+        while len(san_list) < MAX_PLIES and not board.is_game_over():
+            move = rnd.choice(list(board.legal_moves))
+            san_list.append(board.san(move))
+            board.push(move)
+        games.append({"moves": " ".join(san_list)})
+    return games
+
+
+def replay_push_san(game: dict) -> chess.Board:
+    board = chess.Board()
+    for san in game["moves"].split():
+        board.push_san(san)
+    return board
+
+
+def _measure(func, games: list[dict]) -> float:
+    start = time.perf_counter()
+    for game in games:
+        func(game)
+    return time.perf_counter() - start
+
+
+def main(size: int = 2000) -> None:
+    games = make_corpus(size)
+    plies = sum(len(game["moves"].split()) for game in games)
+    print(f"{size} games, {plies} plies")
+
+    for game in games:
+        assert game_to_board(game) == replay_push_san(game)
+    move_utils._san_cache.clear()
+
+    results = [
+        ("push_san", _measure(replay_push_san, games)),
+        ("game_to_board (cold cache)", _measure(game_to_board, games)),
+        ("game_to_board (warm cache)", _measure(game_to_board, games)),
+    ]
+    baseline = results[0][1]
+    for name, seconds in results:
+        print(
+            f"{name:<28} {size / seconds:10.0f} games/s "
+            f"{seconds / plies * 1e6:6.2f} us/ply  x{baseline / seconds:.2f}"
+        )
+    print(move_utils._san_cache.stats())
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
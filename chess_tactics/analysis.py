@@ -0,0 +1,220 @@
+"""
+Facts about a position which are shared between tactics and mistakes
+detection functions.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Optional, Union
+
+import chess
+import chess.polyglot
+
+from . import cache, instrumentation
+from .attacks import (
+    PinMap,
+    get_attackers_mask,
+    get_least_valuable_piece_mask,
+    get_pin_map,
+)
+from .exchange import (
+    ExchangeMap,
+    get_capture_exchange_evaluation,
+    get_exchange_evaluation,
+    get_exchange_values,
+    see_ge,
+)
+from .move_utils import pushed
+
+
+class PositionAnalysis:
+    """
+    Pins, attackers, exchange values and hanging pieces of a position.
+
+    Everything is computed on first use and cached, so functions
+    from :mod:`chess_tactics.tactics` and :mod:`chess_tactics.mistakes`
+    which get the same ``analysis`` argument don't repeat the work.
+
+    The board must not be modified while the analysis is in use.
+    """
+
+    def __init__(self, board: chess.Board) -> None:
+        self.board = board
+        self._pin_maps: dict[chess.Color, PinMap] = {}
+        self._attackers: dict[tuple[chess.Color, chess.Square], chess.Bitboard] = {}
+        self._exchange_values: dict[tuple[chess.Color, chess.Square], int] = {}
+        self._capture_exchange_values: dict[chess.Move, int] = {}
+        self._see_ge: dict[tuple[Union[chess.Move, chess.Square], int], bool] = {}
+        self._exchange_maps: dict[chess.Color, tuple[list[int], chess.Bitboard]] = {}
+        self._hanging: dict[chess.Color, chess.Bitboard] = {}
+        self._after: dict[chess.Move, PositionAnalysis] = {}
+        self._zobrist_hash: Optional[int] = None
+
+    def zobrist_hash(self) -> int:
+        """Return ``chess.polyglot.zobrist_hash(board)``."""
+        if self._zobrist_hash is None:
+            self._zobrist_hash = chess.polyglot.zobrist_hash(self.board)
+        return self._zobrist_hash
+
+    def pin_map(self, color: chess.Color) -> PinMap:
+        """See :func:`chess_tactics.attacks.get_pin_map`."""
+        if color not in self._pin_maps:
+            self._pin_maps[color] = get_pin_map(self.board, color)
+        return self._pin_maps[color]
+
+    def attackers_mask(
+        self, color: chess.Color, square: chess.Square
+    ) -> chess.Bitboard:
+        """See :func:`chess_tactics.attacks.get_attackers_mask`."""
+        key = color, square
+        if key not in self._attackers:
+            self._attackers[key] = get_attackers_mask(
+                self.board, color, square, pin_map=self.pin_map(color)
+            )
+        return self._attackers[key]
+
+    def least_valuable_attacker(
+        self, color: chess.Color, square: chess.Square
+    ) -> Optional[chess.Square]:
+        """See :func:`chess_tactics.attacks.get_least_valuable_attacker`."""
+        attackers = self.attackers_mask(color, square)
+        attacker = get_least_valuable_piece_mask(self.board, attackers)
+        return chess.lsb(attacker) if attacker else None
+
+    def exchange_evaluation(self, color: chess.Color, square: chess.Square) -> int:
+        """See :func:`chess_tactics.exchange.get_exchange_evaluation`."""
+        if color in self._exchange_maps and self._is_target(color, square):
+            return self._exchange_maps[color][0][square]
+        key = color, square
+        if key not in self._exchange_values:
+            zobrist_hash = self.zobrist_hash() if cache.get_cache() else None
+            self._exchange_values[key] = get_exchange_evaluation(
+                self.board,
+                color,
+                square,
+                pin_map=self.pin_map(color),
+                zobrist_hash=zobrist_hash,
+            )
+        return self._exchange_values[key]
+
+    def exchange_values(self, color: chess.Color) -> list[int]:
+        """See :func:`chess_tactics.exchange.get_exchange_values`."""
+        if color not in self._exchange_maps:
+            self._exchange_maps[color] = get_exchange_values(
+                self.board, color, pin_map=self.pin_map(color)
+            )
+        return self._exchange_maps[color][0]
+
+    def exchange_map(self) -> ExchangeMap:
+        """See :func:`chess_tactics.exchange.exchange_map`."""
+        colors = [chess.BLACK, chess.WHITE]
+        values = [self.exchange_values(color) for color in colors]
+        return ExchangeMap(values, [self._exchange_maps[color][1] for color in colors])
+
+    def _is_target(self, color: chess.Color, square: chess.Square) -> bool:
+        """Is *square* valued in the exchange values of *color*."""
+        board = self.board
+        targets = board.occupied_co[not color] & ~board.kings
+        return bool(chess.BB_SQUARES[square] & targets)
+
+    def capture_exchange_evaluation(self, move: chess.Move) -> int:
+        """See :func:`chess_tactics.exchange.get_capture_exchange_evaluation`."""
+        if move not in self._capture_exchange_values:
+            self._capture_exchange_values[move] = get_capture_exchange_evaluation(
+                self.board, move
+            )
+        return self._capture_exchange_values[move]
+
+    def see_ge(
+        self, move_or_square: Union[chess.Move, chess.Square], threshold: int
+    ) -> bool:
+        """See :func:`chess_tactics.exchange.see_ge`; for a square,
+        the exchange is started by the opponent of the piece there.
+
+        Exchange values which are already known (or cached, if
+        :mod:`chess_tactics.cache` is enabled) are used instead."""
+        pin_map = None
+        if isinstance(move_or_square, chess.Move):
+            value = self._capture_exchange_values.get(move_or_square)
+            if value is not None:
+                return value >= threshold
+        else:
+            piece_color = self.board.color_at(move_or_square)
+            if piece_color is None:
+                raise ValueError(f"no piece at {chess.square_name(move_or_square)}")
+            color = not piece_color
+            known = (color, move_or_square) in self._exchange_values or (
+                color in self._exchange_maps
+            )
+            if known or cache.get_cache() is not None:
+                return self.exchange_evaluation(color, move_or_square) >= threshold
+            pin_map = self.pin_map(color)
+
+        key = move_or_square, threshold
+        if key not in self._see_ge:
+            self._see_ge[key] = see_ge(
+                self.board, move_or_square, threshold, pin_map=pin_map
+            )
+        return self._see_ge[key]
+
+    def is_hanging(self, square: chess.Square) -> bool:
+        """See :func:`chess_tactics.tactics.is_hanging`."""
+        if self.board.color_at(square) is None:
+            return False
+        return self.see_ge(square, 1)
+
+    def hanging_pieces(self, color: chess.Color) -> chess.SquareSet:
+        """See :func:`chess_tactics.tactics.get_hanging_pieces`."""
+        if color not in self._hanging:
+            self._hanging[color] = self._get_hanging_mask(color)
+        return chess.SquareSet(self._hanging[color])
+
+    def _get_hanging_mask(self, color: chess.Color) -> chess.Bitboard:
+        hanging_cache = cache.get_cache()
+        if hanging_cache is None:
+            return self._find_hanging_mask(color)
+        key = cache.hanging_key(self.board, color, self.zobrist_hash())
+        hanging = hanging_cache.get(key)
+        if hanging is None:
+            instrumentation.count("hanging_cache_misses")
+            hanging = self._find_hanging_mask(color)
+            hanging_cache.put(key, hanging)
+        else:
+            instrumentation.count("hanging_cache_hits")
+        return hanging
+
+    def _find_hanging_mask(self, color: chess.Color) -> chess.Bitboard:
+        pieces = self.board.occupied_co[color] & ~self.board.kings
+        values = self.exchange_values(not color)
+        hanging = chess.BB_EMPTY
+        for square in chess.scan_forward(pieces):
+            if values[square] > 0:
+                hanging |= chess.BB_SQUARES[square]
+        return hanging
+
+    @contextmanager
+    def after(self, move: chess.Move) -> Iterator["PositionAnalysis"]:
+        """Make *move* on the board, and return an analysis of the position
+        after it; the move is taken back on exit::
+
+            with analysis.after(move) as analysis_after:
+                ...
+
+        The board is not copied, so this analysis can't be used inside
+        the block, and the returned one can't be used outside of it.
+        Analyses of the positions after moves are kept, and returned
+        again for the same moves.
+        """
+        if move not in self._after:
+            self._after[move] = PositionAnalysis(self.board)
+        with pushed(self.board, move):
+            yield self._after[move]
+
+
+def ensure_analysis(
+    board: chess.Board, analysis: Optional[PositionAnalysis] = None
+) -> PositionAnalysis:
+    """Return *analysis*, or a new analysis of the *board* if it's None."""
+    if analysis is None:
+        return PositionAnalysis(board)
+    return analysis
@@ -2,7 +2,11 @@ from typing import Optional
 
 import chess
 
-from .values import get_square_value
+from . import instrumentation
+from .values import PIECE_TYPES_BY_VALUE
+
+# {square: pin ray}, see get_pin_map
+PinMap = dict[chess.Square, chess.Bitboard]
 
 
 def get_attackers(
@@ -11,6 +15,7 @@ def get_attackers(
     square: chess.Square,
     *,
     ignore_check: bool = False,
+    pin_map: Optional[PinMap] = None,
 ) -> chess.SquareSet:
     """Return a SquareSet of attackers.
 
@@ -20,28 +25,59 @@ def get_attackers(
     * illegal king moves are not included;
     * (optional) attackers which can't move due to their king being checked
       are not included;
+
+    *pin_map* is a result of ``get_pin_map(board, color)``; pass it
+    to avoid finding pins again when many squares are checked
+    on the same board.
     """
+    return chess.SquareSet(
+        get_attackers_mask(
+            board, color, square, ignore_check=ignore_check, pin_map=pin_map
+        )
+    )
+
+
+def get_attackers_mask(
+    board: chess.Board,
+    color: chess.Color,
+    square: chess.Square,
+    *,
+    ignore_check: bool = False,
+    pin_map: Optional[PinMap] = None,
+) -> chess.Bitboard:
+    """The same as :func:`get_attackers`, but return a bitboard."""
+    instrumentation.count("get_attackers_calls")
+    candidates = board.attackers_mask(color, square)
+    if not candidates:
+        return chess.BB_EMPTY
+
+    if pin_map is None:
+        pin_map = get_pin_map(board, color)
+
+    square_mask = chess.BB_SQUARES[square]
     attacker_in_check, target_is_the_only_checker = False, False
     if not ignore_check:
         attacker_king = board.king(color)
         if attacker_king is not None:
-            attacker_king_checkers = board.attackers(not color, attacker_king)
-            attacker_in_check = len(attacker_king_checkers) > 0
-            target_is_the_only_checker = attacker_king_checkers == chess.SquareSet(
-                [square]
-            )
-
-    attackers = chess.SquareSet()
-    for attacker in board.attackers(color, square):
-
-        if board.piece_type_at(attacker) == chess.KING:
-            # king can't capture if there are defenders
-            if board.attackers(not color, square):
+            attacker_king_checkers = board.attackers_mask(not color, attacker_king)
+            attacker_in_check = attacker_king_checkers != chess.BB_EMPTY
+            target_is_the_only_checker = attacker_king_checkers == square_mask
+
+    # king can't capture if there are defenders
+    king_can_capture = False
+    if candidates & board.kings:
+        king_can_capture = not board.attackers_mask(not color, square)
+
+    attackers = chess.BB_EMPTY
+    for attacker in chess.scan_forward(candidates):
+
+        if board.kings & chess.BB_SQUARES[attacker]:
+            if not king_can_capture:
                 continue
         else:
             # absolute pinned piece, and the target is not a piece
             # which pinned it
-            if square not in board.pin(color, attacker):
+            if not pin_map.get(attacker, chess.BB_ALL) & square_mask:
                 continue
 
             if not ignore_check:
@@ -50,7 +86,7 @@ def get_attackers(
                 if attacker_in_check and not target_is_the_only_checker:
                     continue
 
-        attackers.add(attacker)
+        attackers |= chess.BB_SQUARES[attacker]
     return attackers
 
 
@@ -60,13 +96,83 @@ def get_least_valuable_attacker(
     square: chess.Square,
     *,
     ignore_check: bool = False,
+    pin_map: Optional[PinMap] = None,
 ) -> Optional[chess.Square]:
     """Return the least valuable attacker of *square*."""
-    attackers = get_attackers(board, color, square, ignore_check=ignore_check)
-    if not attackers:
-        return None
+    attacker = get_least_valuable_attacker_mask(
+        board, color, square, ignore_check=ignore_check, pin_map=pin_map
+    )
+    return chess.lsb(attacker) if attacker else None
+
+
+def get_least_valuable_attacker_mask(
+    board: chess.Board,
+    color: chess.Color,
+    square: chess.Square,
+    *,
+    ignore_check: bool = False,
+    pin_map: Optional[PinMap] = None,
+) -> chess.Bitboard:
+    """The same as :func:`get_least_valuable_attacker`, but return
+    a bitboard, which is empty if there are no attackers."""
+    attackers = get_attackers_mask(
+        board, color, square, ignore_check=ignore_check, pin_map=pin_map
+    )
+    return get_least_valuable_piece_mask(board, attackers)
+
+
+def get_least_valuable_piece_mask(
+    board: chess.BaseBoard, mask: chess.Bitboard
+) -> chess.Bitboard:
+    """Return a bitboard with the least valuable piece from *mask*.
+    If there are several pieces of the same value, the one on the lowest
+    square is returned."""
+    if not mask:
+        return chess.BB_EMPTY
+    pieces = [
+        chess.BB_EMPTY,
+        board.pawns,
+        board.knights,
+        board.bishops,
+        board.rooks,
+        board.queens,
+        board.kings,
+    ]
+    for piece_types in PIECE_TYPES_BY_VALUE:
+        candidates = chess.BB_EMPTY
+        for piece_type in piece_types:
+            candidates |= pieces[piece_type] & mask
+        if candidates:
+            return chess.BB_SQUARES[chess.lsb(candidates)]
+    return chess.BB_EMPTY
+
+
+def get_pin_map(board: chess.BaseBoard, color: chess.Color) -> PinMap:
+    """
+    Return ``{square: pin ray}`` dict for all pieces which are absolutely
+    pinned to the *color* king. Pin rays are the same as
+    ``board.pin_mask(color, square)`` returns; the pieces which are not
+    in the dict are not pinned.
+    """
+    king = board.king(color)
+    if king is None:
+        return {}
+
+    queens_and_rooks = board.queens | board.rooks
+    queens_and_bishops = board.queens | board.bishops
+    snipers = board.occupied_co[not color] & (
+        (chess.BB_RANK_ATTACKS[king][0] & queens_and_rooks)
+        | (chess.BB_FILE_ATTACKS[king][0] & queens_and_rooks)
+        | (chess.BB_DIAG_ATTACKS[king][0] & queens_and_bishops)
+    )
 
-    return min(attackers, key=lambda a: get_square_value(board, a))
+    pin_map = {}
+    for sniper in chess.scan_reversed(snipers):
+        blockers = chess.between(king, sniper) & board.occupied
+        # exactly one piece between the sniper and the king
+        if blockers and not blockers & (blockers - 1):
+            pin_map[chess.lsb(blockers)] = chess.ray(king, sniper)
+    return pin_map
 
 
 def in_check(board: chess.Board, color: chess.Color) -> bool:
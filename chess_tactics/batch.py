@@ -0,0 +1,418 @@
+"""
+Hanging pieces detection for many positions at once, vectorized with NumPy::
+
+    batch = PositionBatch(boards)
+    hanging = batch.hanging_masks()
+    white_hanging = chess.SquareSet(int(hanging[0, batch.WHITE]))
+
+Positions are stored as arrays of uint64 piece bitboards. Exchanges on all
+squares with pieces are played out at once, like
+:func:`chess_tactics.exchange.get_exchange_evaluation` does it for a single
+square: attacks are computed with byte swaps (hyperbola quintessence) and
+lookup tables, and x-ray attackers, pins and checks are taken into account,
+so the result is the same as :func:`chess_tactics.tactics.get_hanging_pieces`.
+
+Arrays are indexed by colors as integers, :data:`WHITE` and :data:`BLACK`.
+NumPy is an optional dependency: ``pip install chess-tactics[numpy]``.
+"""
+
+from collections.abc import Sequence
+
+import chess
+import numpy as np
+
+from .analysis import PositionAnalysis
+from .values import PIECE_VALUES
+
+# colors as array indexes
+BLACK, WHITE = int(chess.BLACK), int(chess.WHITE)
+
+_U64 = np.uint64
+_EMPTY = _U64(chess.BB_EMPTY)
+_ONE = _U64(1)
+
+_SQUARES = np.array(chess.BB_SQUARES, dtype=_U64)
+_SQUARE_INDEXES = np.arange(64, dtype=_U64)
+_KNIGHT_ATTACKS = np.array(chess.BB_KNIGHT_ATTACKS, dtype=_U64)
+_KING_ATTACKS = np.array(chess.BB_KING_ATTACKS, dtype=_U64)
+# squares of white and black pawns which attack a square
+_WHITE_PAWN_ATTACKERS = np.array(chess.BB_PAWN_ATTACKS[chess.BLACK], dtype=_U64)
+_BLACK_PAWN_ATTACKERS = np.array(chess.BB_PAWN_ATTACKS[chess.WHITE], dtype=_U64)
+_BACKRANKS = (_SQUARES & _U64(chess.BB_BACKRANKS)) != 0
+# squares with a higher index
+_ABOVE = np.array(
+    [chess.BB_ALL & ~((chess.BB_SQUARES[sq] << 1) - 1) for sq in chess.SQUARES],
+    dtype=_U64,
+)
+
+
+def _line_mask(square: chess.Square, delta_file: int, delta_rank: int) -> int:
+    mask = chess.BB_EMPTY
+    for sign in (1, -1):
+        file = chess.square_file(square) + sign * delta_file
+        rank = chess.square_rank(square) + sign * delta_rank
+        while 0 <= file < 8 and 0 <= rank < 8:
+            mask |= chess.BB_SQUARES[chess.square(file, rank)]
+            file += sign * delta_file
+            rank += sign * delta_rank
+    return mask
+
+
+# lines through each square, without the square itself
+_FILE_MASKS, _DIAG_MASKS, _ANTI_DIAG_MASKS = (
+    np.array([_line_mask(sq, df, dr) for sq in chess.SQUARES], dtype=_U64)
+    for df, dr in [(0, 1), (1, 1), (1, -1)]
+)
+
+# sliding attacks along the first rank, indexed by file and rank occupancy
+_RANK_ATTACKS = np.array(
+    [
+        [
+            chess.BB_RANK_ATTACKS[file][occupied & chess.BB_RANK_MASKS[file]]
+            for occupied in range(256)
+        ]
+        for file in range(8)
+    ],
+    dtype=np.uint8,
+)
+
+# the least valuable attackers first
+_ATTACKER_GROUPS = [
+    [chess.PAWN],
+    [chess.KNIGHT, chess.BISHOP],
+    [chess.ROOK],
+    [chess.QUEEN],
+]
+_VALUES = np.array([PIECE_VALUES[t] for t in [None, *chess.PIECE_TYPES]])
+_PROMOTION_VALUE = PIECE_VALUES[chess.QUEEN] - PIECE_VALUES[chess.PAWN]
+
+
+class PositionBatch:
+    """
+    Piece bitboards of many positions.
+
+    ``pieces[i, color, piece_type]`` is a bitboard of pieces of
+    the *i*-th position; ``pieces[i, color, 0]`` has all pieces
+    of the color.
+    """
+
+    def __init__(self, boards: Sequence[chess.Board]) -> None:
+        self.boards = list(boards)
+        self.pieces = np.array(
+            [_get_piece_bitboards(board) for board in self.boards], dtype=_U64
+        ).reshape(len(self.boards), 2, 7)
+
+    def __len__(self) -> int:
+        return len(self.boards)
+
+    def hanging_masks(self, *, chunk_size: int = 4096) -> np.ndarray:
+        """
+        Return an array of shape ``(len(batch), 2)`` with bitboards of
+        hanging pieces, indexed by position and color, the same as
+        ``get_hanging_pieces(boards[i], color)``.
+
+        Positions are processed *chunk_size* at a time, to limit
+        the memory used by intermediate arrays.
+        """
+        result = np.zeros((len(self), 2), dtype=_U64)
+        for start in range(0, len(self), chunk_size):
+            stop = start + chunk_size
+            result[start:stop] = _get_hanging_masks(
+                self.pieces[start:stop], self.boards[start:stop]
+            )
+        return result
+
+
+def _get_piece_bitboards(board: chess.BaseBoard) -> list[int]:
+    piece_bitboards = (
+        board.pawns,
+        board.knights,
+        board.bishops,
+        board.rooks,
+        board.queens,
+        board.kings,
+    )
+    black, white = board.occupied_co[chess.BLACK], board.occupied_co[chess.WHITE]
+    return [
+        black,
+        *[bb & black for bb in piece_bitboards],
+        white,
+        *[bb & white for bb in piece_bitboards],
+    ]
+
+
+def get_hanging_masks(boards: Sequence[chess.Board]) -> np.ndarray:
+    """Return hanging pieces bitboards of the *boards*.
+    See :meth:`PositionBatch.hanging_masks`."""
+    return PositionBatch(boards).hanging_masks()
+
+
+def _get_hanging_masks(pieces: np.ndarray, boards: Sequence[chess.Board]) -> np.ndarray:
+    # shape (7, size): white pieces, then pieces of both colors by type
+    position_pieces = np.concatenate(
+        [pieces[None, :, WHITE, 0], (pieces[:, WHITE] | pieces[:, BLACK]).T[1:]]
+    )
+    occupied = pieces[:, WHITE, 0] | pieces[:, BLACK, 0]
+    kings = pieces[:, :, chess.KING]
+
+    in_check = np.zeros((len(pieces), 2), dtype=bool)
+    for color in (BLACK, WHITE):
+        king, has_king = _get_square(kings[:, color])
+        checkers = _get_attackers(king, position_pieces, occupied)
+        in_check[:, color] = has_king & (checkers & pieces[:, 1 - color, 0] != 0)
+    # chess.Board.king() and the exchange code disagree on such positions
+    many_kings = _popcount(kings).max(axis=1) > 1
+
+    targets = _has_square(occupied & ~(kings[:, WHITE] | kings[:, BLACK]))
+    positions, squares = np.nonzero(targets)
+    colors = _has_square(pieces[:, WHITE, 0])[positions, squares].astype(np.intp)
+    values = _get_exchange_values(
+        squares,
+        position_pieces[:, positions],
+        occupied[positions],
+        first_side=1 - colors,
+        ignore_check=in_check[positions, colors],
+    )
+    hanging = values > 0
+
+    analyses: dict[int, PositionAnalysis] = {}
+    for i in np.flatnonzero(many_kings[positions]):
+        position = int(positions[i])
+        if position not in analyses:
+            analyses[position] = PositionAnalysis(boards[position])
+        hanging[i] = analyses[position].is_hanging(int(squares[i]))
+
+    result = np.zeros((len(pieces), 2), dtype=_U64)
+    np.bitwise_or.at(
+        result,
+        (positions[hanging], colors[hanging]),
+        _SQUARES[squares[hanging]],
+    )
+    return result
+
+
+def _get_exchange_values(
+    squares: np.ndarray,
+    pieces: np.ndarray,
+    occupied: np.ndarray,
+    first_side: np.ndarray,
+    ignore_check: np.ndarray,
+) -> np.ndarray:
+    """
+    Play out exchanges on many squares at once and return their values,
+    like :func:`chess_tactics.exchange._iter_swaps` and
+    :func:`chess_tactics.exchange._evaluate_swap_list` do.
+
+    *pieces* has shape ``(7, n)``, like in :func:`_get_hanging_masks`.
+    *first_side* are colors which capture first.
+    """
+    rows = np.arange(len(squares))
+    square_masks = _SQUARES[squares]
+    on_square = _VALUES[_get_piece_types(square_masks, pieces)]
+    side = first_side.astype(bool)
+    captures = []
+    while len(rows):
+        attacker, piece_type = _get_least_valuable_attacker(
+            squares, square_masks, pieces, occupied, side, ignore_check
+        )
+        captured = attacker != 0
+        rows, squares, square_masks = (
+            rows[captured],
+            squares[captured],
+            square_masks[captured],
+        )
+        pieces, occupied, on_square = (
+            pieces[:, captured],
+            occupied[captured],
+            on_square[captured],
+        )
+        side, ignore_check = side[captured], ignore_check[captured]
+        attacker, piece_type = attacker[captured], piece_type[captured]
+
+        promotion = (piece_type == chess.PAWN) & _BACKRANKS[squares]
+        captures.append((rows, on_square + np.where(promotion, _PROMOTION_VALUE, 0)))
+        piece_type = np.where(promotion, chess.QUEEN, piece_type)
+
+        pieces &= ~(attacker | square_masks)
+        occupied = occupied & ~attacker
+        for t in chess.PIECE_TYPES:
+            pieces[t] |= np.where(piece_type == t, square_masks, _EMPTY)
+        pieces[0] |= np.where(side, square_masks, _EMPTY)
+        on_square = _VALUES[piece_type]
+        side = ~side
+
+    # each side may stop capturing if it loses material
+    value = np.zeros(len(first_side), dtype=np.int64)
+    for captured_rows, gain in reversed(captures):
+        value[captured_rows] = np.maximum(gain - value[captured_rows], 0)
+    return value
+
+
+def _get_least_valuable_attacker(
+    squares: np.ndarray,
+    square_masks: np.ndarray,
+    pieces: np.ndarray,
+    occupied: np.ndarray,
+    side: np.ndarray,
+    ignore_check: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return masks and types of the least valuable attackers of *side*,
+    which can legally capture (empty masks if there are none).
+    See ``_SwapBoard.least_valuable_attacker``."""
+    own = np.where(side, pieces[0], occupied & ~pieces[0])
+    opponent = occupied & ~own
+    attackers = _get_attackers(squares, pieces, occupied)
+    own_king = pieces[chess.KING] & own
+    candidates = attackers & own & ~own_king
+
+    # checks and pins only matter if there are attackers other than the king
+    rows = np.flatnonzero(candidates)
+    king, has_king = _get_square(own_king[rows])
+    checkers = _get_attackers(king, pieces[:, rows], occupied[rows]) & opponent[rows]
+    only_king_can_capture = (
+        ~ignore_check[rows]
+        & has_king
+        & (checkers != 0)
+        & (checkers != square_masks[rows])
+    )
+    candidates[rows[only_king_can_capture]] = _EMPTY
+    candidates[rows] &= ~_get_pinned(
+        king, has_king, square_masks[rows], pieces[:, rows], occupied[rows], own[rows]
+    )
+
+    attacker = np.zeros(len(squares), dtype=_U64)
+    for piece_types in _ATTACKER_GROUPS:
+        group = candidates & np.bitwise_or.reduce(pieces[piece_types])
+        attacker = np.where(attacker != 0, attacker, group & (~group + _ONE))
+    # king can't capture if there are defenders
+    king_captures = (attacker == 0) & (attackers & opponent == 0)
+    attacker = np.where(king_captures, attackers & own_king, attacker)
+    return attacker, _get_piece_types(attacker, pieces)
+
+
+def _get_pinned(
+    king: np.ndarray,
+    has_king: np.ndarray,
+    square_masks: np.ndarray,
+    pieces: np.ndarray,
+    occupied: np.ndarray,
+    own: np.ndarray,
+) -> np.ndarray:
+    """Return masks of *own* pieces which are pinned to the king,
+    and can't capture on *square_masks*, because they are not
+    on the pin rays."""
+    king_masks = np.where(has_king, _SQUARES[king], _EMPTY)
+    opponent = occupied & ~own
+    rooks_and_queens = (pieces[chess.ROOK] | pieces[chess.QUEEN]) & opponent
+    bishops_and_queens = (pieces[chess.BISHOP] | pieces[chess.QUEEN]) & opponent
+    above = _ABOVE[king]
+    below = ~above & ~king_masks
+    pinned = np.zeros(len(king), dtype=_U64)
+    for line_attacks, snipers in [
+        (_file_attacks, rooks_and_queens),
+        (_rank_attacks, rooks_and_queens),
+        (_diag_attacks, bishops_and_queens),
+        (_anti_diag_attacks, bishops_and_queens),
+    ]:
+        attacks = line_attacks(king, king_masks, occupied)
+        blockers = attacks & occupied
+        x_rays = line_attacks(king, king_masks, occupied & ~blockers) & ~attacks
+        pinners = x_rays & snipers
+        # a pinned piece can capture along the line
+        line = line_attacks(king, king_masks, np.zeros_like(occupied))
+        can_capture = line & square_masks != 0
+        for half in (above, below):
+            pinned |= np.where(
+                (pinners & half != 0) & ~can_capture, blockers & half & own, _EMPTY
+            )
+    return np.where(has_king, pinned, _EMPTY)
+
+
+def _get_attackers(
+    squares: np.ndarray, pieces: np.ndarray, occupied: np.ndarray
+) -> np.ndarray:
+    """Return masks of pieces of both colors which attack *squares*."""
+    square_masks = _SQUARES[squares]
+    queens = pieces[chess.QUEEN]
+    rook_attacks = _file_attacks(squares, square_masks, occupied) | _rank_attacks(
+        squares, square_masks, occupied
+    )
+    bishop_attacks = _diag_attacks(
+        squares, square_masks, occupied
+    ) | _anti_diag_attacks(squares, square_masks, occupied)
+    pawns = pieces[chess.PAWN]
+    return (
+        (_KING_ATTACKS[squares] & pieces[chess.KING])
+        | (_KNIGHT_ATTACKS[squares] & pieces[chess.KNIGHT])
+        | (rook_attacks & (pieces[chess.ROOK] | queens))
+        | (bishop_attacks & (pieces[chess.BISHOP] | queens))
+        | (_WHITE_PAWN_ATTACKERS[squares] & pawns & pieces[0])
+        | (_BLACK_PAWN_ATTACKERS[squares] & pawns & ~pieces[0])
+    )
+
+
+def _hyperbola_attacks(
+    square_masks: np.ndarray, occupied: np.ndarray, line_masks: np.ndarray
+) -> np.ndarray:
+    """Sliding attacks along lines which cross each rank at most once."""
+    forward = occupied & line_masks
+    reverse = forward.byteswap()
+    forward = forward - square_masks
+    reverse = reverse - square_masks.byteswap()
+    return (forward ^ reverse.byteswap()) & line_masks
+
+
+def _file_attacks(squares, square_masks, occupied):
+    return _hyperbola_attacks(square_masks, occupied, _FILE_MASKS[squares])
+
+
+def _diag_attacks(squares, square_masks, occupied):
+    return _hyperbola_attacks(square_masks, occupied, _DIAG_MASKS[squares])
+
+
+def _anti_diag_attacks(squares, square_masks, occupied):
+    return _hyperbola_attacks(square_masks, occupied, _ANTI_DIAG_MASKS[squares])
+
+
+def _rank_attacks(squares, square_masks, occupied):
+    shift = (squares & ~7).astype(_U64)
+    rank_occupied = (occupied >> shift) & _U64(0xFF)
+    attacks = _RANK_ATTACKS[squares & 7, rank_occupied.astype(np.intp)]
+    return attacks.astype(_U64) << shift
+
+
+def _get_piece_types(masks: np.ndarray, pieces: np.ndarray) -> np.ndarray:
+    """Return types of pieces on single-square *masks* (0 if empty)."""
+    piece_types = np.zeros(len(masks), dtype=np.intp)
+    for piece_type in chess.PIECE_TYPES:
+        piece_types[pieces[piece_type] & masks != 0] = piece_type
+    return piece_types
+
+
+def _get_square(masks: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return squares of single-square *masks* (0 for empty masks),
+    and a boolean array, which is False for empty masks."""
+    not_empty = masks != 0
+    # log2 is exact for powers of two
+    squares = np.log2(np.where(not_empty, masks, _ONE).astype(np.float64))
+    return squares.astype(np.intp), not_empty
+
+
+def _has_square(bitboards: np.ndarray) -> np.ndarray:
+    """Return a boolean array of shape ``(size, 64)`` for bitboards
+    of shape ``(size,)``."""
+    return (bitboards[:, None] >> _SQUARE_INDEXES) & _ONE != 0
+
+
+if hasattr(np, "bitwise_count"):
+
+    def _popcount(bitboards: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(bitboards)
+
+else:  # NumPy < 2.0
+
+    def _popcount(bitboards: np.ndarray) -> np.ndarray:
+        x = bitboards - ((bitboards >> _U64(1)) & _U64(0x5555555555555555))
+        x = (x & _U64(0x3333333333333333)) + ((x >> _U64(2)) & _U64(0x3333333333333333))
+        x = (x + (x >> _U64(4))) & _U64(0x0F0F0F0F0F0F0F0F)
+        return (x * _U64(0x0101010101010101)) >> _U64(56)
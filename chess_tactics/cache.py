@@ -0,0 +1,136 @@
+"""
+Opt-in cache for exchange evaluation and hanging pieces results.
+
+Results are keyed by Zobrist hash of the position, so they are reused
+for the same position in different games::
+
+    from chess_tactics import cache
+
+    cache.enable(maxsize=1_000_000)
+    ...  # analyse games
+    print(cache.get_stats())
+
+The cache is a module-level LRU cache, bounded by *maxsize* entries.
+It's disabled by default.
+"""
+
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Generic, NamedTuple, Optional, TypeVar
+
+import chess
+import chess.polyglot
+
+V = TypeVar("V")
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+class LRUCache(Generic[V]):
+    """A dict-like cache which keeps at most *maxsize* most recently
+    used items."""
+
+    def __init__(self, maxsize: int) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[Hashable, V] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: V) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            size=len(self._data),
+            maxsize=self.maxsize,
+        )
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_cache: Optional[LRUCache[int]] = None
+
+
+def enable(maxsize: int = 1_000_000) -> None:
+    """Enable the cache. If it's already enabled, it's replaced with
+    an empty one."""
+    global _cache
+    _cache = LRUCache(maxsize)
+
+
+def disable() -> None:
+    """Disable the cache and drop all cached results."""
+    global _cache
+    _cache = None
+
+
+def clear() -> None:
+    """Drop all cached results and reset statistics."""
+    if _cache is not None:
+        _cache.clear()
+
+
+def get_stats() -> Optional[CacheStats]:
+    """Return cache statistics, or None if the cache is disabled."""
+    if _cache is None:
+        return None
+    return _cache.stats()
+
+
+def get_cache() -> Optional[LRUCache[int]]:
+    """Return the cache if it's enabled."""
+    return _cache
+
+
+def exchange_key(
+    board: chess.Board,
+    color: chess.Color,
+    square: chess.Square,
+    zobrist_hash: Optional[int] = None,
+) -> Hashable:
+    """Return a cache key for an exchange on *square*, started by *color*."""
+    if zobrist_hash is None:
+        zobrist_hash = chess.polyglot.zobrist_hash(board)
+    # Zobrist hash only includes en passant square if the capture
+    # is possible for the side to move; exchange evaluation
+    # doesn't care whose move it is.
+    return zobrist_hash, color, square, square == board.ep_square
+
+
+def hanging_key(
+    board: chess.Board, color: chess.Color, zobrist_hash: Optional[int] = None
+) -> Hashable:
+    """Return a cache key for hanging pieces of *color*."""
+    if zobrist_hash is None:
+        zobrist_hash = chess.polyglot.zobrist_hash(board)
+    return zobrist_hash, color
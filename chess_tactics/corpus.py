@@ -0,0 +1,186 @@
+"""
+Mistake detection for large collections of Lichess games.
+
+Games are split into chunks, which are analysed in a process pool.
+Results are returned in the order of the input games::
+
+    for result in analyze_games(games, processes=8):
+        ...
+
+It can also be used from the command line, with a Lichess NDJSON export
+as an input (only standard games with computer analysis are used)::
+
+    python -m chess_tactics.corpus games.ndjson > mistakes.ndjson
+
+With ``--profile stats.prof`` games are analysed in a single process
+under cProfile, and a per-detector report (see
+:mod:`chess_tactics.instrumentation`) is printed to stderr.
+"""
+
+import argparse
+import cProfile
+import itertools
+import json
+import os
+import pstats
+import sys
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+import chess
+
+from . import cache, instrumentation
+from .lichess_export import read_games
+from .lichess_game import iter_game_plies
+
+
+class PlyMistakes(NamedTuple):
+    ply: int
+    move: chess.Move
+    mistakes: list[str]
+
+
+class GameMistakes(NamedTuple):
+    game_id: Optional[str]
+    plies: list[PlyMistakes]
+
+
+def analyze_game(game) -> GameMistakes:
+    """Return mistakes found in a Lichess JSON game."""
+    plies = [
+        PlyMistakes(p.ply, p.move, p.mistakes)
+        for p in iter_game_plies(game)
+        if p.mistakes
+    ]
+    return GameMistakes(game.get("id"), plies)
+
+
+def analyze_games(
+    games: Iterable[dict],
+    *,
+    processes: Optional[int] = None,
+    chunksize: int = 16,
+    max_pending_chunks: Optional[int] = None,
+    cache_size: Optional[int] = None,
+) -> Iterator[GameMistakes]:
+    """
+    Analyse *games* in a pool of *processes* (``os.cpu_count()`` by
+    default) and yield :class:`GameMistakes` for each game, in order.
+
+    Games are sent to the workers in chunks of *chunksize* games.
+    At most *max_pending_chunks* chunks (2 per process by default) are
+    submitted at a time, so *games* can be a lazy iterator over a large
+    file. If *cache_size* is set, :mod:`chess_tactics.cache` of this size
+    is enabled in each worker.
+
+    With ``processes=1`` games are analysed in the current process; if
+    :mod:`chess_tactics.cache` is already enabled there, it's used
+    instead of a new one.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes == 1:
+        # a cache enabled by the caller is used as is, and kept enabled
+        own_cache = cache_size is not None and cache.get_cache() is None
+        if own_cache:
+            _init_worker(cache_size)
+        try:
+            yield from map(analyze_game, games)
+        finally:
+            if own_cache:
+                cache.disable()
+        return
+
+    if max_pending_chunks is None:
+        max_pending_chunks = processes * 2
+
+    executor = ProcessPoolExecutor(
+        processes, initializer=_init_worker, initargs=(cache_size,)
+    )
+    pending: deque[Future[list[GameMistakes]]] = deque()
+    try:
+        for chunk in _chunked(games, chunksize):
+            if len(pending) >= max_pending_chunks:
+                yield from pending.popleft().result()
+            pending.append(executor.submit(_analyze_chunk, chunk))
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def _init_worker(cache_size: Optional[int]) -> None:
+    if cache_size is not None:
+        cache.enable(cache_size)
+
+
+def _analyze_chunk(games: list[dict]) -> list[GameMistakes]:
+    return [analyze_game(game) for game in games]
+
+
+def _chunked(games: Iterable[dict], chunksize: int) -> Iterator[list[dict]]:
+    games = iter(games)
+    while chunk := list(itertools.islice(games, chunksize)):
+        yield chunk
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Find mistakes in Lichess games (NDJSON export with analysis)."
+    )
+    parser.add_argument("path", help="path to a .ndjson file (.gz and .zst are fine)")
+    parser.add_argument("--variant", action="append", help="default: standard")
+    parser.add_argument("--speed", action="append", help="default: all")
+    parser.add_argument("-j", "--processes", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=16)
+    parser.add_argument("--cache-size", type=int, default=None)
+    parser.add_argument("--profile", metavar="FILE", help="save cProfile stats to FILE")
+    args = parser.parse_args(argv)
+
+    profiler = None
+    if args.profile:
+        args.processes = 1
+        instrumentation.enable()
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    results = analyze_games(
+        read_games(
+            args.path,
+            variants=args.variant or ["standard"],
+            speeds=args.speed,
+            with_analysis=True,
+        ),
+        processes=args.processes,
+        chunksize=args.chunksize,
+        cache_size=args.cache_size,
+    )
+    try:
+        for result in results:
+            for ply in result.plies:
+                row = {
+                    "id": result.game_id,
+                    "ply": ply.ply,
+                    "move": ply.move.uci(),
+                    "mistakes": ply.mistakes,
+                }
+                sys.stdout.write(json.dumps(row) + "\n")
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            _print_profile(profiler)
+
+
+def _print_profile(profiler: cProfile.Profile) -> None:
+    report = instrumentation.get_report()
+    instrumentation.disable()
+    print(instrumentation.format_report(report), file=sys.stderr)
+    stats = pstats.Stats(profiler, stream=sys.stderr)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+A pool of UCI engines to produce the inputs for the mistakes detectors
+(best moves, best opponent moves, principal variations and scores)::
+
+    async with EnginePool("stockfish", size=4) as pool:
+        async for mistakes in classify_games(pool, games):
+            ...
+
+Positions are analysed by all engines in parallel, with
+:data:`chess_tactics.lichess_game.EVAL_LIMIT` by default. If a game
+already has Lichess computer analysis, it's used instead, and only the
+positions it doesn't cover are analysed. Mistakes
+detection is CPU-bound, so it runs in an executor, while the engines
+analyse positions of the next games.
+"""
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Iterable
+from concurrent.futures import Executor
+from typing import Optional, Union
+
+import chess
+import chess.engine
+
+from .eval_cache import EvalCache, PositionEval
+from .lichess_game import EVAL_LIMIT, get_lichess_evals
+from .mates import get_mate_eval
+from .mistakes import classify_move
+from .move_utils import parse_san
+
+
+class EnginePool:
+    """
+    Run *size* engine processes started with *command*.
+
+    Analysis requests are queued; at most *max_queued* requests wait for
+    a free engine (2 per engine by default), after that :meth:`analyse`
+    waits for a free slot in the queue.
+
+    If *eval_cache* is passed, :meth:`evaluate` checks it before asking
+    the engines, and stores new evaluations there.
+
+    Positions where the side to move mates in *max_mate_n* moves or less
+    are solved by :func:`chess_tactics.mates.find_mate` instead (only
+    with ``multipv=1``, as the solver finds one best move); pass 0
+    to always ask the engines. The solver runs in the default executor
+    of the event loop.
+    """
+
+    def __init__(
+        self,
+        command: Union[str, list[str]],
+        *,
+        size: int = 1,
+        limit: chess.engine.Limit = EVAL_LIMIT,
+        multipv: int = 1,
+        max_queued: Optional[int] = None,
+        eval_cache: Optional[EvalCache] = None,
+        max_mate_n: int = 2,
+    ) -> None:
+        self.command = command
+        self.size = size
+        self.limit = limit
+        self.multipv = multipv
+        self.max_queued = max_queued if max_queued is not None else size * 2
+        self.eval_cache = eval_cache
+        self.max_mate_n = max_mate_n
+        self._engines: list[chess.engine.Protocol] = []
+        self._workers: list[asyncio.Task] = []
+        self._requests: Optional[asyncio.Queue] = None
+
+    async def start(self) -> None:
+        self._requests = asyncio.Queue(maxsize=self.max_queued)
+        for _ in range(self.size):
+            _, engine = await chess.engine.popen_uci(self.command)
+            self._engines.append(engine)
+            self._workers.append(asyncio.create_task(self._work(engine)))
+
+    async def close(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        for engine in self._engines:
+            try:
+                await engine.quit()
+            except chess.engine.EngineError:
+                pass
+        self._workers = []
+        self._engines = []
+        if self.eval_cache is not None:
+            self.eval_cache.flush()
+
+    async def __aenter__(self) -> "EnginePool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def analyse(
+        self,
+        board: chess.Board,
+        *,
+        limit: Optional[chess.engine.Limit] = None,
+        multipv: Optional[int] = None,
+    ) -> list[chess.engine.InfoDict]:
+        """Analyse the position and return a list of info dicts,
+        one per principal variation."""
+        if self._requests is None:
+            raise RuntimeError("EnginePool is not started")
+        future = asyncio.get_running_loop().create_future()
+        request = (
+            board.copy(stack=False),
+            limit or self.limit,
+            multipv or self.multipv,
+            future,
+        )
+        await self._requests.put(request)
+        return await future
+
+    async def evaluate(self, board: chess.Board) -> PositionEval:
+        """Analyse the position and return the score, best moves
+        (first moves of all principal variations) and the main line."""
+        if self.eval_cache is not None:
+            cached = self.eval_cache.get(board, self.limit, self.multipv)
+            if cached is not None:
+                return cached
+        if self.multipv == 1 and self.max_mate_n > 0:
+            # the solver is CPU-bound; don't block the engine workers
+            mate_eval = await asyncio.get_running_loop().run_in_executor(
+                None, get_mate_eval, board.copy(stack=False), self.max_mate_n
+            )
+            if mate_eval is not None:
+                return mate_eval
+        infos = await self.analyse(board)
+        best_moves = [info["pv"][0] for info in infos if info.get("pv")]
+        position_eval = PositionEval(
+            infos[0].get("score"), best_moves, infos[0].get("pv", [])
+        )
+        if self.eval_cache is not None:
+            self.eval_cache.put(board, self.limit, self.multipv, position_eval)
+        return position_eval
+
+    async def _work(self, engine: chess.engine.Protocol) -> None:
+        assert self._requests is not None
+        while True:
+            board, limit, multipv, future = await self._requests.get()
+            try:
+                if future.cancelled():
+                    continue
+                try:
+                    infos = await engine.analyse(board, limit, multipv=multipv)
+                except Exception as e:
+                    if not future.cancelled():
+                        future.set_exception(e)
+                else:
+                    if not future.cancelled():
+                        future.set_result(infos)
+            finally:
+                self._requests.task_done()
+
+
+async def evaluate_game(
+    pool: EnginePool, game, *, use_lichess_analysis: bool = True
+) -> list[PositionEval]:
+    """Evaluate all positions of a Lichess JSON game, including the
+    starting and the final positions.
+
+    If *use_lichess_analysis* is True, evaluations from the game's
+    computer analysis are used (see
+    :func:`chess_tactics.lichess_game.get_lichess_evals`), and only
+    positions without them are sent to the engines.
+    """
+    san_list = game["moves"].split()
+    if use_lichess_analysis:
+        evals = get_lichess_evals(game)
+    else:
+        evals = [None] * (len(san_list) + 1)
+
+    board = chess.Board()
+    missing: list[tuple[int, chess.Board]] = []
+    for index in range(len(san_list) + 1):
+        if evals[index] is None:
+            missing.append((index, board.copy(stack=False)))
+        if index < len(san_list):
+            board.push(parse_san(board, san_list[index]))
+            board.clear_stack()
+
+    results = await asyncio.gather(*(pool.evaluate(b) for _, b in missing))
+    for (index, _), position_eval in zip(missing, results):
+        evals[index] = position_eval
+    return evals  # type: ignore[return-value]
+
+
+def classify_plies(game, evals: list[PositionEval]) -> list[list[str]]:
+    """Return mistakes made on each ply of the game, using position
+    evaluations returned by :func:`evaluate_game`."""
+    board = chess.Board()
+    mistakes = []
+    for ply, san in enumerate(game["moves"].split()):
+        move = parse_san(board, san)
+        before, after = evals[ply], evals[ply + 1]
+        scores = None
+        if before.score is not None and after.score is not None:
+            scores = after.score.pov(board.turn), before.score.pov(board.turn)
+        mistakes.append(
+            classify_move(
+                board, move, before.best_moves, after.best_moves, before.pv, scores
+            )
+        )
+        board.push(move)
+        board.clear_stack()
+    return mistakes
+
+
+async def classify_games(
+    pool: EnginePool,
+    games: Iterable[dict],
+    *,
+    executor: Optional[Executor] = None,
+    max_pending: Optional[int] = None,
+) -> AsyncIterator[list[list[str]]]:
+    """
+    Yield the result of :func:`classify_plies` for each game, in order.
+
+    Up to *max_pending* games (``2 * pool.size`` by default) are processed
+    at a time. Mistakes are detected in the *executor* (the default
+    executor of the event loop if None); pass a ProcessPoolExecutor
+    to use several CPUs.
+    """
+    loop = asyncio.get_running_loop()
+    if max_pending is None:
+        max_pending = pool.size * 2
+
+    async def _classify(game) -> list[list[str]]:
+        evals = await evaluate_game(pool, game)
+        return await loop.run_in_executor(executor, classify_plies, game, evals)
+
+    pending: deque[asyncio.Task] = deque()
+    try:
+        for game in games:
+            if len(pending) >= max_pending:
+                yield await pending.popleft()
+            pending.append(asyncio.create_task(_classify(game)))
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,183 @@
+"""
+On-disk cache of engine evaluations, stored in sqlite.
+
+Evaluations are keyed by Zobrist hash of the position, side to move,
+engine limit and the number of principal variations::
+
+    cache = EvalCache("evals.sqlite")
+    async with EnginePool("stockfish", eval_cache=cache) as pool:
+        ...
+    cache.close()
+
+The database uses write-ahead logging, so several processes can read
+it concurrently; each process should open its own :class:`EvalCache`.
+Writes are buffered and committed in batches.
+"""
+
+import sqlite3
+import struct
+from collections.abc import Sequence
+from typing import NamedTuple, Optional
+
+import chess
+import chess.engine
+import chess.polyglot
+
+
+class PositionEval(NamedTuple):
+    score: Optional[chess.engine.PovScore]
+    best_moves: list[chess.Move]
+    pv: Sequence[chess.Move]
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS evals (
+    zobrist INTEGER NOT NULL,
+    turn INTEGER NOT NULL,
+    engine_limit TEXT NOT NULL,
+    multipv INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (zobrist, turn, engine_limit, multipv)
+) WITHOUT ROWID
+"""
+
+# score kind (see _SCORE_*) and value, from the side to move point of view
+_SCORE = struct.Struct("<bi")
+_SCORE_NONE, _SCORE_CP, _SCORE_MATE, _SCORE_MATE_GIVEN = 0, 1, 2, 3
+
+
+class EvalCache:
+    """sqlite-backed cache of :class:`PositionEval` values.
+
+    Up to *batch_size* new evaluations are kept in memory and written
+    in a single transaction.
+    """
+
+    def __init__(self, path: str, *, batch_size: int = 1000, timeout: float = 30):
+        self.batch_size = batch_size
+        self._connection = sqlite3.connect(path, timeout=timeout)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            self._connection.execute(_SCHEMA)
+        self._pending: dict[tuple, bytes] = {}
+
+    def get(
+        self, board: chess.Board, limit: chess.engine.Limit, multipv: int = 1
+    ) -> Optional[PositionEval]:
+        """Return the cached evaluation of the position, or None."""
+        key = _get_key(board, limit, multipv)
+        data = self._pending.get(key)
+        if data is None:
+            row = self._connection.execute(
+                "SELECT data FROM evals WHERE zobrist=? AND turn=? "
+                "AND engine_limit=? AND multipv=?",
+                key,
+            ).fetchone()
+            if row is None:
+                return None
+            data = row[0]
+        return decode_eval(data, board.turn)
+
+    def put(
+        self,
+        board: chess.Board,
+        limit: chess.engine.Limit,
+        multipv: int,
+        position_eval: PositionEval,
+    ) -> None:
+        """Add an evaluation to the cache. It's written to the database
+        when the batch is full, or on :meth:`flush`."""
+        self._pending[_get_key(board, limit, multipv)] = encode_eval(
+            position_eval, board.turn
+        )
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write pending evaluations to the database."""
+        if not self._pending:
+            return
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO evals VALUES (?, ?, ?, ?, ?)",
+                [key + (data,) for key, data in self._pending.items()],
+            )
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self._connection.close()
+
+    def __enter__(self) -> "EvalCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        self.flush()
+        return self._connection.execute("SELECT COUNT(*) FROM evals").fetchone()[0]
+
+
+def encode_eval(position_eval: PositionEval, turn: chess.Color) -> bytes:
+    """Pack an evaluation: the score, then the best moves and the principal
+    variation, as move counts followed by 2-byte moves."""
+    score = position_eval.score
+    if score is None:
+        header = _SCORE.pack(_SCORE_NONE, 0)
+    else:
+        relative = score.pov(turn)
+        mate = relative.mate()
+        if relative == chess.engine.MateGiven:
+            header = _SCORE.pack(_SCORE_MATE_GIVEN, 0)
+        elif mate is not None:
+            header = _SCORE.pack(_SCORE_MATE, mate)
+        else:
+            header = _SCORE.pack(_SCORE_CP, relative.score())
+    return (
+        header
+        + _encode_moves(position_eval.best_moves)
+        + _encode_moves(position_eval.pv)
+    )
+
+
+def decode_eval(data: bytes, turn: chess.Color) -> PositionEval:
+    """Unpack an evaluation packed by :func:`encode_eval`."""
+    kind, value = _SCORE.unpack_from(data)
+    score: Optional[chess.engine.PovScore] = None
+    if kind == _SCORE_CP:
+        score = chess.engine.PovScore(chess.engine.Cp(value), turn)
+    elif kind == _SCORE_MATE:
+        score = chess.engine.PovScore(chess.engine.Mate(value), turn)
+    elif kind == _SCORE_MATE_GIVEN:
+        score = chess.engine.PovScore(chess.engine.MateGiven, turn)
+    best_moves, offset = _decode_moves(data, _SCORE.size)
+    pv, _ = _decode_moves(data, offset)
+    return PositionEval(score, best_moves, pv)
+
+
+def _get_key(board: chess.Board, limit: chess.engine.Limit, multipv: int) -> tuple:
+    zobrist = chess.polyglot.zobrist_hash(board)
+    # sqlite integers are signed
+    if zobrist >= 1 << 63:
+        zobrist -= 1 << 64
+    return zobrist, int(board.turn), repr(limit), multipv
+
+
+def _encode_moves(moves: Sequence[chess.Move]) -> bytes:
+    codes = [
+        move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+        for move in moves
+    ]
+    return struct.pack(f"<H{len(codes)}H", len(codes), *codes)
+
+
+def _decode_moves(data: bytes, offset: int) -> tuple[list[chess.Move], int]:
+    (count,) = struct.unpack_from("<H", data, offset)
+    offset += 2
+    codes = struct.unpack_from(f"<{count}H", data, offset)
+    moves = [
+        chess.Move(code & 63, code >> 6 & 63, (code >> 12) or None) for code in codes
+    ]
+    return moves, offset + 2 * count
@@ -1,11 +1,17 @@
 """ Static Exchange Evaluation functions """
 
-from typing import Optional
+from collections.abc import Iterator
+from typing import NamedTuple, Optional, Union
 
 import chess
 
-from .attacks import get_least_valuable_attacker, in_check
-from .values import get_square_value
+from . import cache, instrumentation
+from .attacks import PinMap, get_pin_map, in_check
+from .move_utils import pushed
+from .see_table import get_unsafe_squares, lookup_exchange_value
+from .values import PIECE_TYPES_BY_VALUE, PIECE_VALUES, get_square_value
+
+_PROMOTION_VALUE = PIECE_VALUES[chess.QUEEN] - PIECE_VALUES[chess.PAWN]
 
 
 def get_exchange_evaluation(
@@ -14,6 +20,8 @@ def get_exchange_evaluation(
     square: chess.Square,
     *,
     square_value_before_promotion: Optional[float] = None,
+    pin_map: Optional[PinMap] = None,
+    zobrist_hash: Optional[int] = None,
 ) -> int:
     """
     Simulate an exchange at ``square``, started by ``color``, and return
@@ -23,7 +31,125 @@ def get_exchange_evaluation(
     unfavorable captures shouldn't happen.
 
     Ulike :func:`get_capture_exchange_evaluation`, the first move is not forced.
+
+    If only material matters for the exchange, its value is looked up
+    by :func:`chess_tactics.see_table.lookup_exchange_value`.
+
+    *pin_map* is a result of ``attacks.get_pin_map(board, color)``; pass it
+    when evaluating many squares on the same board.
+
+    If :mod:`chess_tactics.cache` is enabled, the result is cached.
+    *zobrist_hash* is ``chess.polyglot.zobrist_hash(board)``; pass it
+    to avoid computing the hash on each call.
+    """
+    exchange_cache = cache.get_cache()
+    if exchange_cache is None or square_value_before_promotion is not None:
+        return _get_exchange_evaluation(
+            board, color, square, square_value_before_promotion, pin_map
+        )
+
+    key = cache.exchange_key(board, color, square, zobrist_hash)
+    value = exchange_cache.get(key)
+    if value is None:
+        instrumentation.count("exchange_cache_misses")
+        value = _get_exchange_evaluation(board, color, square, None, pin_map)
+        exchange_cache.put(key, value)
+    else:
+        instrumentation.count("exchange_cache_hits")
+    return value
+
+
+def _get_exchange_evaluation(
+    board: chess.Board,
+    color: chess.Color,
+    square: chess.Square,
+    square_value_before_promotion: Optional[float],
+    pin_map: Optional[PinMap],
+) -> int:
+    if square_value_before_promotion is None:
+        value = lookup_exchange_value(board, color, square)
+        if value is not None:
+            return value
+    swap_list = list(_iter_square_swaps(board, color, square, pin_map))
+    return _evaluate_swap_list(swap_list, square_value_before_promotion)
+
+
+class ExchangeMap(NamedTuple):
+    """Exchange values of all squares for both colors, see :func:`exchange_map`."""
+
+    #: ``values[color][square]`` is the value of the exchange
+    #: on *square*, started by *color*
+    values: list[list[int]]
+    #: ``attacked[color]`` are squares attacked by *color* pieces,
+    #: not counting the moves pins don't allow
+    attacked: list[chess.Bitboard]
+
+
+def exchange_map(board: chess.Board) -> ExchangeMap:
+    """
+    Return exchange values of all squares, for both colors.
+
+    The values are the same as :func:`get_exchange_evaluation` returns
+    for the opponent pieces (but kings) and, for the side to move,
+    the en passant square; they are 0 for other squares. Attacked squares
+    and pins of each color are found once for the whole board.
+    """
+    values, attacked = [], []
+    for color in [chess.BLACK, chess.WHITE]:
+        color_values, color_attacked = get_exchange_values(board, color)
+        values.append(color_values)
+        attacked.append(color_attacked)
+    return ExchangeMap(values, attacked)
+
+
+def get_exchange_values(
+    board: chess.Board, color: chess.Color, *, pin_map: Optional[PinMap] = None
+) -> tuple[list[int], chess.Bitboard]:
+    """
+    Return values of exchanges started by *color* on all squares
+    (see :func:`exchange_map`), and squares attacked by *color*.
+
+    *pin_map* is ``attacks.get_pin_map(board, color)``.
     """
+    if pin_map is None:
+        pin_map = get_pin_map(board, color)
+
+    attacked = chess.BB_EMPTY
+    for square in chess.scan_forward(board.occupied_co[color]):
+        attacked |= board.attacks_mask(square) & pin_map.get(square, chess.BB_ALL)
+
+    targets = board.occupied_co[not color] & ~board.kings
+    if board.ep_square is not None and board.turn == color:
+        targets |= chess.BB_SQUARES[board.ep_square]
+
+    # the first capture needs an attacker, so other squares are skipped
+    values = [0] * 64
+    ignore_check = in_check(board, not color)
+    unsafe = get_unsafe_squares(board)
+    for square in chess.scan_forward(targets & attacked):
+        if unsafe is not None:
+            value = lookup_exchange_value(board, color, square, unsafe=unsafe)
+            if value is not None:
+                values[square] = value
+                continue
+        swaps = _iter_swaps(
+            _SwapBoard(board, pin_map),
+            color,
+            square,
+            board.piece_type_at(square),
+            ignore_check=ignore_check,
+            en_passant_capture=_get_en_passant_capture_square(board, square),
+        )
+        values[square] = _evaluate_swap_list(list(swaps))
+    return values, attacked
+
+
+def _iter_square_swaps(
+    board: chess.Board,
+    color: chess.Color,
+    square: chess.Square,
+    pin_map: Optional[PinMap],
+) -> Iterator[tuple[int, int]]:
     # If opponent's king is in check, it's an impossible exchange:
     # it must be opponent's move, not ours. The function is still useful in
     # this context, but it makes "king in check" heuristics incorrect
@@ -31,35 +157,13 @@ def get_exchange_evaluation(
     # so the logic to handle it is disabled.
     ignore_check = in_check(board, not color)
 
-    def _get_exchange_evaluation(
-        board, color, square, square_value_before_promotion=None
-    ) -> int:
-        value = 0
-        attacker = get_least_valuable_attacker(
-            board, color, square, ignore_check=ignore_check
-        )
-        if attacker is not None:
-            board_copy = board.copy()
-            # TODO: handle promotions properly
-            move = chess.Move(from_square=attacker, to_square=square)
-            captured_value = get_move_captured_value(board, move)
-            board_copy.push(move)
-            recapture_value = _get_exchange_evaluation(board_copy, not color, square)
-            if captured_value < recapture_value:
-                value = 0
-            else:
-                if square_value_before_promotion is not None:
-                    value = square_value_before_promotion - recapture_value
-                else:
-                    value = captured_value - recapture_value
-
-        return value
-
-    return _get_exchange_evaluation(
-        board,
+    return _iter_swaps(
+        _SwapBoard(board, pin_map),
         color,
         square,
-        square_value_before_promotion=square_value_before_promotion,
+        board.piece_type_at(square),
+        ignore_check=ignore_check,
+        en_passant_capture=_get_en_passant_capture_square(board, square),
     )
 
 
@@ -71,20 +175,123 @@ def get_capture_exchange_evaluation(board: chess.Board, move: chess.Move) -> int
     Unlike :func:`get_exchange_evaluation`, the first move is forced,
     so the value can be negative.
     """
+    captured_value, attacker_value, swaps = _get_capture_swaps(board, move)
+    exchange_value = _evaluate_swap_list(list(swaps), attacker_value)
+    return captured_value - exchange_value
+
+
+def _get_capture_swaps(
+    board: chess.Board, move: chess.Move
+) -> tuple[int, int, Iterator[tuple[int, int]]]:
+    """Return the value captured by *move*, the value of the moved piece,
+    and the captures which follow the move (see :func:`_iter_swaps`)."""
     color = board.color_at(move.from_square)
+    piece_type = move.promotion or board.piece_type_at(move.from_square)
+    assert color is not None and piece_type is not None
     captured_value = get_move_captured_value(board, move)
     attacker_value = get_square_value(board, move.from_square)
 
-    board_copy = board.copy()
-    board_copy.push(move)
+    if board.is_castling(move):
+        with pushed(board, move):
+            swap_board = _SwapBoard(board)
+    else:
+        swap_board = _SwapBoard(board)
+        en_passant_capture = _get_en_passant_capture_square(board, move.to_square)
+        if en_passant_capture is not None and board.is_en_passant(move):
+            swap_board.remove_piece_at(en_passant_capture)
+        swap_board.move_piece(move.from_square, move.to_square, piece_type)
+
+    # The exchange after the move is started by the opponent, so
+    # it's our king being in check which disables the check logic
+    # (see get_exchange_evaluation).
+    king = swap_board.king(color)
+    ignore_check = king is not None and bool(swap_board.attackers_mask(not color, king))
 
-    exchange_value = get_exchange_evaluation(
-        board_copy,
+    swaps = _iter_swaps(
+        swap_board,
         not color,
         move.to_square,
-        square_value_before_promotion=attacker_value,
+        swap_board.piece_type_at(move.to_square),
+        ignore_check=ignore_check,
     )
-    return captured_value - exchange_value
+    return captured_value, attacker_value, swaps
+
+
+def see_ge(
+    board: chess.Board,
+    move_or_square: Union[chess.Move, chess.Square],
+    threshold: int,
+    *,
+    color: Optional[chess.Color] = None,
+    pin_map: Optional[PinMap] = None,
+) -> bool:
+    """
+    Return True if the exchange value is at least *threshold*:
+
+    * for a move, ``get_capture_exchange_evaluation(board, move) >= threshold``;
+    * for a square, ``get_exchange_evaluation(board, color, square) >= threshold``,
+      where *color* is the opponent of the piece at *square* by default.
+      *pin_map* is ``attacks.get_pin_map(board, color)``, as in
+      :func:`get_exchange_evaluation`.
+
+    Captures are played out only until the result is known, e.g.
+    a piece defended by a pawn is not hanging whatever attacks it.
+    """
+    if isinstance(move_or_square, chess.Move):
+        return _capture_see_ge(board, move_or_square, threshold)
+
+    square = move_or_square
+    if color is None:
+        piece_color = board.color_at(square)
+        if piece_color is None:
+            raise ValueError(f"no piece at {chess.square_name(square)}")
+        color = not piece_color
+    return _swaps_ge(_iter_square_swaps(board, color, square, pin_map), threshold)
+
+
+def _capture_see_ge(board: chess.Board, move: chess.Move, threshold: int) -> bool:
+    captured_value, attacker_value, swaps = _get_capture_swaps(board, move)
+    # the exchange value after the move should be at most this
+    bound = captured_value - threshold
+    if bound < 0:
+        # The exchange value can be negative, when the moved piece
+        # is promoted, so it's not a threshold check; it's rare.
+        exchange_value = _evaluate_swap_list(list(swaps), attacker_value)
+        return exchange_value <= bound
+
+    # See _evaluate_swap_list: the exchange value is 0 if there are no
+    # captures, or if the first capture loses material (the next value
+    # is more than its gain), and the attacker value plus promotion minus
+    # the next value otherwise.
+    first = next(swaps, None)
+    if first is None:
+        return True
+    captured, promotion = first
+    next_value = min(captured + promotion + 1, attacker_value + promotion - bound)
+    return _swaps_ge(swaps, next_value)
+
+
+def _swaps_ge(swaps: Iterator[tuple[int, int]], threshold: int) -> bool:
+    """Return True if ``_evaluate_swap_list(list(swaps)) >= threshold``,
+    playing out only the captures which are needed to know it."""
+    # The value for the side to capture is max(0, gain - next value),
+    # so "value >= x" means "next value <= gain - x" (if x > 0), and
+    # "value <= x" means "next value >= gain - x" (if x >= 0).
+    instrumentation.count("see_ge_calls")
+    at_least = True
+    while True:
+        if at_least and threshold <= 0:
+            return True
+        if not at_least and threshold < 0:
+            return False
+        capture = next(swaps, None)
+        if capture is None:
+            # the value is 0
+            return not at_least
+        instrumentation.count("see_ge_depth")
+        captured_value, promotion_value = capture
+        threshold = captured_value + promotion_value - threshold
+        at_least = not at_least
 
 
 def get_move_captured_value(board: chess.Board, move: chess.Move) -> int:
@@ -93,3 +300,253 @@ def get_move_captured_value(board: chess.Board, move: chess.Move) -> int:
         return 1
     else:
         return get_square_value(board, move.to_square)
+
+
+class _SwapBoard:
+    """
+    Piece bitboards of a position, which are updated in place while
+    captures on a single square are simulated.
+
+    Only integers are changed, so x-ray attackers, pins and checks
+    are found without copying a chess.Board.
+    """
+
+    __slots__ = ("pieces", "occupied_co", "occupied", "pin_map")
+
+    def __init__(
+        self, board: chess.BaseBoard, pin_map: Optional[PinMap] = None
+    ) -> None:
+        # indexed by piece type; the first item is a placeholder
+        self.pieces = [
+            chess.BB_EMPTY,
+            board.pawns,
+            board.knights,
+            board.bishops,
+            board.rooks,
+            board.queens,
+            board.kings,
+        ]
+        # indexed by color
+        self.occupied_co = [
+            board.occupied_co[chess.BLACK],
+            board.occupied_co[chess.WHITE],
+        ]
+        self.occupied = board.occupied
+        # pins of the side which captures first; they are only valid
+        # until the position changes
+        self.pin_map = pin_map
+
+    def piece_type_at(self, square: chess.Square) -> Optional[chess.PieceType]:
+        mask = chess.BB_SQUARES[square]
+        if self.occupied & mask:
+            for piece_type in chess.PIECE_TYPES:
+                if self.pieces[piece_type] & mask:
+                    return piece_type
+        return None
+
+    def remove_piece_at(self, square: chess.Square) -> None:
+        self.pin_map = None
+        mask = ~chess.BB_SQUARES[square]
+        for piece_type in chess.PIECE_TYPES:
+            self.pieces[piece_type] &= mask
+        self.occupied_co[chess.WHITE] &= mask
+        self.occupied_co[chess.BLACK] &= mask
+        self.occupied &= mask
+
+    def move_piece(
+        self,
+        from_square: chess.Square,
+        to_square: chess.Square,
+        piece_type: chess.PieceType,
+    ) -> None:
+        """Move a piece, replacing whatever is at *to_square* with
+        a piece of *piece_type*."""
+        color = bool(self.occupied_co[chess.WHITE] & chess.BB_SQUARES[from_square])
+        self.remove_piece_at(from_square)
+        self.remove_piece_at(to_square)
+        mask = chess.BB_SQUARES[to_square]
+        self.pieces[piece_type] |= mask
+        self.occupied_co[color] |= mask
+        self.occupied |= mask
+
+    def king(self, color: chess.Color) -> Optional[chess.Square]:
+        king_mask = self.pieces[chess.KING] & self.occupied_co[color]
+        return chess.msb(king_mask) if king_mask else None
+
+    def attackers_mask(
+        self, color: chess.Color, square: chess.Square
+    ) -> chess.Bitboard:
+        """The same as chess.BaseBoard.attackers_mask"""
+        occupied = self.occupied
+        pieces = self.pieces
+        queens_and_rooks = pieces[chess.QUEEN] | pieces[chess.ROOK]
+        queens_and_bishops = pieces[chess.QUEEN] | pieces[chess.BISHOP]
+
+        attackers = (
+            (chess.BB_KING_ATTACKS[square] & pieces[chess.KING])
+            | (chess.BB_KNIGHT_ATTACKS[square] & pieces[chess.KNIGHT])
+            | (
+                chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied]
+                & queens_and_rooks
+            )
+            | (
+                chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied]
+                & queens_and_rooks
+            )
+            | (
+                chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+                & queens_and_bishops
+            )
+            | (chess.BB_PAWN_ATTACKS[not color][square] & pieces[chess.PAWN])
+        )
+        return attackers & self.occupied_co[color]
+
+    def pin_mask(self, color: chess.Color, square: chess.Square) -> chess.Bitboard:
+        """The same as chess.BaseBoard.pin_mask"""
+        if self.pin_map is not None:
+            return self.pin_map.get(square, chess.BB_ALL)
+
+        king = self.king(color)
+        if king is None:
+            return chess.BB_ALL
+
+        square_mask = chess.BB_SQUARES[square]
+        pieces = self.pieces
+        queens_and_rooks = pieces[chess.QUEEN] | pieces[chess.ROOK]
+        queens_and_bishops = pieces[chess.QUEEN] | pieces[chess.BISHOP]
+
+        for attacks, sliders in [
+            (chess.BB_FILE_ATTACKS, queens_and_rooks),
+            (chess.BB_RANK_ATTACKS, queens_and_rooks),
+            (chess.BB_DIAG_ATTACKS, queens_and_bishops),
+        ]:
+            rays = attacks[king][0]
+            if rays & square_mask:
+                snipers = rays & sliders & self.occupied_co[not color]
+                for sniper in chess.scan_reversed(snipers):
+                    between = chess.between(sniper, king)
+                    if between & (self.occupied | square_mask) == square_mask:
+                        return chess.ray(king, sniper)
+                break
+
+        return chess.BB_ALL
+
+    def least_valuable_attacker(
+        self, color: chess.Color, square: chess.Square, *, ignore_check: bool
+    ) -> Optional[chess.Square]:
+        """Return the least valuable attacker of *square*, which can
+        legally capture. See :func:`chess_tactics.attacks.get_attackers`."""
+        attackers = self.attackers_mask(color, square)
+        if not attackers:
+            return None
+
+        square_mask = chess.BB_SQUARES[square]
+        only_king_can_capture = False
+        if not ignore_check:
+            king = self.king(color)
+            if king is not None:
+                # attacking king is in check, and check can't be avoided
+                # by capturing the target
+                checkers = self.attackers_mask(not color, king)
+                only_king_can_capture = bool(checkers) and checkers != square_mask
+
+        # Attackers of the same value are tried in square order,
+        # like in attacks.get_least_valuable_attacker.
+        kings = self.pieces[chess.KING]
+        for piece_types in PIECE_TYPES_BY_VALUE:
+            candidates = chess.BB_EMPTY
+            for piece_type in piece_types:
+                candidates |= self.pieces[piece_type]
+            for attacker in chess.scan_forward(attackers & candidates):
+                if kings & chess.BB_SQUARES[attacker]:
+                    # king can't capture if there are defenders
+                    if self.attackers_mask(not color, square):
+                        continue
+                else:
+                    if only_king_can_capture:
+                        continue
+                    # absolute pinned piece, and the target is not a piece
+                    # which pinned it
+                    if not self.pin_mask(color, attacker) & square_mask:
+                        continue
+                return attacker
+        return None
+
+
+def _iter_swaps(
+    swap_board: _SwapBoard,
+    color: chess.Color,
+    square: chess.Square,
+    target: Optional[chess.PieceType],
+    *,
+    ignore_check: bool,
+    en_passant_capture: Optional[chess.Square] = None,
+) -> Iterator[tuple[int, int]]:
+    """
+    Play out captures at *square* with the least valuable attackers,
+    starting with *color*, and yield ``(captured_value, promotion_value)``
+    tuples for each capture. Captures are made when the next item
+    is requested.
+
+    *swap_board* is modified in place. *target* is a type of a piece
+    at *square*. If *en_passant_capture* is set, and the square is empty,
+    the first capture by a pawn is en passant, and it removes a pawn
+    from *en_passant_capture* square.
+    """
+    while True:
+        attacker = swap_board.least_valuable_attacker(
+            color, square, ignore_check=ignore_check
+        )
+        if attacker is None:
+            return
+
+        piece_type = swap_board.piece_type_at(attacker)
+        assert piece_type is not None
+        captured_value = PIECE_VALUES[target]
+        promotion_value = 0
+        if piece_type == chess.PAWN:
+            if en_passant_capture is not None and target is None:
+                captured_value = PIECE_VALUES[chess.PAWN]
+                swap_board.remove_piece_at(en_passant_capture)
+            if target is not None and chess.BB_SQUARES[square] & chess.BB_BACKRANKS:
+                piece_type = chess.QUEEN
+                promotion_value = _PROMOTION_VALUE
+
+        swap_board.move_piece(attacker, square, piece_type)
+        yield captured_value, promotion_value
+        target = piece_type
+        color = not color
+
+
+def _evaluate_swap_list(
+    swap_list: list[tuple[int, int]],
+    square_value_before_promotion: Optional[float] = None,
+) -> int:
+    """Return the value of an exchange, given a list of captures from
+    :func:`_iter_swaps`. Each side may stop capturing if continuing
+    the exchange loses material."""
+    instrumentation.count("see_calls")
+    instrumentation.count("see_depth", len(swap_list))
+    instrumentation.count_max("see_max_depth", len(swap_list))
+    value = 0
+    for depth in reversed(range(len(swap_list))):
+        captured_value, promotion_value = swap_list[depth]
+        gain = captured_value + promotion_value
+        if gain < value:
+            value = 0
+        elif depth == 0 and square_value_before_promotion is not None:
+            value = square_value_before_promotion + promotion_value - value  # type: ignore[assignment]
+        else:
+            value = gain - value
+    return value
+
+
+def _get_en_passant_capture_square(
+    board: chess.Board, square: chess.Square
+) -> Optional[chess.Square]:
+    """Return a square of a pawn which is removed by an en passant capture
+    on *square*, or None if *square* is not an en passant square.
+    It's the same square chess.Board.push uses."""
+    if square != board.ep_square:
+        return None
+    return square - 8 if board.turn == chess.WHITE else square + 8
@@ -0,0 +1,128 @@
+"""
+Opt-in counters of the work done by tactics and mistakes detection::
+
+    from chess_tactics import instrumentation
+
+    instrumentation.enable()
+    ...  # analyse games
+    print(instrumentation.format_report(instrumentation.get_report()))
+    instrumentation.disable()
+
+Counted events:
+
+* ``board_copies`` - ``chess.Board.copy()`` calls, and ``board_pushes`` -
+  moves made on a board to look ahead (:func:`chess_tactics.move_utils.pushed`);
+* ``see_calls`` - exchange evaluations (the cached ones are not counted),
+  and ``see_depth`` / ``see_max_depth`` - the total and the maximal number
+  of captures played out by them; ``see_ge_calls`` / ``see_ge_depth`` -
+  the same for threshold checks (:func:`chess_tactics.exchange.see_ge`);
+* ``get_attackers_calls`` - attackers lookups
+  (:func:`chess_tactics.attacks.get_attackers_mask`);
+* ``mates_solved`` - positions evaluated by the mate solver instead of
+  an engine (:func:`chess_tactics.mates.get_mate_eval`);
+* ``<name>_cache_hits`` / ``<name>_cache_misses`` - exchange, hanging
+  pieces and SAN caches lookups.
+
+Calls and wall time of the :mod:`chess_tactics.mistakes` detectors are
+recorded as well. The time of a detector includes the time of detectors
+it calls.
+
+Instrumentation is disabled by default; then it costs a global variable
+check per event. Counters are per-process.
+"""
+
+import functools
+import time
+from collections import Counter
+from collections.abc import Callable
+from typing import NamedTuple, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable)
+
+
+class Report(NamedTuple):
+    counts: dict[str, int]
+    detector_calls: dict[str, int]
+    detector_seconds: dict[str, float]
+
+
+_counts: Optional[Counter[str]] = None
+_detector_calls: Counter[str] = Counter()
+_detector_seconds: Counter[str] = Counter()
+
+
+def enable() -> None:
+    """Start counting; counters are reset."""
+    global _counts
+    reset()
+    _counts = Counter()
+
+
+def disable() -> None:
+    """Stop counting; counters are reset."""
+    global _counts
+    reset()
+    _counts = None
+
+
+def is_enabled() -> bool:
+    return _counts is not None
+
+
+def reset() -> None:
+    if _counts is not None:
+        _counts.clear()
+    _detector_calls.clear()
+    _detector_seconds.clear()
+
+
+def get_report() -> Report:
+    """Return a copy of the counters collected since :func:`enable`."""
+    return Report(dict(_counts or {}), dict(_detector_calls), dict(_detector_seconds))
+
+
+def count(name: str, value: int = 1) -> None:
+    """Add *value* to the *name* counter, if instrumentation is enabled."""
+    if _counts is not None:
+        _counts[name] += value
+
+
+def count_max(name: str, value: int) -> None:
+    """Set the *name* counter to *value*, if it's larger."""
+    if _counts is not None and value > _counts[name]:
+        _counts[name] = value
+
+
+def timed(func: F) -> F:
+    """Decorator for mistakes detectors: record their calls and wall time."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _counts is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _detector_seconds[name] += time.perf_counter() - start
+            _detector_calls[name] += 1
+
+    return wrapper  # type: ignore[return-value]
+
+
+def format_report(report: Report) -> str:
+    """Return a human-readable text of the report."""
+    lines = [f"{'detector':<28}{'calls':>10}{'total, s':>12}{'per call, us':>14}"]
+    for name, seconds in sorted(
+        report.detector_seconds.items(), key=lambda item: -item[1]
+    ):
+        calls = report.detector_calls[name]
+        lines.append(
+            f"{name:<28}{calls:>10}{seconds:>12.3f}{seconds / calls * 1e6:>14.1f}"
+        )
+    lines.append("")
+    lines.append(f"{'counter':<28}{'value':>10}")
+    for name, value in sorted(report.counts.items()):
+        lines.append(f"{name:<28}{value:>10}")
+    return "\n".join(lines)
@@ -0,0 +1,153 @@
+"""
+Reading Lichess game exports: NDJSON files, one JSON game per line,
+optionally compressed with gzip or zstd (zstd requires the
+``zstandard`` package).
+
+Files are read in large blocks, decompressed in a background thread,
+and games are decoded one at a time, so memory usage doesn't depend
+on the file size::
+
+    for game in read_games("games.ndjson.zst", speeds={"blitz"}):
+        ...
+"""
+
+import gzip
+import json
+import queue
+import re
+import threading
+from collections.abc import Collection, Iterator
+from typing import BinaryIO, Optional
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Quick checks on the raw lines, to skip games without decoding them.
+# Nested objects don't have "variant" and "speed" keys, and "analysis"
+# of the players is an object, not a list.
+_VARIANT_RE = re.compile(rb'"variant"\s*:\s*"([^"]*)"')
+_SPEED_RE = re.compile(rb'"speed"\s*:\s*"([^"]*)"')
+_ANALYSIS_RE = re.compile(rb'"analysis"\s*:\s*\[')
+
+
+def read_games(
+    path: str,
+    *,
+    variants: Optional[Collection[str]] = None,
+    speeds: Optional[Collection[str]] = None,
+    with_analysis: bool = False,
+    block_size: int = 1 << 20,
+) -> Iterator[dict]:
+    """
+    Yield games from a Lichess NDJSON export at *path*.
+
+    If *variants* or *speeds* are passed, only games with these
+    ``variant`` / ``speed`` values are returned. If *with_analysis* is True,
+    games without computer analysis are skipped.
+    """
+    for line in iter_lines(path, block_size=block_size):
+        if not _match_line(line, variants, speeds, with_analysis):
+            continue
+        game = json.loads(line)
+        if _match_game(game, variants, speeds, with_analysis):
+            yield game
+
+
+def iter_lines(path: str, *, block_size: int = 1 << 20) -> Iterator[bytes]:
+    """Yield non-empty lines of a (possibly compressed) file at *path*."""
+    tail = b""
+    for block in _iter_blocks(path, block_size):
+        lines = (tail + block).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield line
+    if tail.strip():
+        yield tail
+
+
+def _iter_blocks(path: str, block_size: int) -> Iterator[bytes]:
+    """Read the file in a background thread and yield decompressed blocks."""
+    blocks: queue.Queue = queue.Queue(maxsize=4)
+    stop = threading.Event()
+
+    def _put(item) -> bool:
+        while not stop.is_set():
+            try:
+                blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _read() -> None:
+        try:
+            with _open(path) as f:
+                while block := f.read(block_size):
+                    if not _put(block):
+                        return
+        except BaseException as e:
+            _put(e)
+        else:
+            _put(None)
+
+    thread = threading.Thread(target=_read, daemon=True)
+    thread.start()
+    try:
+        while (block := blocks.get()) is not None:
+            if isinstance(block, BaseException):
+                raise block
+            yield block
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _open(path: str) -> BinaryIO:
+    with open(path, "rb") as f:
+        magic = f.read(4)
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(path, "rb")  # type: ignore[return-value]
+    if magic.startswith(ZSTD_MAGIC):
+        try:
+            import zstandard  # type: ignore[import-not-found]
+        except ImportError as e:
+            raise ImportError("zstandard package is required to read .zst files") from e
+        f = open(path, "rb")
+        # exports may be made of several frames, e.g. by pzstd
+        return zstandard.ZstdDecompressor().stream_reader(
+            f, closefd=True, read_across_frames=True
+        )
+    return open(path, "rb")
+
+
+def _match_line(
+    line: bytes,
+    variants: Optional[Collection[str]],
+    speeds: Optional[Collection[str]],
+    with_analysis: bool,
+) -> bool:
+    if with_analysis and not _ANALYSIS_RE.search(line):
+        return False
+    for values, regex in [(variants, _VARIANT_RE), (speeds, _SPEED_RE)]:
+        if values is None:
+            continue
+        m = regex.search(line)
+        if m is not None and m.group(1).decode() not in values:
+            return False
+    return True
+
+
+def _match_game(
+    game: dict,
+    variants: Optional[Collection[str]],
+    speeds: Optional[Collection[str]],
+    with_analysis: bool,
+) -> bool:
+    if variants is not None and game.get("variant") not in variants:
+        return False
+    if speeds is not None and game.get("speed") not in speeds:
+        return False
+    if with_analysis and not game.get("analysis"):
+        return False
+    return True
@@ -2,24 +2,228 @@
 Some utilities for lichess JSON games.
 """
 
-from typing import Optional
+from collections.abc import Iterator, Sequence
+from typing import NamedTuple, Optional, Union, overload
 
 import chess
 import chess.engine
 
+from .eval_cache import PositionEval
+from .mistakes import classify_move
+from .move_utils import parse_san
+
 # Engine limits which Lichess uses for the manually requested computer
 # analysis. See
 # https://github.com/lichess-org/lila/blob/5ed87699dad51ccf06e103f712fc304c009fed51/modules/fishnet/src/main/Work.scala#L72
 EVAL_LIMIT = chess.engine.Limit(nodes=1_000_000)
 
 
-def game_to_board(game) -> chess.Board:
+def game_to_board(game, *, detached: bool = False) -> chess.Board:
+    """Replay the game and return the final position.
+
+    If *detached* is True, the move stack is cleared, so the board
+    only holds the position. Functions from this package never need
+    the game history.
+    """
     board = chess.Board()
     for move in game["moves"].split():
-        board.push_san(move)
+        board.push(parse_san(board, move))
+    if detached:
+        board.clear_stack()
     return board
 
 
+class GamePly(NamedTuple):
+    """A move of a game, see :func:`iter_game_plies`."""
+
+    ply: int
+    board: chess.Board
+    move: chess.Move
+    eval: Optional[dict]
+    best_move: Optional[chess.Move]
+    mistakes: list[str]
+
+
+def iter_game_plies(game) -> Iterator[GamePly]:
+    """Replay the game and yield a :class:`GamePly` for each move.
+
+    ``board`` is the position before the move. It's the same board
+    object for all plies, updated in place, without the move stack;
+    copy it if it's needed after the iteration continues.
+
+    ``eval`` is the Lichess analysis entry for the move (None if the game
+    is not analysed), and ``mistakes`` is a result of
+    :func:`chess_tactics.mistakes.classify_move`. Only moves for which
+    Lichess suggests a better move are classified.
+    """
+    analysis = game.get("analysis", [])
+    san_list = game["moves"].split()
+    board = chess.Board()
+    for index, san in enumerate(san_list):
+        move = parse_san(board, san)
+        lichess_eval = analysis[index] if index < len(analysis) else None
+        best_move = eval_to_best_move(lichess_eval) if lichess_eval else None
+        mistakes = []
+        if lichess_eval and best_move is not None:
+            prev_eval = analysis[index - 1] if index > 0 else None
+            next_eval = analysis[index + 1] if index + 1 < len(analysis) else None
+            next_san = san_list[index + 1] if index + 1 < len(san_list) else None
+            mistakes = classify_move(
+                board,
+                move,
+                [best_move],
+                _get_best_opponent_moves(board, move, next_eval, next_san),
+                _variation_to_pv(board, lichess_eval.get("variation")),
+                _get_scores(board.turn, lichess_eval, prev_eval),
+            )
+        yield GamePly(index, board, move, lichess_eval, best_move, mistakes)
+        board.push(move)
+        board.clear_stack()
+
+
+def _get_best_opponent_moves(
+    board: chess.Board,
+    move: chess.Move,
+    next_eval: Optional[dict],
+    next_san: Optional[str],
+) -> Optional[list[chess.Move]]:
+    if next_eval is not None:
+        best_move = eval_to_best_move(next_eval)
+        if best_move is not None:
+            return [best_move]
+    if next_san is None or next_eval is None:
+        return None
+    # Lichess doesn't suggest a better move, so the move which
+    # is made is good enough.
+    board.push(move)
+    try:
+        return [parse_san(board, next_san)]
+    finally:
+        board.pop()
+
+
+def _variation_to_pv(
+    board: chess.Board, variation: Optional[str]
+) -> Optional[list[chess.Move]]:
+    if not variation:
+        return None
+    pv = []
+    try:
+        for san in variation.split():
+            move = parse_san(board, san)
+            board.push(move)
+            pv.append(move)
+    finally:
+        for _ in pv:
+            board.pop()
+    return pv
+
+
+def _get_scores(
+    color: chess.Color, lichess_eval: dict, prev_eval: Optional[dict]
+) -> Optional[tuple[chess.engine.Score, chess.engine.Score]]:
+    """Return (score, best_score) from the *color* point of view.
+    The best score is the evaluation before the move."""
+    if prev_eval is None:
+        return None
+    try:
+        score = eval_to_score(lichess_eval)
+        best_score = eval_to_score(prev_eval)
+    except ValueError:
+        return None
+    return (
+        chess.engine.PovScore(score, chess.WHITE).pov(color),
+        chess.engine.PovScore(best_score, chess.WHITE).pov(color),
+    )
+
+
+def get_lichess_evals(game) -> list[Optional[PositionEval]]:
+    """
+    Return evaluations of all positions of the game (including the starting
+    and the final positions) based on Lichess computer analysis, or None
+    for positions where the analysis doesn't have enough data.
+
+    If Lichess doesn't suggest a better move, the move which is made is
+    used as the best move. The principal variation is parsed on first use.
+    The starting position doesn't have a score; the final position
+    doesn't have best moves, so it's always None.
+    """
+    san_list = game["moves"].split()
+    analysis = game.get("analysis") or []
+    evals: list[Optional[PositionEval]] = [None] * (len(san_list) + 1)
+    board = chess.Board()
+    for index, san in enumerate(san_list[: len(analysis)]):
+        move = parse_san(board, san)
+        lichess_eval = analysis[index]
+        score = None
+        if index > 0:
+            try:
+                score = eval_to_score(analysis[index - 1])
+            except ValueError:
+                pass
+        if index == 0 or score is not None:
+            best_move = eval_to_best_move(lichess_eval)
+            if best_move is None:
+                evals[index] = PositionEval(_pov_white(score), [move], [])
+            else:
+                pv = LichessVariation(board.fen(), lichess_eval.get("variation", ""))
+                evals[index] = PositionEval(_pov_white(score), [best_move], pv)
+        board.push(move)
+        board.clear_stack()
+    return evals
+
+
+def _pov_white(
+    score: Optional[chess.engine.Score],
+) -> Optional[chess.engine.PovScore]:
+    if score is None:
+        return None
+    return chess.engine.PovScore(score, chess.WHITE)
+
+
+class LichessVariation(Sequence[chess.Move]):
+    """A principal variation from Lichess analysis ("variation" SANs),
+    which is converted to moves on first access."""
+
+    def __init__(self, fen: str, variation: str) -> None:
+        self.fen = fen
+        self.variation = variation
+        self._moves: Optional[list[chess.Move]] = None
+
+    @property
+    def moves(self) -> list[chess.Move]:
+        if self._moves is None:
+            board = chess.Board(self.fen)
+            self._moves = []
+            for san in self.variation.split():
+                move = parse_san(board, san)
+                board.push(move)
+                self._moves.append(move)
+        return self._moves
+
+    @overload
+    def __getitem__(self, index: int) -> chess.Move: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[chess.Move]: ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[chess.Move, list[chess.Move]]:
+        return self.moves[index]
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.fen!r}, {self.variation!r})"
+
+
 def eval_to_score(lichess_eval) -> chess.engine.Score:
     """Convert "eval" from Lichess JSON API game analysis entry"""
     if "eval" in lichess_eval:
@@ -0,0 +1,177 @@
+"""
+Mate in 1 and mate in 2 solver::
+
+    line = find_mate(board, max_n=2)  # [move, reply, mating move] or None
+
+Only moves which can give check are tried as mating moves: the squares
+a piece checks the king from are found with the attack tables, and
+pieces which block a line of their own slider to the king give
+a discovered check when they move. After a check, the king escape squares
+are looked at first, so most checks are refuted without generating
+all legal moves.
+"""
+
+from collections.abc import Iterator
+from typing import Optional
+
+import chess
+import chess.engine
+
+from . import instrumentation
+from .eval_cache import PositionEval
+from .move_utils import pushed
+
+
+def find_mate(board: chess.Board, max_n: int = 2) -> Optional[list[chess.Move]]:
+    """Return the shortest mating line of the side to move, if it
+    mates in *max_n* (1 or 2) moves or less, otherwise None.
+
+    A mate in 2 line is the first move, the first legal reply, and
+    the mating move after it.
+    """
+    if max_n < 1:
+        return None
+    move = find_mate_in_1(board)
+    if move is not None:
+        return [move]
+    if max_n >= 2:
+        return find_mate_in_2(board)
+    return None
+
+
+def find_mate_in_1(board: chess.Board) -> Optional[chess.Move]:
+    """Return a move which checkmates, or None."""
+    for move in _iter_check_candidates(board):
+        with pushed(board, move):
+            if _is_checkmate(board):
+                return move
+    return None
+
+
+def find_mate_in_2(board: chess.Board) -> Optional[list[chess.Move]]:
+    """Return a mate in 2 line ``[move, reply, mating move]``, or None.
+    Mates in 1 are not looked for."""
+    # the reply which refuted the last move often refutes the next one too
+    refutation: Optional[chess.Move] = None
+    for move in list(board.legal_moves):
+        with pushed(board, move):
+            replies = list(board.legal_moves)
+            if not replies:
+                # checkmate or stalemate
+                continue
+            if refutation in replies:
+                replies.remove(refutation)
+                replies.insert(0, refutation)
+            line = None
+            for reply in replies:
+                with pushed(board, reply):
+                    mating_move = find_mate_in_1(board)
+                if mating_move is None:
+                    refutation = reply
+                    break
+                if line is None:
+                    line = [move, reply, mating_move]
+            else:
+                return line
+    return None
+
+
+def get_mate_eval(board: chess.Board, max_n: int = 2) -> Optional[PositionEval]:
+    """Return an engine-like evaluation of the position, if the side
+    to move mates in *max_n* moves or less, otherwise None.
+
+    The principal variation is only the first move: the reply in
+    a mate in 2 line is not the best defence, just the first legal one.
+    """
+    line = find_mate(board, max_n)
+    if line is None:
+        return None
+    instrumentation.count("mates_solved")
+    n = (len(line) + 1) // 2
+    score = chess.engine.PovScore(chess.engine.Mate(n), board.turn)
+    return PositionEval(score, [line[0]], [line[0]])
+
+
+def _iter_check_candidates(board: chess.Board) -> Iterator[chess.Move]:
+    """Yield legal moves which may give check. All checking moves are
+    yielded; a few of the other moves may be yielded too."""
+    color = board.turn
+    king = board.king(not color)
+    if king is None:
+        return
+    check_masks = _get_check_masks(board, color, king)
+    discoverers = _get_discoverers(board, color, king)
+    promoting = board.pawns & (chess.BB_RANK_7 if color else chess.BB_RANK_2)
+    ep_mask = chess.BB_SQUARES[board.ep_square] if board.ep_square is not None else 0
+
+    # a discoverer checks unless it moves along the line, and the
+    # promoted piece may check from anywhere
+    others = board.occupied_co[color] & ~discoverers & ~promoting
+    yield from board.generate_legal_moves(discoverers | promoting)
+    # en passant may discover a check by removing the captured pawn
+    yield from board.generate_legal_moves(
+        board.pawns & others, check_masks[chess.PAWN] | ep_mask
+    )
+    for piece_type in (chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN):
+        pieces = board.pieces_mask(piece_type, color) & others
+        if pieces:
+            yield from board.generate_legal_moves(pieces, check_masks[piece_type])
+    # the castling rook may give check
+    yield from board.generate_castling_moves(board.kings & others)
+
+
+def _get_check_masks(
+    board: chess.Board, color: chess.Color, king: chess.Square
+) -> dict[chess.PieceType, chess.Bitboard]:
+    """Return {piece type: squares a piece of *color* checks *king* from}."""
+    occupied = board.occupied
+    diagonal = chess.BB_DIAG_ATTACKS[king][chess.BB_DIAG_MASKS[king] & occupied]
+    orthogonal = (
+        chess.BB_RANK_ATTACKS[king][chess.BB_RANK_MASKS[king] & occupied]
+        | chess.BB_FILE_ATTACKS[king][chess.BB_FILE_MASKS[king] & occupied]
+    )
+    return {
+        chess.PAWN: chess.BB_PAWN_ATTACKS[not color][king],
+        chess.KNIGHT: chess.BB_KNIGHT_ATTACKS[king],
+        chess.BISHOP: diagonal,
+        chess.ROOK: orthogonal,
+        chess.QUEEN: diagonal | orthogonal,
+    }
+
+
+def _get_discoverers(
+    board: chess.Board, color: chess.Color, king: chess.Square
+) -> chess.Bitboard:
+    """Return pieces of *color* which are the only piece between
+    a slider of *color* and *king*."""
+    ours = board.occupied_co[color]
+    snipers = (
+        (chess.BB_RANK_ATTACKS[king][0] | chess.BB_FILE_ATTACKS[king][0])
+        & (board.rooks | board.queens)
+        | chess.BB_DIAG_ATTACKS[king][0] & (board.bishops | board.queens)
+    ) & ours
+    discoverers = chess.BB_EMPTY
+    for sniper in chess.scan_reversed(snipers):
+        between = chess.between(king, sniper) & board.occupied
+        if between and between & (between - 1) == 0:
+            discoverers |= between & ours
+    return discoverers
+
+
+def _is_checkmate(board: chess.Board) -> bool:
+    """Faster ``board.is_checkmate()``: king escapes are tried first."""
+    checkers = board.checkers_mask()
+    if not checkers:
+        return False
+    color = board.turn
+    king = board.king(color)
+    assert king is not None
+    occupied = board.occupied ^ chess.BB_SQUARES[king]
+    escapes = chess.BB_KING_ATTACKS[king] & ~board.occupied_co[color]
+    for square in chess.scan_forward(escapes):
+        if not board.attackers_mask(not color, square, occupied):
+            return False
+    if checkers & (checkers - 1):
+        # double check, and the king can't move
+        return True
+    return not any(board.generate_legal_moves(~board.kings))
@@ -3,25 +3,34 @@ A module with heuristics for detecting various tactical mistakes.
 
 Engine analysis should be used to generate best moves, and to validate
 if a move is actually a mistake.
+
+Like in :mod:`chess_tactics.tactics`, functions accept an optional
+*analysis* of the *board* (before the move), which can be shared between
+the calls.
 """
 
+from collections.abc import Sequence
 from typing import Optional
 
 import chess
 import chess.engine
 
-from .exchange import (
-    get_capture_exchange_evaluation,
-    get_exchange_evaluation,
-    get_move_captured_value,
-)
-from .tactics import get_hanging_pieces, is_forking_move, is_hanging
+from . import instrumentation
+from .analysis import PositionAnalysis, ensure_analysis
+from .exchange import get_move_captured_value
+from .tactics import is_forking_move
 
 
+@instrumentation.timed
 def hanging_piece_not_captured(
-    board: chess.Board, move: chess.Move, best_moves: list[chess.Move]
+    board: chess.Board,
+    move: chess.Move,
+    best_moves: list[chess.Move],
+    *,
+    analysis: Optional[PositionAnalysis] = None,
 ) -> bool:
     """Return True if *move* failed to capture a hanging piece."""
+    analysis = ensure_analysis(board, analysis)
 
     # XXX: This probably should take in account values of the exchange
     # started by the capture, to detect cases where a wrong piece was
@@ -29,17 +38,20 @@ def hanging_piece_not_captured(
     # Or should it be considered a separate mistake?
 
     # The move which is made shouldn't be a capture of a hanging piece (??).
-    if is_hanging(board, move.to_square):
+    if analysis.is_hanging(move.to_square):
         return False
 
     # One of best_moves should be a capture of a hanging piece.
-    return any(is_hanging(board, m.to_square) for m in best_moves)
+    return any(analysis.is_hanging(m.to_square) for m in best_moves)
 
 
+@instrumentation.timed
 def hung_moved_piece(
     board: chess.Board,
     move: chess.Move,
     best_opponent_moves: Optional[list[chess.Move]] = None,
+    *,
+    analysis: Optional[PositionAnalysis] = None,
 ) -> bool:
     """Return True if *move* hangs a piece."""
     if board.is_capture(move):
@@ -47,14 +59,17 @@ def hung_moved_piece(
         return False
 
     return _moved_piece_should_be_captured_because_it_hangs(
-        board, move, best_opponent_moves
+        ensure_analysis(board, analysis), move, best_opponent_moves
     )
 
 
+@instrumentation.timed
 def started_bad_trade(
     board: chess.Board,
     move: chess.Move,
     best_opponent_moves: Optional[list[chess.Move]] = None,
+    *,
+    analysis: Optional[PositionAnalysis] = None,
 ) -> bool:
     """Return True if *move* is a capture which starts an unfavorable exchange,
     i.e. a trade which loses material."""
@@ -63,14 +78,17 @@ def started_bad_trade(
         return False
 
     return _moved_piece_should_be_captured_because_it_hangs(
-        board, move, best_opponent_moves
+        ensure_analysis(board, analysis), move, best_opponent_moves
     )
 
 
+@instrumentation.timed
 def hung_other_piece(
     board: chess.Board,
     move: chess.Move,
     best_moves: Optional[list[chess.Move]] = None,
+    *,
+    analysis: Optional[PositionAnalysis] = None,
 ) -> bool:
     """Return True if *move* made one of the other pieces hang:
 
@@ -82,8 +100,9 @@ def hung_other_piece(
     # XXX: should it handle counter-attacks, captures? I.e. a defence
     # is removed, but a piece of a higher value is attacked
     # (or maybe captured, which is a separate case)?
+    analysis = ensure_analysis(board, analysis)
 
-    new_hanging_value = _new_hanging_after_move_value(board, move)
+    new_hanging_value = _new_hanging_after_move_value(analysis, move)
 
     # some new pieces should be hanging after the move
     if not new_hanging_value:
@@ -93,17 +112,20 @@ def hung_other_piece(
     # one of the suggested variations
     if best_moves:
         hanging_after_best_move_value = min(
-            _new_hanging_after_move_value(board, m) for m in best_moves
+            _new_hanging_after_move_value(analysis, m) for m in best_moves
         )
         return hanging_after_best_move_value < new_hanging_value
 
     return True
 
 
+@instrumentation.timed
 def left_piece_hanging(
     board: chess.Board,
     move: chess.Move,
     best_moves: Optional[list[chess.Move]] = None,
+    *,
+    analysis: Optional[PositionAnalysis] = None,
 ) -> bool:
     """
     Return if a *move* failed to address an issue with a hanging piece:
@@ -124,8 +146,9 @@ def left_piece_hanging(
     # fixme: counter-attacks?
     # fixme: saving one of the pieces when more than 1 is hanging
     # is not considered enough if their value is the same
+    analysis = ensure_analysis(board, analysis)
     color = board.color_at(move.from_square)
-    hanging_now = get_hanging_pieces(board, color)
+    hanging_now = analysis.hanging_pieces(color)
 
     # there should be some hanging pieces now
     if not hanging_now:
@@ -138,7 +161,7 @@ def left_piece_hanging(
         return False
 
     hanging_after_move_value = _hanging_after_move_value(
-        board, move
+        analysis, move
     ) - get_move_captured_value(board, move)
 
     if not best_moves:
@@ -146,7 +169,7 @@ def left_piece_hanging(
         hanging_after_best_move_value = 0
     else:
         hanging_after_best_move_value = min(
-            _hanging_after_move_value(board, m) - get_move_captured_value(board, m)
+            _hanging_after_move_value(analysis, m) - get_move_captured_value(board, m)
             for m in best_moves
         )
 
@@ -164,44 +187,55 @@ def left_piece_hanging(
     return hanging_after_best_move_value < hanging_after_move_value
 
 
+@instrumentation.timed
 def missed_fork(
-    board: chess.Board, move: chess.Move, best_moves: list[chess.Move]
+    board: chess.Board,
+    move: chess.Move,
+    best_moves: list[chess.Move],
+    *,
+    analysis: Optional[PositionAnalysis] = None,
 ) -> bool:
     """Return True if a *move* is a missed fork opportunity"""
-    if is_forking_move(board, move):
+    analysis = ensure_analysis(board, analysis)
+    if is_forking_move(board, move, analysis=analysis):
         return False
 
-    return any(is_forking_move(board, m) for m in best_moves)
+    return any(is_forking_move(board, m, analysis=analysis) for m in best_moves)
 
 
+@instrumentation.timed
 def hung_fork(
     board: chess.Board,
     move: chess.Move,
     best_opponent_moves: list[chess.Move],
-    pv: Optional[list[chess.Move]] = None,
+    pv: Optional[Sequence[chess.Move]] = None,
+    *,
+    analysis: Optional[PositionAnalysis] = None,
 ) -> bool:
     """Return True if a *move* allowed opponent to make a fork"""
     if not best_opponent_moves:
         return False
 
     # one of the best responses for the opponent should be to fork us
-    board_after = board.copy()
-    board_after.push(move)
-    if not any(is_forking_move(board_after, m) for m in best_opponent_moves):
-        return False
+    analysis = ensure_analysis(board, analysis)
+    with analysis.after(move) as after:
+        if not any(
+            is_forking_move(after.board, m, analysis=after) for m in best_opponent_moves
+        ):
+            return False
 
     # if after the best response opponent still forks us, the move which
     # is made is not hanging a fork
     if pv and len(pv) >= 2:
         best_move, best_move_response = pv[:2]
-        board_after = board.copy()
-        board_after.push(best_move)
-        if is_forking_move(board_after, best_move_response):
-            return False
+        with analysis.after(best_move) as after:
+            if is_forking_move(after.board, best_move_response, analysis=after):
+                return False
 
     return True
 
 
+@instrumentation.timed
 def hung_mate_n(
     pov_white_score: chess.engine.Score,
     pov_white_best_score: chess.engine.Score,
@@ -212,6 +246,7 @@ def hung_mate_n(
     return pov_white_score == m and pov_white_best_score > m
 
 
+@instrumentation.timed
 def hung_mate_n_plus(
     pov_white_score: chess.engine.Score,
     pov_white_best_score: chess.engine.Score,
@@ -233,6 +268,7 @@ def hung_mate_n_plus(
     )
 
 
+@instrumentation.timed
 def missed_mate_n(
     pov_white_score: chess.engine.Score,
     pov_white_best_score: chess.engine.Score,
@@ -243,6 +279,7 @@ def missed_mate_n(
     return pov_white_best_score == m and pov_white_score < m
 
 
+@instrumentation.timed
 def missed_mate_n_plus(
     pov_white_score: chess.engine.Score,
     pov_white_best_score: chess.engine.Score,
@@ -261,10 +298,13 @@ def missed_mate_n_plus(
     )
 
 
+@instrumentation.timed
 def missed_sacrifice(
     board: chess.Board,
     move: chess.Move,
     best_moves: list[chess.Move],
+    *,
+    analysis: Optional[PositionAnalysis] = None,
 ) -> bool:
     """
     Return True if one of *best_moves* is a sacrifice, while *move* isn't.
@@ -273,10 +313,12 @@ def missed_sacrifice(
     if move in best_moves:
         return False
 
+    analysis = ensure_analysis(board, analysis)
+
     def _is_sacrifice(b, m) -> bool:
         # the moved piece is sacrificed by capturing something
         # fixme: don't consider discovered attacks sacrifices
-        if started_bad_trade(b, m):
+        if started_bad_trade(b, m, analysis=analysis):
             return True
 
         # Moved piece is put into hanging position. We should
@@ -302,9 +344,71 @@ def missed_sacrifice(
     return any(_is_sacrifice(board, move) for move in best_moves)
 
 
-def _moved_piece_should_be_captured_because_it_hangs(
+@instrumentation.timed
+def classify_move(
     board: chess.Board,
     move: chess.Move,
+    best_moves: list[chess.Move],
+    best_opponent_moves: Optional[list[chess.Move]] = None,
+    pv: Optional[Sequence[chess.Move]] = None,
+    scores: Optional[tuple[chess.engine.Score, chess.engine.Score]] = None,
+    *,
+    analysis: Optional[PositionAnalysis] = None,
+    max_mate_n: int = 2,
+) -> list[str]:
+    """
+    Run all mistake detectors for *move* and return names of the detected
+    mistakes, e.g. ``["hung_other_piece", "hung_mate_1"]``.
+
+    The result is the same as calling the functions from this module
+    one by one, but attackers, exchange values, hanging pieces and
+    positions after the moves are computed only once.
+
+    *scores* is a ``(score, best_score)`` tuple for the mate detectors;
+    mates in 1..*max_mate_n* are reported as ``hung_mate_<n>`` and
+    ``missed_mate_<n>``, longer mates as ``hung_mate_<n>_plus`` and
+    ``missed_mate_<n>_plus``. Mate detectors are skipped if *scores*
+    is None.
+    """
+    analysis = ensure_analysis(board, analysis)
+    labels = []
+
+    if hanging_piece_not_captured(board, move, best_moves, analysis=analysis):
+        labels.append("hanging_piece_not_captured")
+    if hung_moved_piece(board, move, best_opponent_moves, analysis=analysis):
+        labels.append("hung_moved_piece")
+    if started_bad_trade(board, move, best_opponent_moves, analysis=analysis):
+        labels.append("started_bad_trade")
+    if hung_other_piece(board, move, best_moves, analysis=analysis):
+        labels.append("hung_other_piece")
+    if left_piece_hanging(board, move, best_moves, analysis=analysis):
+        labels.append("left_piece_hanging")
+    if missed_fork(board, move, best_moves, analysis=analysis):
+        labels.append("missed_fork")
+    if hung_fork(board, move, best_opponent_moves or [], pv, analysis=analysis):
+        labels.append("hung_fork")
+    if missed_sacrifice(board, move, best_moves, analysis=analysis):
+        labels.append("missed_sacrifice")
+
+    if scores is not None:
+        score, best_score = scores
+        for n in range(1, max_mate_n + 1):
+            if hung_mate_n(score, best_score, n):
+                labels.append(f"hung_mate_{n}")
+            if missed_mate_n(score, best_score, n):
+                labels.append(f"missed_mate_{n}")
+        n = max_mate_n + 1
+        if hung_mate_n_plus(score, best_score, n):
+            labels.append(f"hung_mate_{n}_plus")
+        if missed_mate_n_plus(score, best_score, n):
+            labels.append(f"missed_mate_{n}_plus")
+
+    return labels
+
+
+def _moved_piece_should_be_captured_because_it_hangs(
+    analysis: PositionAnalysis,
+    move: chess.Move,
     best_opponent_moves: Optional[list[chess.Move]] = None,
 ) -> bool:
     # One of the best opponent moves should be to capture the moved piece.
@@ -314,44 +418,38 @@ def _moved_piece_should_be_captured_because_it_hangs(
 
     # fixme: consider value of other pieces when best_opponent_moves
     # are not provided?
-    return get_capture_exchange_evaluation(board, move) < 0
+    return not analysis.see_ge(move, 0)
 
 
-def _new_hanging_after_move_value(board: chess.Board, move: chess.Move) -> int:
+def _new_hanging_after_move_value(analysis: PositionAnalysis, move: chess.Move) -> int:
     """Return the max value of the newly hanging pieces after the move.
     The piece which just moved doesn't count."""
 
-    color = board.color_at(move.from_square)
-    hanging_now = get_hanging_pieces(board, color) - {move.from_square}
+    color = analysis.board.color_at(move.from_square)
+    hanging_now = analysis.hanging_pieces(color) - {move.from_square}
 
     # the piece itself is not considered here
-    board_after, hanging_after_move = _hanging_after_move(board, move)
-    new_hanging_after_move = hanging_after_move - hanging_now - {move.to_square}
-    return _get_hanging_value(board_after, new_hanging_after_move)
-
-
-def _hanging_after_move_value(board: chess.Board, move: chess.Move) -> int:
-    """Return the max value of a piece hanging after the move"""
-    board_after, hanging_after_move = _hanging_after_move(board, move)
-    return _get_hanging_value(board_after, hanging_after_move)
+    return _hanging_after_move_value(
+        analysis, move, ignored=hanging_now | {move.to_square}
+    )
 
 
-def _hanging_after_move(
-    board: chess.Board,
+def _hanging_after_move_value(
+    analysis: PositionAnalysis,
     move: chess.Move,
-) -> tuple[chess.Board, chess.SquareSet]:
-    """Return the board after the move, and the pieces which
-    are hanging after the move."""
-    color = board.color_at(move.from_square)
-    board_after = board.copy()
-    board_after.push(move)
-    hanging = get_hanging_pieces(board_after, color)
-    return board_after, hanging
-
-
-def _get_hanging_value(board: chess.Board, hanging: chess.SquareSet) -> int:
+    *,
+    ignored: chess.IntoSquareSet = chess.BB_EMPTY,
+) -> int:
+    """Return the max value of a piece hanging after the move,
+    not counting pieces on *ignored* squares."""
+    color = analysis.board.color_at(move.from_square)
+    with analysis.after(move) as analysis_after:
+        hanging_after_move = analysis_after.hanging_pieces(color) - ignored
+        return _get_hanging_value(analysis_after, hanging_after_move)
+
+
+def _get_hanging_value(analysis: PositionAnalysis, hanging: chess.SquareSet) -> int:
     if not hanging:
         return 0
-    return max(
-        get_exchange_evaluation(board, not board.color_at(s), s) for s in hanging
-    )
+    board = analysis.board
+    return max(analysis.exchange_evaluation(not board.color_at(s), s) for s in hanging)
@@ -1,12 +1,70 @@
+from collections.abc import Hashable, Iterator
+from contextlib import contextmanager
+from typing import Optional
+
 import chess
 
+from . import instrumentation
+from .cache import LRUCache
+
+_san_cache: LRUCache[chess.Move] = LRUCache(maxsize=100_000)
+
+_SQUARES = {name: square for square, name in enumerate(chess.SQUARE_NAMES)}
+_PIECE_TYPES = {
+    symbol.upper(): piece_type
+    for piece_type, symbol in enumerate(chess.PIECE_SYMBOLS)
+    if symbol
+}
+
+
+def parse_san(board: chess.Board, san: str) -> chess.Move:
+    """Like ``board.parse_san(san)``, but faster.
+
+    Moves are cached by position and SAN, so positions which repeat
+    in many games (e.g. openings) are only resolved once. Other moves
+    are resolved without generating legal moves where possible.
+    """
+    key = _position_key(board), san
+    move = _san_cache.get(key)
+    if move is None:
+        instrumentation.count("san_cache_misses")
+        move = _parse_san_pseudo_legal(board, san)
+        if move is None:
+            move = board.parse_san(san)
+        _san_cache.put(key, move)
+    else:
+        instrumentation.count("san_cache_hits")
+    return move
+
+
+@contextmanager
+def pushed(board: chess.Board, move: chess.Move) -> Iterator[chess.Board]:
+    """Make a move on the *board* in place, and take it back on exit,
+    even if an exception is raised::
+
+        with pushed(board, move):
+            ...  # board is the position after the move
+
+    Use it to look ahead without copying the board. Moves pushed
+    inside the block and not taken back are taken back as well.
+    """
+    depth = len(board.move_stack)
+    instrumentation.count("board_pushes")
+    board.push(move)
+    try:
+        yield board
+    finally:
+        while len(board.move_stack) > depth:
+            board.pop()
+
 
 def san_list_to_moves(board: chess.Board, san_list: list[str]) -> list[chess.Move]:
     """Convert a list of strings with SANs to a list of chess.Move instances"""
-    board = board.copy()
+    instrumentation.count("board_copies")
+    board = board.copy(stack=False)
     moves = []
     for san in san_list:
-        move = board.parse_san(san)
+        move = parse_san(board, san)
         board.push(move)
         moves.append(move)
     return moves
@@ -14,10 +72,94 @@ def san_list_to_moves(board: chess.Board, san_list: list[str]) -> list[chess.Mov
 
 def moves_to_san_list(board: chess.Board, moves: list[chess.Move]) -> list[str]:
     """Convert a list of chess.Move instances to a list of strings with SANs"""
-    board = board.copy()
+    instrumentation.count("board_copies")
+    board = board.copy(stack=False)
     san_list = []
     for move in moves:
         san = board.san(move)
         board.push(move)
         san_list.append(san)
     return san_list
+
+
+def _position_key(board: chess.Board) -> Hashable:
+    return (
+        board.pawns,
+        board.knights,
+        board.bishops,
+        board.rooks,
+        board.queens,
+        board.kings,
+        board.occupied_co[chess.WHITE],
+        board.turn,
+        board.castling_rights,
+        board.ep_square,
+        board.chess960,
+    )
+
+
+def _parse_san_pseudo_legal(board: chess.Board, san: str) -> Optional[chess.Move]:
+    """Return the move if there is a single piece which can make it,
+    or None if the full (legal moves based) parsing is needed,
+    e.g. for castling or when the move needs disambiguation."""
+    match = chess.SAN_REGEX.match(san)
+    if not match:
+        return None
+    piece_symbol, file_name, rank_name, to_square_name, promotion_symbol = (
+        match.groups()
+    )
+
+    color = board.turn
+    to_square = _SQUARES[to_square_name]
+    to_bb = chess.BB_SQUARES[to_square]
+    if board.occupied_co[color] & to_bb:
+        return None
+
+    promotion = None
+    if piece_symbol:
+        if promotion_symbol:
+            return None
+        candidates = board.attackers_mask(color, to_square) & board.pieces_mask(
+            _PIECE_TYPES[piece_symbol], color
+        )
+    else:
+        if promotion_symbol:
+            promotion = _PIECE_TYPES.get(promotion_symbol[-1].upper())
+            if promotion is None or promotion == chess.KING:
+                return None
+        if to_bb & (chess.BB_RANK_1 if color == chess.WHITE else chess.BB_RANK_8):
+            return None
+        if (promotion is None) != (not to_bb & chess.BB_BACKRANKS):
+            return None
+        pawns = board.pawns & board.occupied_co[color]
+        if "x" in san:
+            if not board.occupied_co[not color] & to_bb and (
+                to_square != board.ep_square
+            ):
+                return None
+            candidates = chess.BB_PAWN_ATTACKS[not color][to_square] & pawns
+        else:
+            if board.occupied & to_bb:
+                return None
+            step = -8 if color == chess.WHITE else 8
+            from_bb = chess.BB_SQUARES[to_square + step]
+            candidates = pawns & from_bb
+            if (
+                not candidates
+                and not board.occupied & from_bb
+                and chess.square_rank(to_square) == (3 if color == chess.WHITE else 4)
+            ):
+                candidates = pawns & chess.BB_SQUARES[to_square + 2 * step]
+
+    if file_name:
+        candidates &= chess.BB_FILES[chess.FILE_NAMES.index(file_name)]
+    if rank_name:
+        candidates &= chess.BB_RANKS[int(rank_name) - 1]
+
+    # exactly one candidate
+    if not candidates or candidates & (candidates - 1):
+        return None
+    move = chess.Move(chess.lsb(candidates), to_square, promotion)
+    if board.is_into_check(move):
+        return None
+    return move
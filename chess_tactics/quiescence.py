@@ -0,0 +1,187 @@
+"""
+Engine-free best moves for the capture mistakes detectors, found by
+a small quiescence search::
+
+    best_moves = get_best_captures(board)
+    best_opponent_moves = get_best_replies(board, move)
+    hung_moved_piece(board, move, best_opponent_moves)
+
+or, for the detectors which only need captures::
+
+    labels = classify_capture_mistakes(board, move)
+
+Only captures are searched (and all moves when the king is in check).
+The side to move may stop capturing at any point ("stand pat"), so a
+score is the material a side can win from the position, in
+:data:`chess_tactics.values.PIECE_VALUES` units. Captures are ordered
+by :func:`chess_tactics.exchange.get_capture_exchange_evaluation`, and
+the ones which lose material by it are not searched.
+
+The search stops after *max_nodes* positions; captures which are not
+searched by then are scored by their exchange evaluation.
+"""
+
+from typing import NamedTuple, Optional
+
+import chess
+
+from .analysis import PositionAnalysis, ensure_analysis
+from .exchange import get_capture_exchange_evaluation, get_move_captured_value
+from .mistakes import hanging_piece_not_captured, hung_moved_piece, started_bad_trade
+from .move_utils import pushed
+from .values import PIECE_VALUES
+
+DEFAULT_MAX_NODES = 1000
+
+# more than any material balance
+_MATE_SCORE = 10_000
+
+
+class Candidate(NamedTuple):
+    move: chess.Move
+    #: material won by the capture and the exchanges after it
+    score: int
+
+
+def rank_captures(
+    board: chess.Board, *, max_nodes: int = DEFAULT_MAX_NODES
+) -> list[Candidate]:
+    """Return legal captures of the side to move with their scores,
+    best first."""
+    search = _Search(max_nodes)
+    candidates = []
+    for move, exchange_value in _get_ordered_captures(board):
+        if exchange_value < 0 or search.nodes >= max_nodes:
+            score = exchange_value
+        else:
+            gain = _get_gain(board, move)
+            with pushed(board, move):
+                score = gain - search.search(board, -_MATE_SCORE, _MATE_SCORE)
+        candidates.append(Candidate(move, score))
+    # stable sort: equal scores keep the exchange evaluation order
+    candidates.sort(key=lambda candidate: -candidate.score)
+    return candidates
+
+
+def get_best_captures(
+    board: chess.Board,
+    *,
+    max_nodes: int = DEFAULT_MAX_NODES,
+    max_moves: int = 2,
+) -> list[chess.Move]:
+    """Return up to *max_moves* best captures which win material,
+    best first. The list is empty if no capture wins material."""
+    return [
+        candidate.move
+        for candidate in rank_captures(board, max_nodes=max_nodes)[:max_moves]
+        if candidate.score > 0
+    ]
+
+
+def get_best_replies(
+    board: chess.Board,
+    move: chess.Move,
+    *,
+    max_nodes: int = DEFAULT_MAX_NODES,
+    max_moves: int = 2,
+) -> list[chess.Move]:
+    """Return :func:`get_best_captures` of the opponent after *move*."""
+    with pushed(board, move):
+        return get_best_captures(board, max_nodes=max_nodes, max_moves=max_moves)
+
+
+def classify_capture_mistakes(
+    board: chess.Board,
+    move: chess.Move,
+    *,
+    max_nodes: int = DEFAULT_MAX_NODES,
+    analysis: Optional[PositionAnalysis] = None,
+) -> list[str]:
+    """
+    Run the detectors which only need best captures
+    (``hanging_piece_not_captured``, ``hung_moved_piece`` and
+    ``started_bad_trade``), with best moves found by the search, and
+    return names of the detected mistakes, like
+    :func:`chess_tactics.mistakes.classify_move`. No move hangs or
+    starts a bad trade if the search finds no reply which wins material.
+    """
+    analysis = ensure_analysis(board, analysis)
+    best_moves = get_best_captures(board, max_nodes=max_nodes)
+    best_opponent_moves = get_best_replies(board, move, max_nodes=max_nodes)
+
+    labels = []
+    if hanging_piece_not_captured(board, move, best_moves, analysis=analysis):
+        labels.append("hanging_piece_not_captured")
+    # the detectors read no best moves as "unknown", and check the
+    # exchange evaluation only; here the search found no winning reply
+    if not best_opponent_moves:
+        return labels
+    if hung_moved_piece(board, move, best_opponent_moves, analysis=analysis):
+        labels.append("hung_moved_piece")
+    if started_bad_trade(board, move, best_opponent_moves, analysis=analysis):
+        labels.append("started_bad_trade")
+    return labels
+
+
+class _Search:
+    def __init__(self, max_nodes: int) -> None:
+        self.max_nodes = max_nodes
+        self.nodes = 0
+
+    def search(self, board: chess.Board, alpha: int, beta: int) -> int:
+        """Return the material the side to move can win (negamax,
+        fail-hard alpha-beta)."""
+        self.nodes += 1
+        in_check = board.is_check()
+        if in_check:
+            # all evasions are searched, there is no standing pat
+            moves = [(move, 0) for move in board.legal_moves]
+            if not moves:
+                return -_MATE_SCORE
+            best = -_MATE_SCORE
+        else:
+            moves = _get_ordered_captures(board)
+            best = 0
+
+        if best >= beta:
+            return best
+        alpha = max(alpha, best)
+        for move, exchange_value in moves:
+            if self.nodes >= self.max_nodes:
+                # out of budget: trust the exchange evaluations, and
+                # don't report a mate if no evasion is searched yet
+                if in_check:
+                    return best if best > -_MATE_SCORE else 0
+                return max(best, exchange_value)
+            if exchange_value < 0 and not in_check:
+                # the rest of the captures lose material too
+                break
+            gain = _get_gain(board, move)
+            with pushed(board, move):
+                score = gain - self.search(board, gain - beta, gain - alpha)
+            if score > best:
+                best = score
+                if best >= beta:
+                    break
+                alpha = max(alpha, best)
+        return best
+
+
+def _get_ordered_captures(board: chess.Board) -> list[tuple[chess.Move, int]]:
+    """Return legal captures with their exchange evaluations,
+    the best first."""
+    captures = [
+        (move, get_capture_exchange_evaluation(board, move))
+        for move in board.generate_legal_captures()
+    ]
+    captures.sort(key=lambda capture: -capture[1])
+    return captures
+
+
+def _get_gain(board: chess.Board, move: chess.Move) -> int:
+    """Return the material won by *move*: the captured piece and
+    the promotion."""
+    gain = get_move_captured_value(board, move)
+    if move.promotion:
+        gain += PIECE_VALUES[move.promotion] - PIECE_VALUES[chess.PAWN]
+    return gain
@@ -0,0 +1,258 @@
+"""
+Exchange values looked up by material signatures.
+
+In most positions nothing but material matters for an exchange: the
+value of the target, and the values of the attackers and defenders,
+which capture from the least valuable one. Then the value is read from
+a table indexed by these signatures, instead of playing the captures
+out. The table is a byte array, filled on first use of each signature::
+
+    value = lookup_exchange_value(board, color, square)
+    if value is None:
+        ...  # the exchange is not a simple one, play it out
+
+An exchange is simple if no king is in check, there are no x-ray
+attackers, no attacker stands on a line between a king and an opponent
+slider (so captures can't pin pieces or give discovered checks), and
+no pawn captures with promotion. The lookups are counted, see
+:func:`get_stats`.
+"""
+
+from array import array
+from typing import NamedTuple, Optional
+
+import chess
+
+from .values import PIECE_VALUES
+
+# value classes of targets; kings are never targets
+_TARGET_CLASSES = {
+    chess.PAWN: 0,
+    chess.KNIGHT: 1,
+    chess.BISHOP: 1,
+    chess.ROOK: 2,
+    chess.QUEEN: 3,
+}
+# values of attackers by value classes, see _get_class_masks
+_CLASS_VALUES = [
+    PIECE_VALUES[chess.PAWN],
+    PIECE_VALUES[chess.KNIGHT],
+    PIECE_VALUES[chess.ROOK],
+    PIECE_VALUES[chess.QUEEN],
+    PIECE_VALUES[chess.KING],
+]
+# the most attackers of a class the table has room for; minor pieces
+# are one class, as knights and bishops have the same value
+_MAX_COUNTS = [2, 4, 2, 2, 1]
+_SIGNATURES = 3 * 5 * 3 * 3 * 2
+_TABLE_SIZE = (max(_TARGET_CLASSES.values()) + 1) * _SIGNATURES * _SIGNATURES
+
+_UNKNOWN = -1
+
+
+class TableStats(NamedTuple):
+    #: values read from the table (or 0, if nothing attacks the square)
+    hits: int
+    #: values computed and stored in the table
+    misses: int
+    #: exchanges which are not simple, or don't fit in the table
+    skips: int
+    #: signatures stored in the table
+    size: int
+    maxsize: int
+
+
+_table: Optional[array] = None
+_hits = 0
+_misses = 0
+_skips = 0
+
+
+def lookup_exchange_value(
+    board: chess.BaseBoard,
+    color: chess.Color,
+    square: chess.Square,
+    *,
+    unsafe: Optional[chess.Bitboard] = None,
+) -> Optional[int]:
+    """
+    Return the value of an exchange at *square*, started by *color*
+    (as :func:`chess_tactics.exchange.get_exchange_evaluation` does),
+    or None if the exchange is not a simple one.
+
+    *unsafe* is :func:`get_unsafe_squares` of the board; pass it when
+    looking up many squares on the same board.
+    """
+    global _table, _hits, _misses, _skips
+
+    target = board.piece_type_at(square)
+    if target is None or target == chess.KING:
+        _skips += 1
+        return None
+    occupied = board.occupied
+    attackers = _get_attackers(board, square, occupied)
+    if not attackers & board.occupied_co[color]:
+        _hits += 1
+        return 0
+
+    if unsafe is None:
+        unsafe = get_unsafe_squares(board)
+    if (
+        unsafe is None
+        or attackers & unsafe
+        or _get_attackers(board, square, occupied & ~attackers) & ~attackers
+        or board.pawns & attackers
+        and chess.BB_SQUARES[square] & chess.BB_BACKRANKS
+    ):
+        _skips += 1
+        return None
+
+    index = _get_signature_index(board, attackers & board.occupied_co[color])
+    defenders_index = _get_signature_index(
+        board, attackers & board.occupied_co[not color]
+    )
+    if index is None or defenders_index is None:
+        _skips += 1
+        return None
+    index = (
+        _TARGET_CLASSES[target] * _SIGNATURES + index
+    ) * _SIGNATURES + defenders_index
+
+    if _table is None:
+        _table = array("b", [_UNKNOWN]) * _TABLE_SIZE
+    value = _table[index]
+    if value == _UNKNOWN:
+        _misses += 1
+        value = _table[index] = _evaluate_signatures(
+            PIECE_VALUES[target],
+            _get_values(board, attackers & board.occupied_co[color]),
+            _get_values(board, attackers & board.occupied_co[not color]),
+        )
+    else:
+        _hits += 1
+    return value
+
+
+def get_unsafe_squares(board: chess.BaseBoard) -> Optional[chess.Bitboard]:
+    """
+    Return squares between kings and opponent sliders on their lines,
+    whatever stands between them, or None if a king is in check.
+    Captures from these squares may pin pieces or give checks.
+    """
+    unsafe = chess.BB_EMPTY
+    for color in chess.COLORS:
+        king = board.king(color)
+        if king is None:
+            continue
+        if board.attackers_mask(not color, king):
+            return None
+        opponent = board.occupied_co[not color]
+        snipers = (
+            (chess.BB_RANK_ATTACKS[king][0] | chess.BB_FILE_ATTACKS[king][0])
+            & (board.rooks | board.queens)
+            | chess.BB_DIAG_ATTACKS[king][0] & (board.bishops | board.queens)
+        ) & opponent
+        for sniper in chess.scan_forward(snipers):
+            unsafe |= chess.between(king, sniper)
+    return unsafe
+
+
+def get_stats() -> TableStats:
+    """Return lookup statistics, and how much of the table is filled."""
+    size = 0 if _table is None else _TABLE_SIZE - _table.count(_UNKNOWN)
+    return TableStats(_hits, _misses, _skips, size, _TABLE_SIZE)
+
+
+def reset_stats() -> None:
+    global _hits, _misses, _skips
+    _hits = _misses = _skips = 0
+
+
+def _get_attackers(
+    board: chess.BaseBoard, square: chess.Square, occupied: chess.Bitboard
+) -> chess.Bitboard:
+    """Return attackers of *square* of both colors."""
+    queens_and_rooks = board.queens | board.rooks
+    queens_and_bishops = board.queens | board.bishops
+    return (
+        (chess.BB_KING_ATTACKS[square] & board.kings)
+        | (chess.BB_KNIGHT_ATTACKS[square] & board.knights)
+        | (
+            chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied]
+            & queens_and_rooks
+        )
+        | (
+            chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied]
+            & queens_and_rooks
+        )
+        | (
+            chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+            & queens_and_bishops
+        )
+        | (
+            chess.BB_PAWN_ATTACKS[chess.WHITE][square]
+            & board.pawns
+            & board.occupied_co[chess.BLACK]
+        )
+        | (
+            chess.BB_PAWN_ATTACKS[chess.BLACK][square]
+            & board.pawns
+            & board.occupied_co[chess.WHITE]
+        )
+    ) & occupied
+
+
+def _get_class_masks(board: chess.BaseBoard) -> list[chess.Bitboard]:
+    return [
+        board.pawns,
+        board.knights | board.bishops,
+        board.rooks,
+        board.queens,
+        board.kings,
+    ]
+
+
+def _get_signature_index(
+    board: chess.BaseBoard, pieces: chess.Bitboard
+) -> Optional[int]:
+    """Return an index of a signature: counts of *pieces* by value
+    classes, or None if they don't fit in the table."""
+    index = 0
+    for mask, max_count in zip(_get_class_masks(board), _MAX_COUNTS):
+        count = chess.popcount(pieces & mask)
+        if count > max_count:
+            return None
+        index = index * (max_count + 1) + count
+    return index
+
+
+def _get_values(board: chess.BaseBoard, pieces: chess.Bitboard) -> list[int]:
+    """Return values of *pieces*, the least valuable first."""
+    values = []
+    for mask, value in zip(_get_class_masks(board), _CLASS_VALUES):
+        values += [value] * chess.popcount(pieces & mask)
+    return values
+
+
+def _evaluate_signatures(
+    target_value: int, attackers: list[int], defenders: list[int]
+) -> int:
+    """Play out an exchange with the least valuable pieces first, like
+    ``exchange._iter_swaps``, and return its value."""
+    sides = [attackers, defenders]
+    captured = []
+    side = 0
+    while sides[side]:
+        value = sides[side][0]
+        # king can't capture if there are defenders
+        if value == PIECE_VALUES[chess.KING] and sides[1 - side]:
+            break
+        captured.append(target_value)
+        target_value = value
+        sides[side] = sides[side][1:]
+        side = 1 - side
+
+    value = 0
+    for gain in reversed(captured):
+        value = max(0, gain - value)
+    return value
@@ -1,38 +1,59 @@
+"""
+Detection of tactical patterns on the board.
+
+Functions accept an optional *analysis* argument: a
+:class:`~chess_tactics.analysis.PositionAnalysis` of the *board*. Pass
+the same object to several functions to compute attackers, pins and
+exchange values only once.
+"""
+
+from collections.abc import Iterator
+from typing import Optional
+
 import chess
 
-from .attacks import get_least_valuable_attacker
-from .exchange import get_exchange_evaluation
+from .analysis import PositionAnalysis, ensure_analysis
+from .move_utils import pushed
 from .values import get_square_value
 
 
-def is_hanging(board: chess.Board, square: chess.Square) -> bool:
+def is_hanging(
+    board: chess.Board,
+    square: chess.Square,
+    *,
+    analysis: Optional[PositionAnalysis] = None,
+) -> bool:
     """Return True if a piece at *square* is hanging."""
-    if board.piece_type_at(square) is None:
-        return False
-
-    return get_exchange_evaluation(board, not board.color_at(square), square) > 0
+    return ensure_analysis(board, analysis).is_hanging(square)
 
 
-def get_hanging_pieces(board: chess.Board, color: chess.Color) -> chess.SquareSet:
+def get_hanging_pieces(
+    board: chess.Board,
+    color: chess.Color,
+    *,
+    analysis: Optional[PositionAnalysis] = None,
+) -> chess.SquareSet:
     """Return a SquareSet of hanging pieces of a certain color."""
-    pieces = chess.SquareSet(board.occupied_co[color])
-    king = board.king(color)
-    if king is not None:
-        pieces.remove(king)
-    return chess.SquareSet(p for p in pieces if is_hanging(board, p))
+    return ensure_analysis(board, analysis).hanging_pieces(color)
 
 
-def can_be_captured(board: chess.Board, square: chess.Square) -> bool:
+def can_be_captured(
+    board: chess.Board,
+    square: chess.Square,
+    *,
+    analysis: Optional[PositionAnalysis] = None,
+) -> bool:
     """Return True if a piece at *square* can be captured. This includes
     cases where
     * the piece is hanging,
     * the piece is not hanging, but can be traded off on equal terms.
     """
-    if is_hanging(board, square):
+    analysis = ensure_analysis(board, analysis)
+    if analysis.is_hanging(square):
         return True
 
     opponent_color = not board.color_at(square)
-    attacker = get_least_valuable_attacker(board, opponent_color, square)
+    attacker = analysis.least_valuable_attacker(opponent_color, square)
     if attacker is not None:
         attacker_value = get_square_value(board, attacker)
         piece_value = get_square_value(board, square)
@@ -44,37 +65,133 @@ def can_be_captured(board: chess.Board, square: chess.Square) -> bool:
     return False
 
 
-def is_fork(board: chess.Board, square: chess.Square) -> bool:
+def is_fork(
+    board: chess.Board,
+    square: chess.Square,
+    *,
+    analysis: Optional[PositionAnalysis] = None,
+) -> bool:
     """Return True if a piece at *square* is forking."""
+    analysis = ensure_analysis(board, analysis)
+
     # the piece shouldn't be hanging, and it shouldn't be possible to
     # trade it off
-    if can_be_captured(board, square):
+    if can_be_captured(board, square, analysis=analysis):
         return False
 
     # 2+ pieces attacked by this piece should be hanging
-    forked = _get_attacked_hanging(board, square)
+    forked = _get_attacked_hanging(analysis, square)
     return len(forked) > 1
 
 
-def is_forking_move(board: chess.Board, move: chess.Move) -> bool:
+def is_forking_move(
+    board: chess.Board,
+    move: chess.Move,
+    *,
+    analysis: Optional[PositionAnalysis] = None,
+) -> bool:
     """Return True if a move is a fork."""
-    board_after = board.copy()
-    board_after.push(move)
-
-    # the moved piece shouldn't be hanging, and it shouldn't be possible to
-    # trade it off
-    if can_be_captured(board_after, move.to_square):
-        return False
-
-    # there should be at least 2 more hanging pieces after the move,
-    # attacked by the moved piece
-    hanging_after = _get_attacked_hanging(board_after, move.to_square)
-    hanging_before = chess.SquareSet(p for p in hanging_after if is_hanging(board, p))
+    analysis = ensure_analysis(board, analysis)
+    with analysis.after(move) as analysis_after:
+        # the moved piece shouldn't be hanging, and it shouldn't be possible
+        # to trade it off
+        board_after = analysis_after.board
+        if can_be_captured(board_after, move.to_square, analysis=analysis_after):
+            return False
+
+        # there should be at least 2 more hanging pieces after the move,
+        # attacked by the moved piece
+        hanging_after = _get_attacked_hanging(analysis_after, move.to_square)
+    hanging_before = chess.SquareSet(p for p in hanging_after if analysis.is_hanging(p))
     forked = hanging_after - hanging_before
     return len(forked) > 1
 
 
-def _get_attacked_hanging(board: chess.Board, square: chess.Square) -> chess.SquareSet:
+def find_forks(
+    board: chess.Board,
+    color: chess.Color,
+    *,
+    analysis: Optional[PositionAnalysis] = None,
+) -> list[chess.Move]:
+    """Return all moves of *color* which are forks (see
+    :func:`is_forking_move`).
+
+    Only moves to squares which attack two or more opponent pieces are
+    checked. If *color* is not to move, forks it would have if it could
+    move again are returned (none if the opponent is in check).
+    """
+    if color != board.turn:
+        if board.is_check():
+            return []
+        with pushed(board, chess.Move.null()):
+            return find_forks(board, color)
+
+    analysis = ensure_analysis(board, analysis)
+    return [
+        move
+        for move in _iter_fork_candidates(analysis)
+        if is_forking_move(board, move, analysis=analysis)
+    ]
+
+
+def _iter_fork_candidates(analysis: PositionAnalysis) -> Iterator[chess.Move]:
+    """Yield legal moves of the side to move which attack at least two
+    opponent pieces which are not hanging yet (a checked king counts)."""
+    board = analysis.board
+    color = board.turn
+    targets = board.occupied_co[not color] & ~int(analysis.hanging_pieces(not color))
+    if chess.popcount(targets) < 2:
+        return
+
+    promoting = board.pawns & (chess.BB_RANK_7 if color else chess.BB_RANK_2)
+    # the promoted piece may attack anything
+    yield from board.generate_legal_moves(promoting & board.occupied_co[color])
+    for piece_type in chess.PIECE_TYPES:
+        pieces = board.pieces_mask(piece_type, color) & ~promoting
+        if not pieces:
+            continue
+        # the moved piece doesn't block its own lines
+        occupied = board.occupied & ~pieces
+        attacked_once = attacked_twice = chess.BB_EMPTY
+        for target in chess.scan_forward(targets):
+            # attacks are symmetric: a piece on these squares attacks
+            # the target
+            attacks = _get_attacks_to(piece_type, color, target, occupied)
+            attacked_twice |= attacked_once & attacks
+            attacked_once |= attacks
+        if attacked_twice:
+            yield from board.generate_legal_moves(pieces, attacked_twice)
+
+
+def _get_attacks_to(
+    piece_type: chess.PieceType,
+    color: chess.Color,
+    square: chess.Square,
+    occupied: chess.Bitboard,
+) -> chess.Bitboard:
+    """Return squares a piece of *color* and *piece_type* attacks
+    *square* from."""
+    if piece_type == chess.PAWN:
+        return chess.BB_PAWN_ATTACKS[not color][square]
+    if piece_type == chess.KNIGHT:
+        return chess.BB_KNIGHT_ATTACKS[square]
+    if piece_type == chess.KING:
+        return chess.BB_KING_ATTACKS[square]
+    attacks = chess.BB_EMPTY
+    if piece_type in (chess.BISHOP, chess.QUEEN):
+        attacks |= chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+    if piece_type in (chess.ROOK, chess.QUEEN):
+        attacks |= (
+            chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied]
+            | chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied]
+        )
+    return attacks
+
+
+def _get_attacked_hanging(
+    analysis: PositionAnalysis, square: chess.Square
+) -> chess.SquareSet:
+    board = analysis.board
     color = not board.color_at(square)
     attacked = chess.SquareSet(board.attacks_mask(square) & board.occupied_co[color])
-    return chess.SquareSet([s for s in attacked if is_hanging(board, s)])
+    return chess.SquareSet([s for s in attacked if analysis.is_hanging(s)])
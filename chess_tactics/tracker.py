@@ -0,0 +1,256 @@
+"""
+Hanging pieces of a position which changes one move at a time::
+
+    tracker = HangingTracker(chess.Board())
+    for move in moves:
+        tracker.push(move)
+        hanging = tracker.hanging_pieces(chess.WHITE)
+
+Exchange values of all pieces are kept, and after a move only the pieces
+whose attackers or defenders may have changed are evaluated again:
+pieces on rays through the squares the move changed, up to the first piece
+which can't take part in an exchange, pieces attacked by the moved and
+the captured piece, and, if a line between a king and an enemy slider
+changed, pieces attacked by the pieces on that line, which may be pinned
+or unpinned. King moves and checks change exchanges all over the board,
+so after them all pieces are evaluated again.
+
+The result is always the same as of
+:func:`chess_tactics.tactics.get_hanging_pieces`.
+"""
+
+from typing import NamedTuple
+
+import chess
+
+from .analysis import PositionAnalysis
+from .attacks import in_check
+
+
+def _get_rays(square: chess.Square) -> list[tuple[list[int], list[int]]]:
+    """Return pairs of opposite rays from *square* along the rank, the file
+    and the diagonals, as lists of squares in order of distance."""
+    rays = []
+    for file_step, rank_step in [(1, 0), (0, 1), (1, 1), (1, -1)]:
+        pair = []
+        for sign in [1, -1]:
+            ray = []
+            file = chess.square_file(square) + sign * file_step
+            rank = chess.square_rank(square) + sign * rank_step
+            while 0 <= file < 8 and 0 <= rank < 8:
+                ray.append(chess.square(file, rank))
+                file += sign * file_step
+                rank += sign * rank_step
+            pair.append(ray)
+        rays.append((pair[0], pair[1]))
+    return rays
+
+
+_RAYS = [_get_rays(sq) for sq in chess.SQUARES]
+
+
+class HangingTracker:
+    """
+    Exchange values and hanging pieces of the *board*, updated
+    by :meth:`push` and :meth:`pop`.
+
+    The board is modified by the tracker; it must not be modified
+    in other ways while the tracker is in use.
+    """
+
+    def __init__(self, board: chess.Board) -> None:
+        self.board = board
+        # {square: value of the exchange started by the opponent}
+        # for all pieces but kings
+        self._values = self._evaluate(board.occupied & ~board.kings)
+        self._check = _any_check(board)
+        self._stack: list[tuple[dict[chess.Square, int], bool]] = []
+
+    def push(self, move: chess.Move) -> None:
+        """Make a move, and update exchange values."""
+        board = self.board
+        changed = _get_changed_squares(board, move)
+        before = _Snapshot.take(board, changed)
+        king_moved = board.kings & chess.BB_SQUARES[move.from_square]
+        board.push(move)
+
+        self._stack.append((self._values, self._check))
+        full = king_moved or self._check
+        self._check = _any_check(board)
+        full = full or self._check
+        self._values = dict(self._values)
+        for square in chess.scan_forward(changed):
+            self._values.pop(square, None)
+        if full:
+            dirty = chess.BB_ALL
+        else:
+            dirty = _get_dirty_squares(board, changed, before)
+        self._values.update(self._evaluate(dirty & board.occupied & ~board.kings))
+
+    def pop(self) -> chess.Move:
+        """Take back the last move, and restore exchange values."""
+        move = self.board.pop()
+        self._values, self._check = self._stack.pop()
+        return move
+
+    def exchange_evaluation(self, square: chess.Square) -> int:
+        """Return the value of the exchange on *square*, started by
+        the opponent of the piece there (0 for kings and empty squares).
+        See :func:`chess_tactics.exchange.get_exchange_evaluation`."""
+        return self._values.get(square, 0)
+
+    def hanging_pieces(self, color: chess.Color) -> chess.SquareSet:
+        """See :func:`chess_tactics.tactics.get_hanging_pieces`."""
+        pieces = self.board.occupied_co[color]
+        return chess.SquareSet(
+            sum(
+                chess.BB_SQUARES[square]
+                for square, value in self._values.items()
+                if value > 0 and pieces & chess.BB_SQUARES[square]
+            )
+        )
+
+    def _evaluate(self, squares: chess.Bitboard) -> dict[chess.Square, int]:
+        analysis = PositionAnalysis(self.board)
+        values = {}
+        for square in chess.scan_forward(squares):
+            color = self.board.color_at(square)
+            assert color is not None
+            values[square] = analysis.exchange_evaluation(not color, square)
+        return values
+
+
+def _get_changed_squares(board: chess.Board, move: chess.Move) -> chess.Bitboard:
+    """Return squares where pieces are moved, captured or promoted."""
+    changed = chess.BB_SQUARES[move.from_square] | chess.BB_SQUARES[move.to_square]
+    if board.is_en_passant(move):
+        down = -8 if board.turn == chess.WHITE else 8
+        changed |= chess.BB_SQUARES[move.to_square + down]
+    return changed
+
+
+def _any_check(board: chess.Board) -> bool:
+    return in_check(board, chess.WHITE) or in_check(board, chess.BLACK)
+
+
+def _get_sliders(board: chess.Board) -> dict[chess.Color, list[chess.Bitboard]]:
+    """Return sliders of each color, moving along ranks, files
+    and diagonals (in the order of :data:`_RAYS`)."""
+    queens = board.queens
+    sliders = {}
+    for color in chess.COLORS:
+        orthogonal = (board.rooks | queens) & board.occupied_co[color]
+        diagonal = (board.bishops | queens) & board.occupied_co[color]
+        sliders[color] = [orthogonal, orthogonal, diagonal, diagonal]
+    return sliders
+
+
+def _get_step_attacks(board: chess.Board, squares: chess.Bitboard) -> chess.Bitboard:
+    """Return squares attacked by pawns, knights and kings on *squares*."""
+    attacks = chess.BB_EMPTY
+    for square in chess.scan_forward(squares & board.knights):
+        attacks |= chess.BB_KNIGHT_ATTACKS[square]
+    for square in chess.scan_forward(squares & board.kings):
+        attacks |= chess.BB_KING_ATTACKS[square]
+    for color in chess.COLORS:
+        pawns = squares & board.pawns & board.occupied_co[color]
+        for square in chess.scan_forward(pawns):
+            attacks |= chess.BB_PAWN_ATTACKS[color][square]
+    return attacks
+
+
+class _Snapshot(NamedTuple):
+    """The parts of a position before a move, needed to find
+    the squares affected by it."""
+
+    occupied: chess.Bitboard
+    sliders: dict[chess.Color, list[chess.Bitboard]]
+    step_attacks: chess.Bitboard
+
+    @classmethod
+    def take(cls, board: chess.Board, changed: chess.Bitboard) -> "_Snapshot":
+        return cls(
+            board.occupied, _get_sliders(board), _get_step_attacks(board, changed)
+        )
+
+
+def _get_dirty_squares(
+    board: chess.Board, changed: chess.Bitboard, before: _Snapshot
+) -> chess.Bitboard:
+    """Return squares whose exchange values may have changed after a move
+    which changed pieces on *changed* squares (the kings didn't move)."""
+    sliders_after = _get_sliders(board)
+    # sliders of each color which were or are on a line
+    sliders = {
+        color: [
+            old | new for old, new in zip(before.sliders[color], sliders_after[color])
+        ]
+        for color in chess.COLORS
+    }
+    any_sliders = [
+        white | black
+        for white, black in zip(sliders[chess.WHITE], sliders[chess.BLACK])
+    ]
+    # changed squares are empty in one of the positions, so pieces
+    # are seen through them
+    blockers = (before.occupied | board.occupied) & ~changed
+    pawns_and_kings = board.pawns | board.kings
+
+    def _walk(ray: list[int], line_sliders: chess.Bitboard) -> chess.Bitboard:
+        # squares which a slider at the start of the ray attacks,
+        # or attacks after the pieces capturing on them are removed
+        reach = chess.BB_EMPTY
+        for index, square in enumerate(ray):
+            mask = chess.BB_SQUARES[square]
+            reach |= mask
+            if blockers & mask and not line_sliders & mask:
+                # pawns and kings capture on the next square only
+                if pawns_and_kings & mask and index + 1 < len(ray):
+                    reach |= chess.BB_SQUARES[ray[index + 1]]
+                break
+        return reach
+
+    def _sees(ray: list[int], line_sliders: chess.Bitboard) -> bool:
+        # is there a slider at the end of the ray, which may see its start
+        for square in ray:
+            mask = chess.BB_SQUARES[square]
+            if line_sliders & mask:
+                return True
+            if blockers & mask:
+                return False
+        return False
+
+    def _reach(square: chess.Square, *, blocks: bool = True) -> chess.Bitboard:
+        # a piece on the square can attack, defend or x-ray along a line
+        # if it's a slider, and block sliders behind it
+        reach = chess.BB_SQUARES[square]
+        for (forward, backward), line_sliders in zip(_RAYS[square], any_sliders):
+            if line_sliders & chess.BB_SQUARES[square]:
+                reach |= _walk(forward, line_sliders) | _walk(backward, line_sliders)
+            elif blocks:
+                if _sees(backward, line_sliders):
+                    reach |= _walk(forward, line_sliders)
+                if _sees(forward, line_sliders):
+                    reach |= _walk(backward, line_sliders)
+        return reach
+
+    dirty = before.step_attacks | _get_step_attacks(board, changed)
+    for square in chess.scan_forward(changed):
+        dirty |= _reach(square)
+
+    # pins and discovered checks on the lines through the kings
+    for color in chess.COLORS:
+        king = board.king(color)
+        if king is None:
+            continue
+        for rays, line_sliders in zip(_RAYS[king], sliders[not color]):
+            for ray in rays:
+                ray_mask = sum(chess.BB_SQUARES[square] for square in ray)
+                if ray_mask & changed and ray_mask & line_sliders:
+                    # pieces which may be pinned or unpinned, or give
+                    # discovered checks, capture differently
+                    pieces = ray_mask & board.occupied & ~changed
+                    dirty |= _get_step_attacks(board, pieces)
+                    for square in chess.scan_forward(pieces):
+                        dirty |= _reach(square, blocks=False)
+    return dirty
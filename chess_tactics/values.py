@@ -10,6 +10,16 @@ PIECE_VALUES = {
     None: 0,
 }
 
+# Piece types grouped by value, the least valuable first
+PIECE_TYPES_BY_VALUE = [
+    [
+        piece_type
+        for piece_type in chess.PIECE_TYPES
+        if PIECE_VALUES[piece_type] == value
+    ]
+    for value in sorted({PIECE_VALUES[piece_type] for piece_type in chess.PIECE_TYPES})
+]
+
 
 def get_square_value(board: chess.Board, square: chess.Square) -> int:
     return PIECE_VALUES[board.piece_type_at(square)]
@@ -0,0 +1,94 @@
+"""
+A tiny UCI engine for tests. It "searches" by picking mates in 1 and
+legal moves which capture the most valuable pieces, and reports
+the material balance (or a mate in 1) as a score.
+"""
+
+import sys
+
+import chess
+
+PIECE_VALUES = {
+    chess.PAWN: 1,
+    chess.KNIGHT: 3,
+    chess.BISHOP: 3,
+    chess.ROOK: 5,
+    chess.QUEEN: 9,
+    chess.KING: 0,
+}
+
+
+def _material(board: chess.Board) -> int:
+    score = 0
+    for piece in board.piece_map().values():
+        value = PIECE_VALUES[piece.piece_type]
+        score += value if piece.color == board.turn else -value
+    return score * 100
+
+
+def _is_mate(board: chess.Board, move: chess.Move) -> bool:
+    board.push(move)
+    try:
+        return board.is_checkmate()
+    finally:
+        board.pop()
+
+
+def _ranked_moves(board: chess.Board) -> list[chess.Move]:
+    def _key(move: chess.Move):
+        captured = board.piece_type_at(move.to_square)
+        value = PIECE_VALUES[captured] if captured else 0
+        return not _is_mate(board, move), -value, move.uci()
+
+    return sorted(board.legal_moves, key=_key)
+
+
+def main() -> None:
+    board = chess.Board()
+    multipv = 1
+    for line in sys.stdin:
+        tokens = line.split()
+        if not tokens:
+            continue
+        command = tokens[0]
+        if command == "uci":
+            print("id name tests-engine")
+            print("option name MultiPV type spin default 1 min 1 max 500")
+            print("uciok")
+        elif command == "isready":
+            print("readyok")
+        elif command == "setoption" and tokens[2] == "MultiPV":
+            multipv = int(tokens[4])
+        elif command == "position":
+            if tokens[1] == "startpos":
+                board = chess.Board()
+                rest = tokens[2:]
+            else:
+                board = chess.Board(" ".join(tokens[2:8]))
+                rest = tokens[8:]
+            for uci in rest[1:] if rest and rest[0] == "moves" else []:
+                board.push_uci(uci)
+        elif command == "go":
+            moves = _ranked_moves(board)
+            if not moves:
+                score = "mate 0" if board.is_checkmate() else "cp 0"
+                print(f"info depth 0 score {score}")
+                print("bestmove (none)")
+            else:
+                for i, move in enumerate(moves[:multipv], start=1):
+                    if _is_mate(board, move):
+                        score = "mate 1"
+                    else:
+                        score = f"cp {_material(board)}"
+                    print(
+                        f"info depth 1 multipv {i} "
+                        f"score {score} nodes 1 pv {move.uci()}"
+                    )
+                print(f"bestmove {moves[0].uci()}")
+        elif command == "quit":
+            break
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
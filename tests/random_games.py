@@ -0,0 +1,36 @@
+"""
+Random games, to compare fast code paths with the reference ones
+on many positions::
+
+    board = chess.Board()
+    for move in iter_random_moves(board, seed):
+        ...  # check the position
+        board.push(move)
+"""
+
+import random
+from collections.abc import Iterator
+
+import chess
+
+
+def iter_random_moves(
+    board: chess.Board, seed: int, *, plies: int = 150, capture_rate: float = 0.5
+) -> Iterator[chess.Move]:
+    """
+    Yield random legal moves of *board*, until the game is over or
+    *plies* moves are yielded. With *capture_rate* probability a capture
+    is chosen, if there is one.
+
+    The caller makes the moves; the next move is chosen in the position
+    on the board when it's requested.
+    """
+    rnd = random.Random(seed)
+    for _ in range(plies):
+        moves = list(board.legal_moves)
+        if not moves:
+            return
+        captures = [move for move in moves if board.is_capture(move)]
+        if captures and rnd.random() < capture_rate:
+            moves = captures
+        yield rnd.choice(moves)
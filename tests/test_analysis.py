@@ -0,0 +1,90 @@
+import chess
+import pytest
+
+from chess_tactics.analysis import PositionAnalysis
+from chess_tactics.exchange import exchange_map, get_exchange_evaluation
+from chess_tactics.mistakes import hung_other_piece, left_piece_hanging, missed_fork
+from chess_tactics.tactics import can_be_captured, get_hanging_pieces, is_hanging
+
+from .fens import EXAMPLE_06, FORK_01, NIMZOVICH_TARRASCH
+
+
+def test_position_analysis():
+    board = chess.Board(NIMZOVICH_TARRASCH)
+    analysis = PositionAnalysis(board)
+
+    assert analysis.hanging_pieces(chess.WHITE) == chess.SquareSet(
+        [chess.D4, chess.F1, chess.F3]
+    )
+    assert analysis.hanging_pieces(chess.BLACK) == get_hanging_pieces(
+        board, chess.BLACK
+    )
+    assert analysis.exchange_evaluation(chess.BLACK, chess.F1) == 2
+    assert analysis.least_valuable_attacker(chess.BLACK, chess.F1) == chess.G2
+    assert analysis.least_valuable_attacker(chess.BLACK, chess.C1) is None
+    assert analysis.is_hanging(chess.D4)
+    assert not analysis.is_hanging(chess.E4)
+    assert not analysis.is_hanging(chess.E5)
+
+
+def test_pinned_attacker():
+    board = chess.Board(EXAMPLE_06)
+    analysis = PositionAnalysis(board)
+    assert analysis.pin_map(chess.WHITE) == {chess.B2: board.pin_mask(True, chess.B2)}
+    assert analysis.attackers_mask(chess.WHITE, chess.E5) == 0
+    assert analysis.attackers_mask(chess.WHITE, chess.B7) == chess.BB_B2
+
+
+def test_after():
+    board = chess.Board(FORK_01)
+    analysis = PositionAnalysis(board)
+    move = board.parse_san("Nc7+")
+    with analysis.after(move) as after:
+        assert after.board is board
+        assert board.piece_type_at(chess.C7) == chess.KNIGHT
+        assert board.move_stack == [move]
+    assert board.piece_type_at(chess.D5) == chess.KNIGHT
+    assert board.move_stack == []
+    with analysis.after(move) as after_again:
+        assert after_again is after
+
+
+def test_after_exception():
+    board = chess.Board(FORK_01)
+    analysis = PositionAnalysis(board)
+    with pytest.raises(ZeroDivisionError):
+        with analysis.after(board.parse_san("Nc7+")):
+            1 / 0
+    assert board.fen() == FORK_01
+
+
+def test_shared_analysis():
+    board = chess.Board(NIMZOVICH_TARRASCH)
+    analysis = PositionAnalysis(board)
+    move = board.parse_san("Qxf1+")
+    best_moves = [board.parse_san("Bxf1")]
+
+    for square in chess.SquareSet(board.occupied):
+        assert is_hanging(board, square, analysis=analysis) == is_hanging(board, square)
+        assert can_be_captured(board, square, analysis=analysis) == can_be_captured(
+            board, square
+        )
+        for color in chess.COLORS:
+            assert analysis.exchange_evaluation(
+                color, square
+            ) == get_exchange_evaluation(board, color, square)
+
+    for detector in [hung_other_piece, left_piece_hanging, missed_fork]:
+        expected = detector(board, move, best_moves)
+        assert detector(board, move, best_moves, analysis=analysis) == expected
+
+
+def test_exchange_map():
+    board = chess.Board(NIMZOVICH_TARRASCH)
+    analysis = PositionAnalysis(board)
+    result = analysis.exchange_map()
+    assert result == exchange_map(board)
+    assert analysis.exchange_evaluation(chess.BLACK, chess.F1) == 2
+    assert analysis.hanging_pieces(chess.WHITE) == chess.SquareSet(
+        [chess.D4, chess.F1, chess.F3]
+    )
@@ -1,12 +1,22 @@
 import chess
 
-from chess_tactics.attacks import get_attackers, get_least_valuable_attacker, in_check
+from chess_tactics.attacks import (
+    get_attackers,
+    get_attackers_mask,
+    get_least_valuable_attacker,
+    get_least_valuable_attacker_mask,
+    get_least_valuable_piece_mask,
+    get_pin_map,
+    in_check,
+)
 
 from .fens import (
+    EXAMPLE_06,
     EXAMPLE_07,
     EXAMPLE_08,
     EXAMPLE_08_1,
     EXAMPLE_09,
+    FORK_06,
     ILLEGAL_KING_ATTACK,
     NIMZOVICH_TARRASCH,
 )
@@ -18,6 +28,23 @@ def test_get_least_valuable_attacker():
     assert get_least_valuable_attacker(board, chess.BLACK, chess.C1) is None
 
 
+def test_get_least_valuable_attacker_mask():
+    board = chess.Board(NIMZOVICH_TARRASCH)
+    attacker = get_least_valuable_attacker_mask(board, chess.BLACK, chess.F1)
+    assert attacker == chess.BB_G2
+    assert get_least_valuable_attacker_mask(board, chess.BLACK, chess.C1) == 0
+
+
+def test_get_least_valuable_piece_mask():
+    board = chess.Board()
+    assert get_least_valuable_piece_mask(board, chess.BB_RANK_1) == chess.BB_B1
+    assert (
+        get_least_valuable_piece_mask(board, chess.BB_E1 | chess.BB_D8) == chess.BB_D8
+    )
+    assert get_least_valuable_piece_mask(board, chess.BB_RANK_4) == 0
+    assert get_least_valuable_piece_mask(board, 0) == 0
+
+
 def test_in_check():
     board = chess.Board(NIMZOVICH_TARRASCH)
     assert not in_check(board, chess.WHITE)
@@ -33,6 +60,22 @@ def test_in_check():
     assert in_check(board, chess.WHITE)
 
 
+def test_get_pin_map():
+    # Q and R pin each other
+    board = chess.Board(FORK_06)
+    assert get_pin_map(board, chess.BLACK) == {chess.B4: chess.BB_FILE_B}
+    assert get_pin_map(board, chess.WHITE) == {chess.B2: chess.BB_FILE_B}
+
+    # the same as board.pin_mask
+    for fen in [FORK_06, NIMZOVICH_TARRASCH, EXAMPLE_06, EXAMPLE_07]:
+        board = chess.Board(fen)
+        for color in chess.COLORS:
+            pin_map = get_pin_map(board, color)
+            for square in chess.SquareSet(board.occupied):
+                pin_mask = pin_map.get(square, chess.BB_ALL)
+                assert pin_mask == board.pin_mask(color, square)
+
+
 class TestGetAttackers:
     def test_original(self):
         # original test from python-chess
@@ -42,6 +85,9 @@ class TestGetAttackers:
         attackers = get_attackers(board, chess.WHITE, chess.C3)
         assert attackers == chess.SquareSet([chess.D2, chess.B2, chess.C1])
 
+        mask = get_attackers_mask(board, chess.WHITE, chess.C3)
+        assert mask == chess.BB_D2 | chess.BB_B2 | chess.BB_C1
+
     def test_pinned(self):
         # pinned attackers shouldn't be included
         board = chess.Board(
@@ -0,0 +1,88 @@
+import random
+
+import chess
+import pytest
+
+from chess_tactics.tactics import get_hanging_pieces
+
+from . import fens
+from ._lichess_games import GAME_1
+
+pytest.importorskip("numpy")
+
+from chess_tactics.batch import BLACK, WHITE, PositionBatch, get_hanging_masks
+
+FENS = [value for name, value in vars(fens).items() if name.isupper()]
+
+
+def _game_boards() -> list[chess.Board]:
+    board = chess.Board()
+    boards = [board.copy()]
+    for san in str(GAME_1["moves"]).split():
+        board.push_san(san)
+        boards.append(board.copy())
+    return boards
+
+
+def _random_boards(size: int, seed: int = 0) -> list[chess.Board]:
+    """Random piece placements, not necessarily legal positions."""
+    rnd = random.Random(seed)
+    boards = []
+    for _ in range(size):
+        board = chess.Board(None)
+        for square in rnd.sample(chess.SQUARES, rnd.randint(2, 24)):
+            piece_type = rnd.choice(chess.PIECE_TYPES[:-1])
+            board.set_piece_at(square, chess.Piece(piece_type, rnd.random() < 0.5))
+        for color in chess.COLORS:
+            empty = list(chess.SquareSet(~board.occupied))
+            if empty and rnd.random() < 0.95:
+                board.set_piece_at(rnd.choice(empty), chess.Piece(chess.KING, color))
+        board.turn = rnd.random() < 0.5
+        boards.append(board)
+    return boards
+
+
+def _assert_same_as_get_hanging_pieces(boards, hanging) -> None:
+    assert hanging.shape == (len(boards), 2)
+    for board, (black, white) in zip(boards, hanging.tolist()):
+        assert chess.SquareSet(white) == get_hanging_pieces(board, chess.WHITE)
+        assert chess.SquareSet(black) == get_hanging_pieces(board, chess.BLACK)
+
+
+@pytest.mark.parametrize(
+    "boards",
+    [
+        [chess.Board(fen) for fen in FENS],
+        _game_boards(),
+        _random_boards(2000),
+    ],
+    ids=["fens", "game", "random"],
+)
+def test_get_hanging_masks(boards):
+    _assert_same_as_get_hanging_pieces(boards, get_hanging_masks(boards))
+
+
+def test_position_batch_chunks():
+    boards = _game_boards()
+    batch = PositionBatch(boards)
+    assert len(batch) == len(boards)
+    assert batch.pieces.shape == (len(boards), 2, 7)
+    hanging = batch.hanging_masks(chunk_size=7)
+    _assert_same_as_get_hanging_pieces(boards, hanging)
+    assert (hanging == batch.hanging_masks()).all()
+
+
+def test_colors():
+    board = chess.Board(fens.EXAMPLE_00)
+    hanging = get_hanging_masks([board])
+    assert int(hanging[0, BLACK]) == chess.BB_E5
+    assert int(hanging[0, WHITE]) == chess.BB_EMPTY
+
+
+def test_several_kings():
+    board = chess.Board("1k6/8/8/4p3/8/2B5/8/KK6 w - - 0 1")
+    _assert_same_as_get_hanging_pieces([board], get_hanging_masks([board]))
+
+
+def test_empty_batch():
+    assert get_hanging_masks([]).shape == (0, 2)
@@ -0,0 +1,107 @@
+import chess
+import pytest
+
+from chess_tactics import cache
+from chess_tactics.exchange import get_exchange_evaluation
+from chess_tactics.mistakes import hung_other_piece
+from chess_tactics.tactics import get_hanging_pieces, is_hanging
+
+from .fens import EXAMPLE_04, EXAMPLE_06, EXAMPLE_13, FORK_01, NIMZOVICH_TARRASCH
+
+
+@pytest.fixture
+def enabled_cache():
+    cache.enable(maxsize=1000)
+    yield cache.get_cache()
+    cache.disable()
+
+
+def test_lru_cache():
+    lru = cache.LRUCache(maxsize=2)
+    assert lru.get("a") is None
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1
+    lru.put("c", 3)  # "b" is the least recently used
+    assert lru.get("b") is None
+    assert lru.get("c") == 3
+    assert len(lru) == 2
+    assert lru.stats() == cache.CacheStats(
+        hits=2, misses=2, evictions=1, size=2, maxsize=2
+    )
+
+    lru.clear()
+    assert lru.stats() == cache.CacheStats(
+        hits=0, misses=0, evictions=0, size=0, maxsize=2
+    )
+
+    with pytest.raises(ValueError):
+        cache.LRUCache(maxsize=0)
+
+
+def test_disabled_by_default():
+    assert cache.get_cache() is None
+    assert cache.get_stats() is None
+    board = chess.Board(EXAMPLE_04)
+    assert get_exchange_evaluation(board, chess.WHITE, chess.E5) == 1
+    cache.clear()  # no-op
+
+
+@pytest.mark.parametrize(
+    "fen", [EXAMPLE_04, EXAMPLE_06, EXAMPLE_13, FORK_01, NIMZOVICH_TARRASCH]
+)
+def test_cached_results(fen, enabled_cache):
+    board = chess.Board(fen)
+    for color in chess.COLORS:
+        for square in chess.SQUARES:
+            cache.disable()
+            expected_value = get_exchange_evaluation(board, color, square)
+            expected_hanging = is_hanging(board, square)
+            cache.enable()
+            for _ in range(2):
+                assert get_exchange_evaluation(board, color, square) == expected_value
+                assert is_hanging(board, square) == expected_hanging
+
+
+def test_stats(enabled_cache):
+    board = chess.Board(NIMZOVICH_TARRASCH)
+    hanging = get_hanging_pieces(board, chess.WHITE)
+    stats = cache.get_stats()
+    assert stats is not None
+    assert stats.hits == 0
+    assert stats.misses > 0
+
+    # the same position in another game
+    assert get_hanging_pieces(chess.Board(NIMZOVICH_TARRASCH), chess.WHITE) == hanging
+    assert cache.get_stats() == stats._replace(hits=1)
+
+    cache.clear()
+    assert cache.get_stats() == cache.CacheStats(
+        hits=0, misses=0, evictions=0, size=0, maxsize=1000
+    )
+
+
+def test_eviction():
+    cache.enable(maxsize=2)
+    try:
+        board = chess.Board(EXAMPLE_04)
+        for square in [chess.E5, chess.E7, chess.E8]:
+            get_exchange_evaluation(board, chess.WHITE, square)
+        stats = cache.get_stats()
+        assert stats is not None
+        assert stats.size == 2
+        assert stats.evictions == 1
+    finally:
+        cache.disable()
+
+
+def test_mistakes_with_cache(enabled_cache):
+    board = chess.Board(NIMZOVICH_TARRASCH)
+    move = board.parse_san("Rxd4")
+    cache.disable()
+    expected = hung_other_piece(board, move, [move])
+    cache.enable()
+    assert hung_other_piece(board, move, [move]) == expected
+    assert hung_other_piece(board, move, [move]) == expected
+    stats = cache.get_stats()
+    assert stats is not None and stats.hits > 0
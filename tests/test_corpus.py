@@ -0,0 +1,87 @@
+import json
+
+import chess
+
+from chess_tactics import cache, instrumentation
+from chess_tactics.corpus import (
+    GameMistakes,
+    PlyMistakes,
+    analyze_game,
+    analyze_games,
+    main,
+)
+
+from ._lichess_games import GAME_1
+
+
+def _games(n):
+    # the same game with different ids; every other game is not analysed
+    return [
+        {
+            "id": f"game{i}",
+            "variant": "standard",
+            "speed": "blitz",
+            "moves": GAME_1["moves"],
+            "analysis": GAME_1["analysis"] if i % 2 == 0 else [],
+        }
+        for i in range(n)
+    ]
+
+
+def test_analyze_game():
+    result = analyze_game(GAME_1)
+    assert result == GameMistakes(
+        "Qxub20cY",
+        [
+            PlyMistakes(46, chess.Move.from_uci("g3f4"), ["left_piece_hanging"]),
+            PlyMistakes(50, chess.Move.from_uci("f1d1"), ["hung_mate_3_plus"]),
+        ],
+    )
+
+
+def test_analyze_games():
+    games = _games(7)
+    expected = [analyze_game(game) for game in games]
+    assert list(analyze_games(games, processes=1)) == expected
+    results = analyze_games(
+        iter(games), processes=2, chunksize=2, max_pending_chunks=1, cache_size=100
+    )
+    assert list(results) == expected
+
+
+def test_analyze_games_cache():
+    games = _games(2)
+    assert list(analyze_games(games, processes=1, cache_size=100))
+    assert cache.get_cache() is None
+
+    # a cache enabled by the caller is kept
+    cache.enable(1000)
+    try:
+        exchange_cache = cache.get_cache()
+        list(analyze_games(games, processes=1, cache_size=100))
+        assert cache.get_cache() is exchange_cache
+        assert exchange_cache is not None and len(exchange_cache) > 0
+    finally:
+        cache.disable()
+
+
+def test_main(tmp_path, capsys):
+    path = tmp_path / "games.ndjson"
+    path.write_text("".join(json.dumps(game) + "\n" for game in _games(2)))
+    main([str(path), "-j", "1"])
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(row["id"], row["ply"]) for row in rows] == [("game0", 46), ("game0", 50)]
+    assert rows[0]["mistakes"] == ["left_piece_hanging"]
+
+
+def test_main_profile(tmp_path, capsys):
+    path = tmp_path / "games.ndjson"
+    path.write_text("".join(json.dumps(game) + "\n" for game in _games(2)))
+    stats_path = tmp_path / "stats.prof"
+    main([str(path), "--profile", str(stats_path)])
+    captured = capsys.readouterr()
+    assert len(captured.out.splitlines()) == 2
+    assert "classify_move" in captured.err
+    assert "see_calls" in captured.err
+    assert stats_path.exists()
+    assert not instrumentation.is_enabled()
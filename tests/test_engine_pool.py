@@ -0,0 +1,139 @@
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import chess
+import chess.engine
+
+from chess_tactics.engine_pool import (
+    EnginePool,
+    PositionEval,
+    classify_games,
+    classify_plies,
+    evaluate_game,
+)
+from chess_tactics.lichess_game import iter_game_plies
+
+from ._lichess_games import GAME_1
+
+ENGINE = [sys.executable, str(Path(__file__).parent / "_uci_engine.py")]
+LIMIT = chess.engine.Limit(nodes=1)
+
+# Scholar's mate
+GAME = {"moves": "e4 e5 Qh5 Nc6 Bc4 Nf6 Qxf7#"}
+
+
+def test_analyse():
+    async def _main():
+        async with EnginePool(ENGINE, size=2, limit=LIMIT, multipv=2) as pool:
+            board = chess.Board("4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1")
+            infos = await pool.analyse(board)
+            assert [info["pv"][0] for info in infos] == [
+                chess.Move.from_uci("d2d5"),
+                chess.Move.from_uci("d2a2"),
+            ]
+            assert infos[0]["score"] == chess.engine.PovScore(
+                chess.engine.Cp(-400), chess.WHITE
+            )
+            evals = await asyncio.gather(*[pool.evaluate(board) for _ in range(10)])
+            assert evals[0].best_moves == [
+                chess.Move.from_uci("d2d5"),
+                chess.Move.from_uci("d2a2"),
+            ]
+            assert all(e == evals[0] for e in evals)
+
+    asyncio.run(_main())
+
+
+def test_evaluate_game():
+    async def _main():
+        async with EnginePool(ENGINE, size=2, limit=LIMIT, max_queued=1) as pool:
+            return await evaluate_game(pool, GAME)
+
+    evals = asyncio.run(_main())
+    assert len(evals) == 8
+    assert evals[-1] == PositionEval(
+        chess.engine.PovScore(chess.engine.Mate(0), chess.BLACK), [], []
+    )
+    assert evals[6].best_moves == [chess.Move.from_uci("h5f7")]
+    assert evals[6].score == chess.engine.PovScore(chess.engine.Mate(1), chess.WHITE)
+
+    mistakes = classify_plies(GAME, evals)
+    assert len(mistakes) == 7
+    assert mistakes[5] == ["hung_mate_1"]  # Nf6
+
+
+def test_evaluate_game_mates():
+    analysed = []
+
+    class _CountingPool(EnginePool):
+        async def analyse(self, board, **kwargs):
+            analysed.append(board.fen())
+            return await super().analyse(board, **kwargs)
+
+    async def _main(max_mate_n):
+        async with _CountingPool(ENGINE, limit=LIMIT, max_mate_n=max_mate_n) as pool:
+            return await evaluate_game(pool, GAME)
+
+    evals = asyncio.run(_main(0))
+    assert len(analysed) == 8
+
+    analysed.clear()
+    solved_evals = asyncio.run(_main(2))
+    # Qxf7# is found without the engine
+    assert len(analysed) == 7
+    assert solved_evals[6] == PositionEval(
+        chess.engine.PovScore(chess.engine.Mate(1), chess.WHITE),
+        [chess.Move.from_uci("h5f7")],
+        [chess.Move.from_uci("h5f7")],
+    )
+    assert [e.score for e in solved_evals] == [e.score for e in evals]
+    assert classify_plies(GAME, solved_evals) == classify_plies(GAME, evals)
+
+
+def test_classify_games():
+    games = [GAME, {"moves": "e4 e5"}, GAME]
+
+    async def _main():
+        async with EnginePool(ENGINE, size=2, limit=LIMIT) as pool:
+            with ThreadPoolExecutor(1) as executor:
+                return [
+                    result
+                    async for result in classify_games(
+                        pool, games, executor=executor, max_pending=1
+                    )
+                ]
+
+    results = asyncio.run(_main())
+    assert [len(r) for r in results] == [7, 2, 7]
+    assert results[0] == results[2]
+
+
+def test_evaluate_game_lichess_analysis():
+    evaluated = []
+
+    class _CountingPool(EnginePool):
+        async def evaluate(self, board):
+            evaluated.append(board.fen())
+            return await super().evaluate(board)
+
+    async def _main(use_lichess_analysis):
+        async with _CountingPool(ENGINE, size=2, limit=LIMIT) as pool:
+            return await evaluate_game(
+                pool, GAME_1, use_lichess_analysis=use_lichess_analysis
+            )
+
+    evals = asyncio.run(_main(True))
+    # only the final position is not covered by Lichess analysis
+    assert evaluated == ["r5k1/pp4q1/8/7p/3NpB2/2QnP2b/PP6/3R2K1 w - - 2 27"]
+    assert len(evals) == 53
+
+    mistakes = classify_plies(GAME_1, evals)
+    for game_ply in iter_game_plies(GAME_1):
+        if game_ply.best_move is not None:
+            assert mistakes[game_ply.ply] == game_ply.mistakes
+
+    evaluated.clear()
+    asyncio.run(_main(False))
+    assert len(evaluated) == 53
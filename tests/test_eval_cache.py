@@ -0,0 +1,86 @@
+import asyncio
+
+import chess
+import chess.engine
+import pytest
+from chess.engine import Cp, Limit, Mate, MateGiven, PovScore
+
+from chess_tactics.engine_pool import EnginePool, evaluate_game
+from chess_tactics.eval_cache import EvalCache, PositionEval, decode_eval, encode_eval
+
+from .test_engine_pool import ENGINE, GAME, LIMIT
+
+MOVES = [chess.Move.from_uci(uci) for uci in ["e2e4", "a7a8q", "h2h1n", "e1g1"]]
+
+
+@pytest.mark.parametrize(
+    "score",
+    [
+        None,
+        PovScore(Cp(35), chess.WHITE),
+        PovScore(Cp(-120), chess.BLACK),
+        PovScore(Mate(3), chess.WHITE),
+        PovScore(Mate(-2), chess.BLACK),
+        PovScore(Mate(0), chess.BLACK),
+        PovScore(MateGiven, chess.WHITE),
+    ],
+)
+@pytest.mark.parametrize("turn", chess.COLORS)
+def test_encode_eval(score, turn):
+    position_eval = PositionEval(score, MOVES[:2], MOVES)
+    data = encode_eval(position_eval, turn)
+    assert len(data) == 5 + 2 + 4 + 2 + 8
+    decoded = decode_eval(data, turn)
+    assert decoded.best_moves == MOVES[:2]
+    assert decoded.pv == MOVES
+    if score is None:
+        assert decoded.score is None
+    else:
+        assert decoded.score is not None
+        assert decoded.score.white() == score.white()
+
+
+def test_eval_cache(tmp_path):
+    path = str(tmp_path / "evals.sqlite")
+    board = chess.Board()
+    position_eval = PositionEval(PovScore(Cp(20), chess.WHITE), MOVES[:1], MOVES)
+    limit = Limit(nodes=1000)
+
+    cache = EvalCache(path, batch_size=2)
+    reader = EvalCache(path)
+    assert cache.get(board, limit) is None
+    cache.put(board, limit, 1, position_eval)
+    assert cache.get(board, limit) == position_eval
+    assert cache.get(board, limit, multipv=2) is None
+    assert cache.get(board, Limit(nodes=1001)) is None
+
+    # not written yet
+    assert reader.get(board, limit) is None
+
+    board_after = chess.Board()
+    board_after.push(MOVES[0])
+    cache.put(board_after, limit, 1, position_eval)
+    assert reader.get(board, limit) == position_eval
+    assert reader.get(board_after, limit) == position_eval
+    cache.close()
+    reader.close()
+
+    with EvalCache(path) as cache:
+        assert len(cache) == 2
+        assert cache.get(board, limit) == position_eval
+
+
+def test_engine_pool_eval_cache(tmp_path):
+    path = str(tmp_path / "evals.sqlite")
+
+    async def _evaluate(pool_cls):
+        with EvalCache(path) as cache:
+            async with pool_cls(ENGINE, limit=LIMIT, eval_cache=cache) as pool:
+                return await evaluate_game(pool, GAME)
+
+    class _NoEnginePool(EnginePool):
+        async def analyse(self, board, **kwargs):
+            raise AssertionError("the engine shouldn't be used")
+
+    evals = asyncio.run(_evaluate(EnginePool))
+    assert asyncio.run(_evaluate(_NoEnginePool)) == evals
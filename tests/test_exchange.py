@@ -2,9 +2,11 @@ import chess
 import pytest
 
 from chess_tactics.exchange import (
+    exchange_map,
     get_capture_exchange_evaluation,
     get_exchange_evaluation,
     get_move_captured_value,
+    see_ge,
 )
 
 from .fens import (
@@ -55,12 +57,11 @@ LEORIK_TEST_EXAMPLES = [
     ),  # en passant!
     ("3q2nk/pb1r1p2/np6/3P2Pp/2p1P3/2R1B2B/PQ3P1P/3R2K1 w - h6 0 1", "gxh6", 1),
     ("2r4r/1P4pk/p2p1b1p/7n/BB3p2/2R2p2/P1P2P2/4RK2 w - - 0 1", "Rxc8", 5),
-    pytest.param(
+    (
         "2r5/1P4pk/p2p1b1p/5b1n/BB3p2/2R2p2/P1P2P2/4RK2 w - - 0 1",
         "Rxc8",
         5,
-        marks=pytest.mark.skip(),
-    ),  # last capture is promotion; needs more analysis?
+    ),  # last capture is promotion
     ("2r4k/2r4p/p7/2b2p1b/4pP2/1BR5/P1R3PP/2Q4K w - - 0 1", "Rxc5", 3),
     ("8/pp6/2pkp3/4bp2/2R3b1/2P5/PP4B1/1K6 w - - 0 1", "Bxc6", -2),
     ("4q3/1p1pr1k1/1B2rp2/6p1/p3PP2/P3R1P1/1P2R1K1/4Q3 b - - 0 1", "Rxe4", -4),
@@ -117,18 +118,16 @@ LEORIK_TEST_EXAMPLES = [
     ("1n2kb1r/p1P4p/2qb4/5pP1/4n2Q/8/PP1PPP1P/RNB1KBNR w KQk - 0 1", "cxb8=Q", 2),
     ("rnbqk2r/pp3ppp/2p1pn2/3p4/3P4/N1P1BN2/PPB1PPPb/R2Q1RK1 w kq - 0 1", "Kxh2", 3),
     ("3N4/2K5/2n5/1k6/8/8/8/8 b - - 0 1", "Nxd8", 0),
-    pytest.param(
-        "3N4/2P5/2n5/1k6/8/8/8/4K3 b - - 0 1", "Nxd8", -8, marks=pytest.mark.xfail()
-    ),  # last recapture is promotion
-    pytest.param(
-        "3n3r/2P5/8/1k6/8/8/3Q4/4K3 w - - 0 1", "Qxd8", 3, marks=pytest.mark.xfail()
-    ),  # this one needs to be fixed
+    ("3N4/2P5/2n5/1k6/8/8/8/4K3 b - - 0 1", "Nxd8", -8),  # recapture is promotion
+    ("3n3r/2P5/8/1k6/8/8/3Q4/4K3 w - - 0 1", "Qxd8", 3),
     ("3n3r/2P5/8/1k6/8/8/3Q4/4K3 w - - 0 1", "cxd8=Q", 7),
     ("r2n3r/2P1P3/4N3/1k6/8/8/8/4K3 w - - 0 1", "Nxd8", 3),
-    ("8/8/8/1k6/6b1/4N3/2p3K1/3n4 w - - 0 1", "Nxd1", 0),
-    pytest.param(
-        "8/8/1k6/8/8/2N1N3/2p1p1K1/3n4 w - - 0 1", "Nexd1", -8, marks=pytest.mark.xfail
-    ),  # needs to be fixed
+    (
+        "8/8/8/1k6/6b1/4N3/2p3K1/3n4 w - - 0 1",
+        "Nxd1",
+        -8,
+    ),  # recapture is promotion (was: 0)
+    ("8/8/1k6/8/8/2N1N3/2p1p1K1/3n4 w - - 0 1", "Nexd1", -8),
     ("8/8/1k6/8/8/2N1N3/4p1K1/3n4 w - - 0 1", "Ncxd1", 1),
     ("r1bqk1nr/pppp1ppp/2n5/1B2p3/1b2P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 0 1", "O-O", 0),
 ]
@@ -174,6 +173,23 @@ def test_get_exchange_evaluation_basic():
     assert get_exchange_evaluation(board, chess.BLACK, chess.E4) == 0
 
 
+def test_get_exchange_evaluation_en_passant():
+    board = chess.Board("1k6/8/8/n3p1Pp/8/2B5/8/1K6 w - h6 0 1")
+    assert get_exchange_evaluation(board, chess.WHITE, chess.H6) == 1
+
+    # pawn is recaptured
+    board = chess.Board("1k6/6b1/8/n3p1Pp/8/2B5/8/1K6 w - h6 0 1")
+    assert get_exchange_evaluation(board, chess.WHITE, chess.H6) == 0
+
+
+def test_get_exchange_evaluation_promotion():
+    # cxd8=Q, Rxd8, Qxd8
+    fen = "3n3r/2P5/8/1k6/8/8/3Q4/4K3 w - - 0 1"
+    board = chess.Board(fen)
+    assert get_exchange_evaluation(board, chess.WHITE, chess.D8) == 7
+    assert board.fen() == fen
+
+
 @pytest.mark.parametrize(
     ["fen", "move_san", "value"],
     [
@@ -187,3 +203,83 @@ def test_get_move_captured_value(fen, move_san, value):
     board = chess.Board(fen)
     move = board.parse_san(move_san)
     assert get_move_captured_value(board, move) == value
+
+
+@pytest.mark.parametrize(
+    ["fen", "move"],
+    [
+        # some of the examples are pytest.param() with xfail marks
+        getattr(example, "values", example)[:2]
+        for example in LEORIK_TEST_EXAMPLES
+    ]
+    + [(CAPTURE_WITH_PROMOTION, "dxe8=Q")],
+)
+def test_see_ge_move(fen, move):
+    board = chess.Board(fen)
+    move = board.parse_san(move)
+    value = get_capture_exchange_evaluation(board, move)
+    for threshold in range(-10, 11):
+        assert see_ge(board, move, threshold) == (value >= threshold)
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        NIMZOVICH_TARRASCH,
+        EXAMPLE_04,
+        "3n3r/2P5/8/1k6/8/8/3Q4/4K3 w - - 0 1",
+        "1k6/6b1/8/n3p1Pp/8/2B5/8/1K6 w - h6 0 1",
+    ],
+)
+def test_see_ge_square(fen):
+    board = chess.Board(fen)
+    for square in chess.SQUARES:
+        for color in chess.COLORS:
+            value = get_exchange_evaluation(board, color, square)
+            for threshold in range(-2, 11):
+                result = see_ge(board, square, threshold, color=color)
+                assert result == (value >= threshold)
+
+
+def test_see_ge_default_color():
+    board = chess.Board(NIMZOVICH_TARRASCH)
+    assert see_ge(board, chess.F1, 2)
+    assert not see_ge(board, chess.F1, 3)
+    with pytest.raises(ValueError):
+        see_ge(board, chess.E3, 0)
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        NIMZOVICH_TARRASCH,
+        EXAMPLE_04,
+        EXAMPLE_05,
+        "3n3r/2P5/8/1k6/8/8/3Q4/4K3 w - - 0 1",
+        "1k6/6b1/8/n3p1Pp/8/2B5/8/1K6 w - h6 0 1",
+    ],
+)
+def test_exchange_map(fen):
+    board = chess.Board(fen)
+    result = exchange_map(board)
+    for color in chess.COLORS:
+        for square in chess.SQUARES:
+            piece = board.piece_at(square)
+            if (
+                piece is not None
+                and piece.color != color
+                and piece.piece_type != chess.KING
+            ):
+                expected = get_exchange_evaluation(board, color, square)
+            elif square == board.ep_square and color == board.turn:
+                expected = get_exchange_evaluation(board, color, square)
+            else:
+                expected = 0
+            assert result.values[color][square] == expected
+        attacked = chess.SquareSet(result.attacked[color])
+        assert all(board.is_attacked_by(color, square) for square in attacked)
+
+
+def test_exchange_map_en_passant():
+    board = chess.Board("1k6/8/8/n3p1Pp/8/2B5/8/1K6 w - h6 0 1")
+    assert exchange_map(board).values[chess.WHITE][chess.H6] == 1
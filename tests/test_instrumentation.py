@@ -0,0 +1,69 @@
+import chess
+import pytest
+
+from chess_tactics import cache, instrumentation
+from chess_tactics.exchange import get_capture_exchange_evaluation
+from chess_tactics.mistakes import classify_move, hung_other_piece
+from chess_tactics.tactics import get_hanging_pieces
+
+from .fens import EXAMPLE_04
+
+
+@pytest.fixture
+def enabled():
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+
+
+def test_disabled_by_default():
+    assert not instrumentation.is_enabled()
+    get_hanging_pieces(chess.Board(EXAMPLE_04), chess.BLACK)
+    assert instrumentation.get_report() == instrumentation.Report({}, {}, {})
+
+
+def test_counters(enabled):
+    board = chess.Board(EXAMPLE_04)
+    move = chess.Move.from_uci("c3e5")
+    classify_move(board, move, [move], [], [move])
+
+    report = instrumentation.get_report()
+    counts = report.counts
+    assert counts["board_pushes"] >= 1
+    assert "board_copies" not in counts
+    assert counts["see_ge_calls"] >= 1
+    assert counts["see_ge_depth"] >= 1
+    assert counts["get_attackers_calls"] >= 1
+    assert report.detector_calls["classify_move"] == 1
+    assert report.detector_calls["hung_other_piece"] == 1
+    assert report.detector_seconds["classify_move"] >= (
+        report.detector_seconds["hung_other_piece"]
+    )
+    assert "hung_other_piece" in instrumentation.format_report(report)
+
+    see_calls = counts.get("see_calls", 0)
+    get_capture_exchange_evaluation(board, move)
+    counts = instrumentation.get_report().counts
+    assert counts["see_calls"] == see_calls + 1
+    assert counts["see_depth"] >= counts["see_max_depth"] >= 1
+
+    instrumentation.reset()
+    assert instrumentation.get_report() == instrumentation.Report({}, {}, {})
+
+
+def test_cache_counters(enabled):
+    board = chess.Board(EXAMPLE_04)
+    cache.enable(maxsize=100)
+    try:
+        get_hanging_pieces(board, chess.BLACK)
+        get_hanging_pieces(board, chess.BLACK)
+    finally:
+        cache.disable()
+    counts = instrumentation.get_report().counts
+    assert counts["hanging_cache_misses"] == 1
+    assert counts["hanging_cache_hits"] == 1
+
+
+def test_timed_keeps_metadata():
+    assert hung_other_piece.__name__ == "hung_other_piece"
+    assert "other pieces hang" in (hung_other_piece.__doc__ or "")
@@ -6,7 +6,9 @@ from chess_tactics.lichess_game import (
     eval_to_best_move,
     eval_to_score,
     game_to_board,
+    get_lichess_evals,
     get_user_colors,
+    iter_game_plies,
 )
 
 from ._lichess_games import GAME_1
@@ -18,6 +20,68 @@ def test_game_to_board():
     assert board.fen() == "r5k1/pp4q1/8/7p/3NpB2/2QnP2b/PP6/3R2K1 w - - 2 27"
 
 
+def test_game_to_board_detached():
+    board = game_to_board(GAME_1, detached=True)
+    assert board.move_stack == []
+    assert board.fen() == "r5k1/pp4q1/8/7p/3NpB2/2QnP2b/PP6/3R2K1 w - - 2 27"
+
+
+def test_iter_game_plies():
+    plies = []
+    for game_ply in iter_game_plies(GAME_1):
+        assert game_ply.board.move_stack == []
+        plies.append(
+            (
+                game_ply.ply,
+                game_ply.board.san(game_ply.move),
+                game_ply.best_move,
+                game_ply.mistakes,
+            )
+        )
+    assert len(plies) == 52
+    assert plies[0] == (0, "d4", None, [])
+    assert plies[20] == (20, "Bd3", chess.Move.from_uci("a1c1"), [])
+    assert plies[46] == (46, "Bf4", chess.Move.from_uci("c3c4"), ["left_piece_hanging"])
+    assert plies[50][3] == ["hung_mate_3_plus"]
+    # the board is updated in place
+    assert game_ply.board.fen() == "r5k1/pp4q1/8/7p/3NpB2/2QnP2b/PP6/3R2K1 w - - 2 27"
+
+
+def test_iter_game_plies_no_analysis():
+    game = {"moves": "e4 e5 Nf3"}
+    plies = list(iter_game_plies(game))
+    assert [p.eval for p in plies] == [None, None, None]
+    assert [p.mistakes for p in plies] == [[], [], []]
+    assert plies[0].board is plies[2].board
+
+
+def test_get_lichess_evals():
+    evals = get_lichess_evals(GAME_1)
+    assert len(evals) == 53
+    assert evals[-1] is None
+    assert all(e is not None for e in evals[:-1])
+
+    assert evals[0] is not None
+    assert evals[0].score is None
+    assert evals[0].best_moves == [chess.Move.from_uci("d2d4")]  # the move made
+
+    ply_20 = evals[20]
+    assert ply_20 is not None
+    assert ply_20.score == chess.engine.PovScore(Cp(119), chess.WHITE)
+    assert ply_20.best_moves == [chess.Move.from_uci("a1c1")]
+    assert ply_20.pv._moves is None  # not parsed yet
+    assert len(ply_20.pv) == 12
+    assert ply_20.pv[:2] == [chess.Move.from_uci("a1c1"), chess.Move.from_uci("d7e5")]
+
+
+def test_get_lichess_evals_missing():
+    assert get_lichess_evals({"moves": "e4 e5"}) == [None, None, None]
+    game = {"moves": "e4 e5 Nf3", "analysis": [{"eval": 20}, {}, {"eval": 30}]}
+    evals = get_lichess_evals(game)
+    assert evals[0] is not None and evals[1] is not None
+    assert evals[2:] == [None, None]
+
+
 @pytest.mark.parametrize(
     ["lichess_eval", "expected_score"],
     [
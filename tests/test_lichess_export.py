@@ -0,0 +1,83 @@
+import gzip
+import json
+import threading
+
+import pytest
+
+from chess_tactics.lichess_export import ZSTD_MAGIC, iter_lines, read_games
+
+GAMES = [
+    {"id": "a", "variant": "standard", "speed": "blitz", "analysis": [{"eval": 1}]},
+    {"id": "b", "variant": "chess960", "speed": "blitz", "analysis": [{"eval": 1}]},
+    {
+        "id": "c",
+        "variant": "standard",
+        "speed": "rapid",
+        "players": {"white": {"analysis": {"acpl": 10}}},
+    },
+    {"id": "d", "variant": "standard", "speed": "bullet", "analysis": []},
+]
+
+
+def _write(path, compress=False):
+    data = "".join(json.dumps(game) + "\n" for game in GAMES).encode()
+    path.write_bytes(gzip.compress(data) if compress else data)
+    return str(path)
+
+
+@pytest.mark.parametrize("compress", [False, True])
+@pytest.mark.parametrize("block_size", [7, 1 << 20])
+def test_read_games(tmp_path, compress, block_size):
+    path = _write(tmp_path / "games.ndjson", compress)
+
+    def _ids(**kwargs):
+        return [g["id"] for g in read_games(path, block_size=block_size, **kwargs)]
+
+    assert _ids() == ["a", "b", "c", "d"]
+    assert _ids(variants={"standard"}) == ["a", "c", "d"]
+    assert _ids(speeds={"blitz", "rapid"}) == ["a", "b", "c"]
+    assert _ids(with_analysis=True) == ["a", "b"]
+    assert _ids(variants={"standard"}, with_analysis=True) == ["a"]
+
+
+def test_iter_lines(tmp_path):
+    path = tmp_path / "lines.txt"
+    path.write_bytes(b"foo\n\nbar\r\nbaz")
+    assert list(iter_lines(str(path), block_size=2)) == [b"foo", b"bar\r", b"baz"]
+
+
+def test_iter_lines_stop(tmp_path):
+    path = tmp_path / "lines.txt"
+    path.write_bytes(b"line\n" * 1000)
+    lines = iter_lines(str(path), block_size=5)
+    assert next(lines) == b"line"
+    threads = threading.active_count()
+    lines.close()
+    assert threading.active_count() == threads - 1
+
+
+def test_read_errors(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        list(read_games(str(tmp_path / "missing.ndjson")))
+
+
+def test_zstd(tmp_path):
+    path = tmp_path / "games.ndjson.zst"
+    try:
+        import zstandard  # type: ignore[import-not-found]
+    except ImportError:
+        path.write_bytes(ZSTD_MAGIC + b"\x00" * 10)
+        with pytest.raises(ImportError):
+            list(read_games(str(path)))
+    else:
+        # two frames back to back, like pzstd output
+        compressor = zstandard.ZstdCompressor()
+        path.write_bytes(
+            b"".join(
+                compressor.compress(
+                    "".join(json.dumps(game) + "\n" for game in games).encode()
+                )
+                for games in [GAMES[:2], GAMES[2:]]
+            )
+        )
+        assert [g["id"] for g in read_games(str(path))] == ["a", "b", "c", "d"]
@@ -0,0 +1,120 @@
+import chess
+import chess.engine
+import pytest
+
+from chess_tactics.mates import find_mate, find_mate_in_1, find_mate_in_2, get_mate_eval
+
+from . import fens
+from .random_games import iter_random_moves
+
+
+def _has_mate_in_1(board: chess.Board) -> bool:
+    for move in board.legal_moves:
+        board.push(move)
+        mate = board.is_checkmate()
+        board.pop()
+        if mate:
+            return True
+    return False
+
+
+def _assert_mates(board: chess.Board, line: list[chess.Move]) -> None:
+    for move in line:
+        board.push(move)
+    assert board.is_checkmate()
+    for _ in line:
+        board.pop()
+
+
+@pytest.mark.parametrize(
+    "fen, expected",
+    [
+        # Scholar's mate
+        (
+            "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4",
+            ["h5f7"],
+        ),
+        # back rank
+        ("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1", ["a1a8"]),
+        # smothered mate
+        ("6rk/6pp/8/6N1/8/8/8/K7 w - - 0 1", ["g5f7"]),
+        # a discovered double check: any knight move mates
+        ("3rkr2/3p1p2/4N3/8/8/8/8/K3R3 w - - 0 1", ["e6g7", "e6c7", "e6g5"]),
+        # a single discovered check is not enough
+        ("3rkr2/8/4N3/8/8/8/8/K3R3 w - - 0 1", []),
+        # castling
+        ("4rkr1/4p1p1/8/8/8/8/8/4K2R w K - 0 1", ["h1f1", "e1g1"]),
+        # promotion and underpromotion
+        ("k7/2P5/1K6/8/8/8/8/8 w - - 0 1", ["c7c8q", "c7c8r"]),
+        ("5rrb/4P1pk/7p/8/4B3/8/8/K7 w - - 0 1", ["e7f8n"]),
+        # checks which are not mates
+        (fens.EXAMPLE_00, []),
+        ("5k2/8/8/8/8/8/8/R3K3 w Q - 0 1", []),
+    ],
+)
+def test_find_mate_in_1(fen, expected):
+    board = chess.Board(fen)
+    move = find_mate_in_1(board)
+    if expected:
+        assert move is not None and move.uci() in expected
+        _assert_mates(board, [move])
+    else:
+        assert move is None
+    assert board.fen() == fen
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_find_mate_in_1_random_games(seed):
+    board = chess.Board()
+    for random_move in iter_random_moves(board, seed):
+        move = find_mate_in_1(board)
+        assert (move is not None) == _has_mate_in_1(board)
+        if move is not None:
+            _assert_mates(board, [move])
+        board.push(random_move)
+
+
+@pytest.mark.parametrize(
+    "fen, has_mate",
+    [
+        # a queen sacrifice and a smothered mate
+        ("r6k/6pp/7N/8/8/1Q6/6PP/6K1 w - - 0 1", True),
+        # a quiet move: Kb6 and the rook mates on the back rank
+        ("k7/8/2K5/8/8/8/8/1R6 w - - 0 1", True),
+        # mate in 1 is not a mate in 2
+        ("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1", False),
+        ("4k3/8/8/8/8/8/8/R3K3 w - - 0 1", False),
+    ],
+)
+def test_find_mate_in_2(fen, has_mate):
+    board = chess.Board(fen)
+    line = find_mate_in_2(board)
+    assert (line is not None) == has_mate
+    if line is not None:
+        assert len(line) == 3
+        _assert_mates(board, line)
+    assert board.fen() == fen
+
+
+def test_find_mate():
+    board = chess.Board("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+    assert find_mate(board) == [chess.Move.from_uci("a1a8")]
+    assert find_mate(board, max_n=0) is None
+
+    board = chess.Board("k7/8/2K5/8/8/8/8/1R6 w - - 0 1")
+    assert find_mate(board, max_n=1) is None
+    line = find_mate(board)
+    assert line is not None and len(line) == 3
+    assert find_mate(chess.Board()) is None
+
+
+def test_get_mate_eval():
+    board = chess.Board("k7/8/2K5/8/8/8/8/1R6 w - - 0 1")
+    position_eval = get_mate_eval(board)
+    assert position_eval is not None
+    assert position_eval.score == chess.engine.PovScore(
+        chess.engine.Mate(2), chess.WHITE
+    )
+    assert len(position_eval.best_moves) == 1
+    assert position_eval.pv == position_eval.best_moves
+    assert get_mate_eval(board, max_n=1) is None
@@ -6,6 +6,7 @@ from chess.engine import Cp, Mate
 
 from chess_tactics.lichess_game import get_lichess_analyze_link
 from chess_tactics.mistakes import (
+    classify_move,
     hanging_piece_not_captured,
     hung_fork,
     hung_mate_n,
@@ -894,3 +895,80 @@ def test_missed_mane_n_plus(score, best_score, n, expected):
 def test_missed_sacrifice(fen, move_san, best_moves_san, expected):
     board, move, best_moves = _board_move_best_moves(fen, move_san, best_moves_san)
     assert missed_sacrifice(board, move, best_moves) is expected
+
+
+@pytest.mark.parametrize(
+    ["fen", "move_san", "best_moves_san", "best_opponent_moves_san", "pv_san_list"],
+    [
+        (
+            "r1b2r2/5k2/p3qp2/2p1p2R/P3P2B/2P2QK1/8/R7 w - - 2 34",
+            "Qg4",
+            ["Rh7+"],
+            ["Qexg4"],
+            ["Rh7+", "Kg8"],
+        ),
+        (
+            "r3k2r/ppp2pp1/2n1q2p/3N3P/4n3/1P3N2/PKP1QPP1/3R3R b kq - 0 15",
+            "Nd6",
+            ["O-O-O"],
+            ["Nxc7"],
+            ["O-O-O", "Nc3", "f5", "Nxe4", "fxe4", "Nd2"],
+        ),
+        (
+            "2r3k1/pp6/3bpr1p/3p1ppq/3P1P2/2P2NQ1/PP4PP/R4RK1 b - - 1 21",
+            "Kg7",
+            ["Bxf4"],
+            [],
+            None,
+        ),
+        ("1k6/8/8/4p3/8/2B5/8/1K6 w - - 0 1", "Bxe5", ["Bxe5"], None, None),
+    ],
+)
+def test_classify_move(
+    fen, move_san, best_moves_san, best_opponent_moves_san, pv_san_list
+):
+    board, move, best_moves = _board_move_best_moves(fen, move_san, best_moves_san)
+    best_opponent_moves = (
+        None
+        if best_opponent_moves_san is None
+        else _best_opponent_moves(board, move, best_opponent_moves_san)
+    )
+    pv = san_list_to_moves(board, pv_san_list) if pv_san_list else None
+    labels = classify_move(board, move, best_moves, best_opponent_moves, pv)
+    # moves are looked ahead on the board itself, and taken back
+    assert board.fen() == fen
+    assert board.move_stack == []
+
+    expected = [
+        name
+        for name, detected in [
+            (
+                "hanging_piece_not_captured",
+                hanging_piece_not_captured(board, move, best_moves),
+            ),
+            ("hung_moved_piece", hung_moved_piece(board, move, best_opponent_moves)),
+            ("started_bad_trade", started_bad_trade(board, move, best_opponent_moves)),
+            ("hung_other_piece", hung_other_piece(board, move, best_moves)),
+            ("left_piece_hanging", left_piece_hanging(board, move, best_moves)),
+            ("missed_fork", missed_fork(board, move, best_moves)),
+            ("hung_fork", hung_fork(board, move, best_opponent_moves or [], pv)),
+            ("missed_sacrifice", missed_sacrifice(board, move, best_moves)),
+        ]
+        if detected
+    ]
+    assert labels == expected
+
+
+@pytest.mark.parametrize(
+    ["scores", "expected"],
+    [
+        ((Cp(0), Cp(10)), []),
+        ((Mate(-1), Cp(0)), ["hung_mate_1"]),
+        ((Cp(0), Mate(2)), ["missed_mate_2"]),
+        ((Mate(-5), Cp(0)), ["hung_mate_3_plus"]),
+        ((Cp(0), Mate(4)), ["missed_mate_3_plus"]),
+    ],
+)
+def test_classify_move_mates(scores, expected):
+    board, move, best_moves = _board_move_best_moves(EXAMPLE_01, "Kc1", ["Kc1"])
+    assert classify_move(board, move, best_moves, scores=scores) == expected
@@ -0,0 +1,75 @@
+import chess
+import pytest
+
+from chess_tactics import move_utils
+from chess_tactics.move_utils import parse_san, pushed, san_list_to_moves
+
+from ._lichess_games import GAME_1
+
+
+@pytest.mark.parametrize(
+    ["fen", "san", "uci"],
+    [
+        (chess.STARTING_FEN, "e4", "e2e4"),
+        (chess.STARTING_FEN, "e3", "e2e3"),
+        (chess.STARTING_FEN, "Nf3", "g1f3"),
+        # en passant
+        ("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", "exd6", "e5d6"),
+        # promotions
+        ("4k3/P7/8/8/8/8/8/4K3 w - - 0 1", "a8=Q+", "a7a8q"),
+        ("1n2k3/P7/8/8/8/8/8/4K3 w - - 0 1", "axb8=N", "a7b8n"),
+        # disambiguation
+        ("4k3/8/8/8/8/8/8/R3K2R w - - 0 1", "Rad1", "a1d1"),
+        # the other knight is pinned, so the move is not disambiguated
+        ("4k3/4r3/8/8/8/2N1N3/8/4K3 w - - 0 1", "Nd5", "c3d5"),
+        # castling
+        ("4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1", "O-O-O", "e1c1"),
+    ],
+)
+def test_parse_san(fen, san, uci):
+    board = chess.Board(fen)
+    assert board.parse_san(san) == chess.Move.from_uci(uci)
+    assert parse_san(board, san) == chess.Move.from_uci(uci)
+    assert parse_san(board, san) == chess.Move.from_uci(uci)  # cached
+
+
+@pytest.mark.parametrize(
+    ["fen", "san"],
+    [
+        (chess.STARTING_FEN, "e5"),
+        (chess.STARTING_FEN, "Nd2"),
+        ("4k3/P7/8/8/8/8/8/4K3 w - - 0 1", "a8"),
+        # pinned knight
+        ("4k3/4r3/8/8/8/4N3/8/4K3 w - - 0 1", "Nd5"),
+        # ambiguous
+        ("4k3/8/8/8/8/8/4K3/R6R w - - 0 1", "Rd1"),
+    ],
+)
+def test_parse_san_invalid(fen, san):
+    with pytest.raises(ValueError):
+        parse_san(chess.Board(fen), san)
+
+
+def test_parse_san_cache():
+    move_utils._san_cache.clear()
+    san_list = GAME_1["moves"].split()
+    moves = san_list_to_moves(chess.Board(), san_list)
+    assert move_utils._san_cache.stats().misses == len(san_list)
+    assert san_list_to_moves(chess.Board(), san_list) == moves
+    assert move_utils._san_cache.stats().hits == len(san_list)
+
+
+def test_pushed():
+    board = chess.Board()
+    fen = board.fen()
+    with pushed(board, chess.Move.from_uci("e2e4")) as board_after:
+        assert board_after is board
+        assert board.piece_type_at(chess.E4) == chess.PAWN
+        board.push_san("e5")
+    assert board.fen() == fen
+    assert board.move_stack == []
+
+    with pytest.raises(ValueError):
+        with pushed(board, chess.Move.from_uci("g1f3")):
+            raise ValueError
+    assert board.fen() == fen
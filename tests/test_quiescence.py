@@ -0,0 +1,131 @@
+import chess
+import pytest
+
+from chess_tactics.exchange import get_capture_exchange_evaluation
+from chess_tactics.mistakes import hung_moved_piece
+from chess_tactics.quiescence import (
+    classify_capture_mistakes,
+    get_best_captures,
+    get_best_replies,
+    rank_captures,
+)
+
+from . import fens
+
+
+def _ranked_san(board: chess.Board, **kwargs) -> list[tuple[str, int]]:
+    return [
+        (board.san(candidate.move), candidate.score)
+        for candidate in rank_captures(board, **kwargs)
+    ]
+
+
+@pytest.mark.parametrize(
+    "fen, expected",
+    [
+        (fens.EXAMPLE_00, [("Bxe5+", 1)]),
+        (fens.EXAMPLE_01, [("Bxe5+", -2)]),
+        (fens.EXAMPLE_04, [("Rxe5", 1), ("Bxe5", 1)]),
+        # the checked king escapes by taking a pawn
+        (fens.EXAMPLE_08, [("Kxc2", 1)]),
+        (
+            fens.NIMZOVICH_TARRASCH,
+            [
+                ("Bxf1", 2),
+                ("Rxe4", -1),
+                ("Rxd4", -1),
+                ("Qxf1+", -2),
+                ("Bxf3", -5),
+                ("cxd4", -6),
+            ],
+        ),
+    ],
+)
+def test_rank_captures(fen, expected):
+    board = chess.Board(fen)
+    assert _ranked_san(board) == expected
+    assert board.fen() == fen
+
+
+def test_rank_captures_mate():
+    board = chess.Board(
+        "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4"
+    )
+    (san, score), *_ = _ranked_san(board)
+    assert san == "Qxf7#"
+    assert score > 1000
+
+
+def test_rank_captures_node_budget():
+    board = chess.Board(fens.NIMZOVICH_TARRASCH)
+    ranked = rank_captures(board, max_nodes=0)
+    assert {candidate.score for candidate in ranked} == {
+        get_capture_exchange_evaluation(board, candidate.move) for candidate in ranked
+    }
+    # Bxf3 wins a pawn, but leaves the h1 queen undefended
+    assert dict(_ranked_san(board, max_nodes=0))["Bxf3"] == 1
+    assert dict(_ranked_san(board))["Bxf3"] == -5
+
+
+@pytest.mark.parametrize("max_nodes", range(1, 6))
+def test_rank_captures_node_budget_in_check(max_nodes):
+    # Qxf7# is searched first; then the budget runs out at the checked
+    # king after Bxf7+, which must not be scored as a mate
+    board = chess.Board(
+        "r1bqkbnr/pppp1ppp/2n5/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 2 3"
+    )
+    scores = dict(_ranked_san(board, max_nodes=max_nodes))
+    assert scores["Qxf7#"] > 1000
+    assert scores["Bxf7+"] in (1, 2)
+
+
+def test_get_best_captures():
+    board = chess.Board(fens.NIMZOVICH_TARRASCH)
+    assert get_best_captures(board) == [chess.Move.from_uci("g2f1")]
+    assert get_best_captures(chess.Board(fens.EXAMPLE_01)) == []
+    assert get_best_captures(chess.Board(fens.EXAMPLE_04), max_moves=1) == [
+        chess.Move.from_uci("b5e5")
+    ]
+
+
+def test_get_best_replies():
+    board = chess.Board(fens.EXAMPLE_01)
+    move = board.parse_san("Bd4")
+    assert get_best_replies(board, move) == [chess.Move.from_uci("e5d4")]
+    assert board.fen() == fens.EXAMPLE_01
+
+
+@pytest.mark.parametrize(
+    "fen, move_san, expected",
+    [
+        (fens.EXAMPLE_01, "Bb2", []),
+        (fens.EXAMPLE_01, "Bd4", ["hung_moved_piece"]),
+        (fens.EXAMPLE_01, "Bxe5", ["started_bad_trade"]),
+        (
+            "1k1r3r/pb2n1qp/1p6/4bQ2/2P2p2/P2B4/1P3PPP/1RB1R1K1 w - - 10 26",
+            "Qh3",
+            ["hanging_piece_not_captured"],
+        ),
+        (
+            "r4rk1/p1p2p1p/2p1p1p1/3nP3/3PN2q/P4P2/1P1Q1P1P/R3K2R w KQ - 0 16",
+            "Nf6",
+            ["hung_moved_piece"],
+        ),
+    ],
+)
+def test_classify_capture_mistakes(fen, move_san, expected):
+    board = chess.Board(fen)
+    move = board.parse_san(move_san)
+    assert classify_capture_mistakes(board, move) == expected
+    assert board.fen() == fen
+
+
+def test_classify_capture_mistakes_search_overrides_see():
+    # the knight hangs by SEE, but after axb5 Rxg8 wins the material back
+    fen = "rnbqk1nR/1pppbp2/p7/4p1P1/8/N7/PPPPPPP1/R1BQKBN1 w Qq - 1 6"
+    board = chess.Board(fen)
+    move = chess.Move.from_uci("a3b5")
+    assert hung_moved_piece(board, move)
+    assert get_best_replies(board, move) == []
+    assert "hung_moved_piece" not in classify_capture_mistakes(board, move)
+    assert board.fen() == fen
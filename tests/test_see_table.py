@@ -0,0 +1,107 @@
+import chess
+import pytest
+
+from chess_tactics import see_table
+from chess_tactics.exchange import _evaluate_swap_list, _iter_square_swaps
+
+from . import fens
+from ._lichess_games import GAME_1
+from .random_games import iter_random_moves
+
+
+def _play_out(board: chess.Board, color: chess.Color, square: chess.Square) -> int:
+    return _evaluate_swap_list(list(_iter_square_swaps(board, color, square, None)))
+
+
+def _assert_matches_swaps(board: chess.Board) -> int:
+    """Compare all lookups with played out exchanges, and return
+    the number of squares found in the table."""
+    found = 0
+    unsafe = see_table.get_unsafe_squares(board)
+    for square in chess.scan_forward(board.occupied & ~board.kings):
+        for color in chess.COLORS:
+            value = see_table.lookup_exchange_value(board, color, square)
+            if value is not None:
+                found += 1
+                assert value == _play_out(board, color, square)
+                assert (
+                    see_table.lookup_exchange_value(board, color, square, unsafe=unsafe)
+                    == value
+                )
+    return found
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        value
+        for name, value in vars(fens).items()
+        if name.isupper() and isinstance(value, str)
+    ],
+)
+def test_fens(fen):
+    _assert_matches_swaps(chess.Board(fen))
+
+
+def test_game():
+    board = chess.Board()
+    found = 0
+    for san in str(GAME_1["moves"]).split():
+        board.push_san(san)
+        found += _assert_matches_swaps(board)
+    assert found > 0
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_random_games(seed):
+    board = chess.Board()
+    for move in iter_random_moves(board, seed):
+        _assert_matches_swaps(board)
+        board.push(move)
+
+
+@pytest.mark.parametrize(
+    "fen, square, expected",
+    [
+        # a pawn just hangs
+        (fens.EXAMPLE_00, chess.E5, 1),
+        # it's protected
+        (fens.EXAMPLE_01, chess.E5, 0),
+        ("1k6/8/3p4/4p3/8/2B5/8/1K2Q3 w - - 0 1", chess.E5, 0),
+        # a battery: the queen is an x-ray attacker
+        (fens.EXAMPLE_02, chess.E5, None),
+        # the attacking queen is pinned
+        (fens.EXAMPLE_06, chess.E5, None),
+        # a king is in check
+        (fens.EXAMPLE_08, chess.C2, None),
+        # a capture with promotion
+        ("1n2k3/P7/8/8/8/8/8/4K3 w - - 0 1", chess.B8, None),
+        # no attackers
+        (fens.EXAMPLE_00, chess.C3, 0),
+    ],
+)
+def test_lookup_exchange_value(fen, square, expected):
+    board = chess.Board(fen)
+    color = not board.color_at(square)
+    assert see_table.lookup_exchange_value(board, color, square) == expected
+
+
+def test_get_unsafe_squares():
+    board = chess.Board(fens.EXAMPLE_06)
+    # the queen is between its king and the rook
+    unsafe = see_table.get_unsafe_squares(board)
+    assert unsafe is not None and unsafe & chess.BB_B2
+    assert see_table.get_unsafe_squares(chess.Board(fens.EXAMPLE_08)) is None
+
+
+def test_stats():
+    see_table.reset_stats()
+    board = chess.Board(fens.EXAMPLE_01)
+    for _ in range(3):
+        see_table.lookup_exchange_value(board, chess.WHITE, chess.E5)
+    see_table.lookup_exchange_value(chess.Board(fens.EXAMPLE_02), chess.WHITE, chess.E5)
+    stats = see_table.get_stats()
+    assert stats.hits + stats.misses == 3
+    assert stats.hits >= 2
+    assert stats.skips == 1
+    assert 0 < stats.size < stats.maxsize == 291_600
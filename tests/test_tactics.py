@@ -3,6 +3,7 @@ import pytest
 
 from chess_tactics.tactics import (
     can_be_captured,
+    find_forks,
     get_hanging_pieces,
     is_fork,
     is_forking_move,
@@ -262,3 +263,38 @@ def test_is_forking_move(fen, move, expected):
     board = chess.Board(fen)
     move = board.parse_san(move)
     assert is_forking_move(board, move) is expected
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        "k7/8/1q3r2/8/8/4N3/2K5/8 w - - 0 1",
+        "k7/2r5/1q3r2/8/8/4N3/K7/8 w - - 0 1",
+        "k7/3r4/1q3r2/8/4P3/4N3/2K5/8 w - - 0 1",
+        "8/8/2k5/1n4n1/B7/8/4R3/2K5 w - - 0 1",
+        "1k6/6p1/1p3b2/2q5/8/6N1/8/1K3R2 w - - 0 1",
+        "4k3/1r6/2n5/5p2/B3p3/8/2Q5/4K3 w - - 2 14",
+        "k7/2r5/1q3r2/8/8/2B1N3/2K5/8 w - - 0 1",
+        "k7/8/8/8/8/1nb5/8/2K5 w - - 0 1",
+        # a check is a fork too
+        EXAMPLE_02,
+        # promotions
+        "8/q1P1k3/8/8/8/8/8/7K w - - 0 1",
+        "r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5Q2/PPPP1PPP/RNB1K1NR b KQkq - 3 3",
+    ],
+)
+def test_find_forks(fen):
+    board = chess.Board(fen)
+    expected = {move for move in board.legal_moves if is_forking_move(board, move)}
+    assert set(find_forks(board, board.turn)) == expected
+    assert board.fen() == fen
+
+
+def test_find_forks_opponent():
+    board = chess.Board("k7/8/1q3r2/8/8/4N3/2K5/8 b - - 0 1")
+    assert find_forks(board, chess.WHITE) == [chess.Move.from_uci("e3d5")]
+    assert board.fen() == "k7/8/1q3r2/8/8/4N3/2K5/8 b - - 0 1"
+    assert find_forks(board, chess.BLACK) == []
+    # white can't move again when black is in check
+    board = chess.Board("k7/8/1q3r2/8/8/4N3/2K5/R7 b - - 0 1")
+    assert find_forks(board, chess.WHITE) == []
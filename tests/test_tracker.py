@@ -0,0 +1,67 @@
+import random
+
+import chess
+import pytest
+
+from chess_tactics.exchange import get_exchange_evaluation
+from chess_tactics.tactics import get_hanging_pieces
+from chess_tactics.tracker import HangingTracker
+
+from . import fens
+from ._lichess_games import GAME_1
+from .random_games import iter_random_moves
+
+
+def _assert_matches_full_evaluation(tracker: HangingTracker) -> None:
+    board = tracker.board
+    for color in chess.COLORS:
+        assert tracker.hanging_pieces(color) == get_hanging_pieces(board, color)
+    for square, piece in board.piece_map().items():
+        if piece.piece_type != chess.KING:
+            expected = get_exchange_evaluation(board, not piece.color, square)
+            assert tracker.exchange_evaluation(square) == expected
+
+
+def test_game():
+    tracker = HangingTracker(chess.Board())
+    for san in str(GAME_1["moves"]).split():
+        tracker.push(tracker.board.parse_san(san))
+        _assert_matches_full_evaluation(tracker)
+    while tracker.board.move_stack:
+        tracker.pop()
+        _assert_matches_full_evaluation(tracker)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_games(seed):
+    rnd = random.Random(seed)
+    tracker = HangingTracker(chess.Board())
+    for move in iter_random_moves(tracker.board, seed, plies=200):
+        tracker.push(move)
+        _assert_matches_full_evaluation(tracker)
+        if rnd.random() < 0.2:
+            tracker.pop()
+            _assert_matches_full_evaluation(tracker)
+
+
+@pytest.mark.parametrize(
+    "fen, move",
+    [
+        # the pinning rook is captured, so f6 pawn defends g5 again
+        ("1nbq2nr/1ppp2pp/R4pk1/6N1/1b1p4/7P/2PQPPPN/4KB1R b K - 5 15", "b7a6"),
+        # en passant
+        ("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", "e5d6"),
+        # promotion with capture
+        ("1n2k3/P7/8/8/8/8/8/4K3 w - - 0 1", "a7b8q"),
+        # castling
+        ("4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1", "e1g1"),
+        (fens.EXAMPLE_04, "c3e5"),
+    ],
+)
+def test_moves(fen, move):
+    tracker = HangingTracker(chess.Board(fen))
+    tracker.push(chess.Move.from_uci(move))
+    _assert_matches_full_evaluation(tracker)
+    assert tracker.pop() == chess.Move.from_uci(move)
+    assert tracker.board.fen() == fen
+    _assert_matches_full_evaluation(tracker)
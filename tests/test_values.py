@@ -1,9 +1,19 @@
 import chess
 
-from chess_tactics.values import get_square_value
+from chess_tactics.values import PIECE_TYPES_BY_VALUE, get_square_value
 
 
 def test_get_square_value():
     board = chess.Board()
     assert get_square_value(board, chess.A1) == 5
     assert get_square_value(board, chess.B7) == 1
+
+
+def test_piece_types_by_value():
+    assert PIECE_TYPES_BY_VALUE == [
+        [chess.PAWN],
+        [chess.KNIGHT, chess.BISHOP],
+        [chess.ROOK],
+        [chess.QUEEN],
+        [chess.KING],
+    ]